@@ -0,0 +1,159 @@
+"""
+自适应轮询调度模块
+根据各网站近期的库存变化频率计算下次运行时间，变化频繁的网站轮询更勤，长期不变的网站降低轮询频率，
+并使用优先队列保证每次总是先运行最逾期的网站
+"""
+import os
+import re
+import glob
+import heapq
+import time
+from datetime import datetime
+
+
+class AdaptiveSiteScheduler:
+    """
+    按网站计算轮询间隔的调度器
+
+    轮询间隔 = 回溯窗口内两次变化的平均间隔 / polls_per_change，并限制在 [最小间隔, 最大间隔] 之间；
+    回溯窗口内没有任何变化记录的网站使用最大间隔。
+    """
+
+    CHANGE_FILE_PATTERN = re.compile(r"inventory_changes_(\d{8}_\d{6})\.json$")
+
+    def __init__(self, data_dir, logger, min_interval_minutes=5, max_interval_minutes=60,
+                 lookback_hours=24, polls_per_change=2, site_overrides=None):
+        """
+        Args:
+            data_dir (str): 数据根目录，变化记录位于 data/<site>/changes
+            logger (logging.Logger): 日志记录器
+            min_interval_minutes (float): 全局最小轮询间隔（分钟）
+            max_interval_minutes (float): 全局最大轮询间隔（分钟）
+            lookback_hours (float): 统计变化频率的回溯窗口（小时）
+            polls_per_change (float): 每个平均变化间隔内希望轮询的次数
+            site_overrides (dict): 按爬虫模块名覆盖的最小/最大间隔，如 {"mrporter_monitor": {"min_interval_minutes": 25}}
+        """
+        self.data_dir = data_dir
+        self.logger = logger
+        self.min_interval_minutes = min_interval_minutes
+        self.max_interval_minutes = max_interval_minutes
+        self.lookback_hours = lookback_hours
+        self.polls_per_change = max(1, polls_per_change)
+        self.site_overrides = site_overrides or {}
+
+        # 优先队列元素: (下次运行时间戳, 爬虫模块名)
+        self._queue = []
+        # 爬虫模块名 -> 当前有效的下次运行时间戳，用于识别队列中的过期元素
+        self._next_run = {}
+        # 爬虫模块名 -> 最近一次计算出的轮询间隔（分钟）
+        self.intervals = {}
+
+    def register(self, module_name, run_at=None):
+        """将网站加入调度队列，默认立即运行"""
+        self._push(module_name, run_at if run_at is not None else time.time())
+
+    def unregister(self, module_name):
+        """从调度队列中移除网站（队列中的旧元素会在弹出时被丢弃）"""
+        self._next_run.pop(module_name, None)
+
+    def pop_due(self, now=None):
+        """
+        弹出所有已到期的网站，按逾期时间从长到短排列
+
+        Returns:
+            list[str]: 到期的爬虫模块名列表
+        """
+        now = now if now is not None else time.time()
+        due_sites = []
+        while self._queue and self._queue[0][0] <= now:
+            run_at, module_name = heapq.heappop(self._queue)
+            # 丢弃已被重新调度或移除的旧元素
+            if self._next_run.get(module_name) != run_at:
+                continue
+            del self._next_run[module_name]
+            due_sites.append(module_name)
+        return due_sites
+
+    def reschedule(self, module_name, finished_at=None):
+        """
+        根据网站最新的变化频率计算轮询间隔，并重新加入调度队列
+
+        Returns:
+            float: 本次计算出的轮询间隔（分钟）
+        """
+        finished_at = finished_at if finished_at is not None else time.time()
+        interval_minutes = self.compute_interval(module_name, now=finished_at)
+        self.intervals[module_name] = interval_minutes
+        self._push(module_name, finished_at + interval_minutes * 60)
+        return interval_minutes
+
+    def compute_interval(self, module_name, now=None):
+        """
+        根据回溯窗口内的变化记录数量计算网站的轮询间隔（分钟）
+        """
+        now = now if now is not None else time.time()
+        min_interval, max_interval = self._get_bounds(module_name)
+
+        change_count = self.count_recent_changes(module_name, now=now)
+        if change_count == 0:
+            return max_interval
+
+        average_gap_minutes = self.lookback_hours * 60 / change_count
+        interval = average_gap_minutes / self.polls_per_change
+        return max(min_interval, min(max_interval, interval))
+
+    def count_recent_changes(self, module_name, now=None):
+        """统计回溯窗口内网站的变化记录数量"""
+        now = now if now is not None else time.time()
+        changes_dir = self._changes_dir(module_name)
+        if changes_dir is None:
+            return 0
+
+        cutoff = now - self.lookback_hours * 3600
+        count = 0
+        for file_path in glob.glob(os.path.join(changes_dir, "inventory_changes_*.json")):
+            match = self.CHANGE_FILE_PATTERN.search(os.path.basename(file_path))
+            try:
+                if match:
+                    file_time = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+                else:
+                    file_time = os.path.getmtime(file_path)
+            except (ValueError, OSError):
+                continue
+            if file_time >= cutoff:
+                count += 1
+        return count
+
+    def _changes_dir(self, module_name):
+        """
+        网站的变化记录目录，不存在时返回 None
+
+        优先使用与模块名一致的网站名称（如 d2Store），监控器名称为小写时（如 d2store）再使用小写目录
+        """
+        site = module_name.replace('_monitor', '')
+        for site_dir in dict.fromkeys((site, site.lower())):
+            changes_dir = os.path.join(self.data_dir, site_dir, "changes")
+            if os.path.isdir(changes_dir):
+                return changes_dir
+        return None
+
+    def seconds_until_next(self, now=None):
+        """距离下一个网站到期的秒数，队列为空时返回 None"""
+        now = now if now is not None else time.time()
+        while self._queue and self._next_run.get(self._queue[0][1]) != self._queue[0][0]:
+            heapq.heappop(self._queue)
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - now)
+
+    def _get_bounds(self, module_name):
+        """获取网站的最小/最大轮询间隔，网站覆盖配置优先"""
+        override = self.site_overrides.get(module_name, {})
+        min_interval = override.get('min_interval_minutes', self.min_interval_minutes)
+        max_interval = override.get('max_interval_minutes', self.max_interval_minutes)
+        return min_interval, max(min_interval, max_interval)
+
+    def _push(self, module_name, run_at):
+        """加入队列，同一网站只保留最新的一次运行时间"""
+        self._next_run[module_name] = run_at
+        heapq.heappush(self._queue, (run_at, module_name))
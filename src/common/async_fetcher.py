@@ -0,0 +1,258 @@
+"""
+异步HTTP请求模块
+基于 asyncio 为基于会话的监控类提供并发请求能力：
+每个域名使用独立的 requests.Session 连接池（保持长连接），并限制每个域名的并发数和最小请求间隔，
+请求失败或返回可重试的状态码时按指数退避重试
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FetchResult:
+    """单个请求的结果"""
+
+    def __init__(self, url, response=None, error=None, attempts=0, elapsed=0.0):
+        """
+        Args:
+            url (str): 请求的URL
+            response (requests.Response, optional): 响应对象，请求最终失败时为 None
+            error (Exception, optional): 最后一次失败的异常
+            attempts (int): 实际尝试次数
+            elapsed (float): 包括重试在内的总耗时（秒）
+        """
+        self.url = url
+        self.response = response
+        self.error = error
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.response is not None and self.response.ok
+
+    def json(self):
+        """解析响应为JSON，失败时返回 None"""
+        if self.response is None:
+            return None
+        try:
+            return self.response.json()
+        except ValueError:
+            return None
+
+    @property
+    def text(self):
+        return self.response.text if self.response is not None else ""
+
+
+class AsyncFetcher:
+    """
+    按域名管理连接池和并发限制的异步请求客户端
+
+    requests 本身是阻塞的，请求在线程池中执行，asyncio 负责调度和并发限制；
+    同一域名复用同一个 Session，避免每次请求重新建立TCP/TLS连接。
+    """
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, logger, headers=None, proxies=None, per_host_limit=4, host_limits=None,
+                 min_interval=0.0, timeout=30, max_retries=3, backoff_base=1.0, backoff_max=30.0):
+        """
+        Args:
+            logger (logging.Logger): 日志记录器
+            headers (dict, optional): 所有请求默认携带的请求头
+            proxies (dict, optional): 代理配置，格式同 requests
+            per_host_limit (int): 每个域名的默认最大并发数
+            host_limits (dict, optional): 按域名覆盖最大并发数，如 {"api.cettire.com": 2}
+            min_interval (float): 同一域名两次请求之间的最小间隔（秒），用于遵守网站的访问频率限制
+            timeout (float): 单次请求超时时间（秒）
+            max_retries (int): 最大重试次数（不含首次请求）
+            backoff_base (float): 指数退避的基础等待时间（秒）
+            backoff_max (float): 单次退避的最长等待时间（秒）
+        """
+        self.logger = logger
+        self.headers = headers or {}
+        self.proxies = proxies
+        self.per_host_limit = max(1, per_host_limit)
+        self.host_limits = host_limits or {}
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._executor = None
+        # 以下状态与事件循环绑定，切换事件循环时重建
+        self._loop = None
+        self._semaphores = {}
+        self._host_locks = {}
+        self._next_allowed = {}
+
+    def get_session(self, host):
+        """获取域名对应的 Session，连接池大小与该域名的并发数一致"""
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                limit = self._get_host_limit(host)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=limit)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(self.headers)
+                if self.proxies:
+                    session.proxies.update(self.proxies)
+                self._sessions[host] = session
+            return session
+
+    async def fetch(self, url, method="GET", **kwargs):
+        """
+        发送单个请求，遵守域名并发限制和最小间隔，失败时按指数退避重试
+
+        Args:
+            url (str): 请求URL
+            method (str): 请求方法
+            **kwargs: 传给 requests.Session.request 的其他参数（params、headers、json、data 等）
+
+        Returns:
+            FetchResult: 请求结果，重试耗尽后 response 为 None 或最后一次的响应
+        """
+        self._bind_loop()
+        host = urlparse(url).netloc
+        session = self.get_session(host)
+        kwargs.setdefault("timeout", self.timeout)
+
+        start_time = time.perf_counter()
+        response = None
+        error = None
+        attempts = 0
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.max_retries + 1):
+            attempts = attempt + 1
+            async with self._get_semaphore(host):
+                await self._wait_politeness(host)
+                try:
+                    response = await loop.run_in_executor(
+                        self._get_executor(), partial(session.request, method, url, **kwargs)
+                    )
+                    error = None
+                except requests.RequestException as e:
+                    response = None
+                    error = e
+
+            if response is not None and response.status_code not in self.RETRY_STATUS_CODES:
+                break
+            if attempt >= self.max_retries:
+                break
+
+            delay = self._get_backoff_delay(attempt, response)
+            reason = f"状态码 {response.status_code}" if response is not None else str(error)
+            self.logger.warning(f"请求失败 ({reason})，{delay:.1f} 秒后第 {attempt + 1} 次重试: {url}")
+            await asyncio.sleep(delay)
+
+        if response is None:
+            self.logger.error(f"请求失败，已重试 {self.max_retries} 次: {url}, 错误: {error}")
+
+        return FetchResult(url, response=response, error=error, attempts=attempts,
+                           elapsed=time.perf_counter() - start_time)
+
+    async def fetch_all(self, request_list):
+        """
+        并发发送多个请求，结果顺序与输入一致
+
+        Args:
+            request_list (list): URL 字符串或 (url, kwargs) 元组组成的列表
+
+        Returns:
+            list[FetchResult]: 请求结果列表
+        """
+        tasks = []
+        for item in request_list:
+            if isinstance(item, str):
+                tasks.append(self.fetch(item))
+            else:
+                url, kwargs = item
+                tasks.append(self.fetch(url, **kwargs))
+        return await asyncio.gather(*tasks)
+
+    def fetch_many(self, request_list):
+        """
+        fetch_all 的同步封装，供普通监控方法直接调用
+
+        Args:
+            request_list (list): URL 字符串或 (url, kwargs) 元组组成的列表
+
+        Returns:
+            list[FetchResult]: 请求结果列表，顺序与输入一致
+        """
+        if not request_list:
+            return []
+        return asyncio.run(self.fetch_all(request_list))
+
+    def close(self):
+        """关闭所有 Session 和线程池"""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_host_limit(self, host):
+        return max(1, self.host_limits.get(host, self.per_host_limit))
+
+    def _get_executor(self):
+        """懒加载线程池，线程数覆盖所有域名的并发上限"""
+        if self._executor is None:
+            max_workers = max([self.per_host_limit] + list(self.host_limits.values())) * 4
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async_fetch")
+        return self._executor
+
+    def _bind_loop(self):
+        """asyncio 同步原语绑定事件循环，检测到新的事件循环时重建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores = {}
+            self._host_locks = {}
+
+    def _get_semaphore(self, host):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._get_host_limit(host))
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def _wait_politeness(self, host):
+        """保证同一域名两次请求的发出时间至少间隔 min_interval 秒"""
+        if self.min_interval <= 0:
+            return
+        lock = self._host_locks.get(host)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._host_locks[host] = lock
+        async with lock:
+            now = time.monotonic()
+            wait_time = self._next_allowed.get(host, 0) - now
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            self._next_allowed[host] = max(now, self._next_allowed.get(host, 0)) + self.min_interval
+
+    def _get_backoff_delay(self, attempt, response):
+        """计算退避时间，优先使用服务器返回的 Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        delay = self.backoff_base * (2 ** attempt)
+        return min(delay, self.backoff_max) * random.uniform(0.8, 1.2)
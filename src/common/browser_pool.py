@@ -0,0 +1,264 @@
+"""
+浏览器实例池模块
+为基于 ChromiumPage 的监控类提供长期存活的浏览器实例，避免每次运行都重新启动浏览器。
+浏览器按代理类型、无头模式、图片加载、加载模式和端口策略分组，每次租用时独占整个浏览器，
+归还时关闭多余标签页并清理缓存和Cookie，达到最大使用次数或内存增长超过阈值时回收重建
+"""
+import atexit
+import logging
+import threading
+import time
+
+import psutil
+
+
+class PooledBrowser:
+    """池中的一个浏览器实例"""
+
+    def __init__(self, key, browser, port=None):
+        """
+        Args:
+            key (tuple): 浏览器分组键
+            browser (ChromiumPage): 浏览器页面对象
+            port (int, optional): 固定的调试端口，自动端口时为 None
+        """
+        self.key = key
+        self.browser = browser
+        self.port = port
+        self.uses = 0
+        self.in_use = False
+        self.created_at = time.time()
+        self.last_used_at = self.created_at
+        self.baseline_rss_mb = None
+        # 当前租用者的日志记录器，租用期间和归还时的日志写入租用者的日志
+        self.logger = None
+
+
+class BrowserPool:
+    """
+    进程内共享的浏览器池
+
+    - 同一分组键下最多保留 max_browsers_per_key 个浏览器
+    - 固定端口（如 19999、默认的 9222）同一时间只能被一个浏览器占用，端口被其他分组的空闲浏览器占用时会先回收该浏览器
+    - 浏览器使用次数达到 max_uses、进程树内存较首次使用增长超过 max_rss_growth_mb 或空闲超过 idle_timeout 时回收
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_uses=20, max_rss_growth_mb=512, max_browsers_per_key=1, idle_timeout_minutes=30):
+        """
+        Args:
+            max_uses (int): 单个浏览器的最大使用次数
+            max_rss_growth_mb (int): 浏览器进程树内存相对首次使用时允许增长的上限（MB）
+            max_browsers_per_key (int): 每个分组键最多保留的浏览器数量
+            idle_timeout_minutes (float): 空闲浏览器的最长保留时间（分钟）
+        """
+        # 不属于任何租用者的日志（如回收空闲浏览器、进程退出时关闭浏览器）使用模块日志记录器
+        self.logger = logging.getLogger(__name__)
+        self.max_uses = max_uses
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.max_browsers_per_key = max(1, max_browsers_per_key)
+        self.idle_timeout = idle_timeout_minutes * 60
+
+        self._browsers = []
+        # 正在创建中的浏览器：分组键 -> 数量，以及被占用的固定端口
+        self._creating = {}
+        self._reserved_ports = set()
+        self._condition = threading.Condition()
+
+        atexit.register(self.shutdown)
+
+    @classmethod
+    def get_instance(cls, **config):
+        """获取进程内唯一的浏览器池，首次调用时按配置创建"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**config)
+            return cls._instance
+
+    def acquire(self, key, factory, port=None, timeout=600, logger=None):
+        """
+        租用一个浏览器，租用期间由调用方独占
+
+        Args:
+            key (tuple): 浏览器分组键
+            factory (callable): 创建新浏览器的函数，返回 ChromiumPage
+            port (int, optional): 固定调试端口，自动端口时为 None
+            timeout (float): 等待可用浏览器的最长时间（秒）
+            logger (logging.Logger, optional): 租用者的日志记录器，默认使用模块日志记录器
+
+        Returns:
+            PooledBrowser: 租用的浏览器
+        """
+        logger = logger or self.logger
+        deadline = time.time() + timeout
+        to_close = []
+        with self._condition:
+            while True:
+                self._collect_stale(to_close)
+
+                pooled = self._find_idle(key)
+                if pooled:
+                    pooled.in_use = True
+                    break
+
+                if self._can_create(key, port, to_close):
+                    self._creating[key] = self._creating.get(key, 0) + 1
+                    if port is not None:
+                        self._reserved_ports.add(port)
+                    pooled = None
+                    break
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待浏览器池中的可用浏览器超时: {key}")
+                self._condition.wait(timeout=min(remaining, 5))
+
+        self._close_browsers(to_close)
+
+        if pooled:
+            pooled.logger = logger
+            logger.debug(f"复用浏览器池中的浏览器: {key}, 已使用 {pooled.uses} 次")
+            return pooled
+
+        try:
+            browser = factory()
+        except Exception:
+            with self._condition:
+                self._creating[key] -= 1
+                self._reserved_ports.discard(port)
+                self._condition.notify_all()
+            raise
+
+        pooled = PooledBrowser(key, browser, port)
+        pooled.in_use = True
+        pooled.logger = logger
+        pooled.baseline_rss_mb = self._get_browser_rss_mb(pooled)
+        with self._condition:
+            self._creating[key] -= 1
+            self._reserved_ports.discard(port)
+            self._browsers.append(pooled)
+        logger.info(f"浏览器池创建新浏览器: {key}, 当前浏览器数量: {len(self._browsers)}")
+        return pooled
+
+    def release(self, pooled, healthy=True):
+        """
+        归还浏览器：关闭多余标签页、清理缓存和Cookie，需要回收时关闭浏览器
+
+        Args:
+            pooled (PooledBrowser): 租用的浏览器
+            healthy (bool): 调用方认为浏览器是否仍可复用
+        """
+        pooled.uses += 1
+        pooled.last_used_at = time.time()
+
+        recycle_reason = None
+        if not healthy:
+            recycle_reason = "浏览器状态异常"
+        elif pooled.uses >= self.max_uses:
+            recycle_reason = f"使用次数达到上限 ({pooled.uses}/{self.max_uses})"
+        else:
+            rss_mb = self._get_browser_rss_mb(pooled)
+            if pooled.baseline_rss_mb is not None and rss_mb - pooled.baseline_rss_mb > self.max_rss_growth_mb:
+                recycle_reason = f"内存增长超过上限 ({pooled.baseline_rss_mb:.0f}MB -> {rss_mb:.0f}MB)"
+
+        if not recycle_reason and not self._reset_browser(pooled):
+            recycle_reason = "重置浏览器状态失败"
+
+        logger = pooled.logger or self.logger
+        with self._condition:
+            pooled.in_use = False
+            pooled.logger = None
+            if recycle_reason:
+                self._browsers.remove(pooled)
+            self._condition.notify_all()
+
+        if recycle_reason:
+            logger.info(f"回收浏览器 {pooled.key}: {recycle_reason}")
+            self._close_browsers([pooled], logger)
+
+    def shutdown(self):
+        """关闭池中所有浏览器"""
+        with self._condition:
+            browsers = list(self._browsers)
+            self._browsers.clear()
+        self._close_browsers(browsers)
+
+    def _find_idle(self, key):
+        """查找分组键下空闲的浏览器（调用方需持有锁）"""
+        for pooled in self._browsers:
+            if pooled.key == key and not pooled.in_use:
+                return pooled
+        return None
+
+    def _can_create(self, key, port, to_close):
+        """
+        判断是否可以为分组键创建新浏览器（调用方需持有锁）
+        分组已满时回收不了则返回 False；固定端口被其他分组的空闲浏览器占用时将其移出池并加入待关闭列表
+        """
+        key_count = sum(1 for pooled in self._browsers if pooled.key == key) + self._creating.get(key, 0)
+        if key_count >= self.max_browsers_per_key:
+            return False
+
+        if port is None:
+            return True
+
+        if port in self._reserved_ports:
+            return False
+        for pooled in list(self._browsers):
+            if pooled.port == port:
+                if pooled.in_use:
+                    return False
+                self._browsers.remove(pooled)
+                to_close.append(pooled)
+        return True
+
+    def _collect_stale(self, to_close):
+        """将空闲超时的浏览器移出池并加入待关闭列表（调用方需持有锁）"""
+        now = time.time()
+        for pooled in list(self._browsers):
+            if not pooled.in_use and now - pooled.last_used_at > self.idle_timeout:
+                self._browsers.remove(pooled)
+                to_close.append(pooled)
+
+    def _reset_browser(self, pooled):
+        """关闭多余标签页并清理缓存和Cookie，保证下一个使用者得到干净的浏览器"""
+        try:
+            browser = pooled.browser
+            if browser.tabs_count > 1:
+                browser.close_tabs(browser.latest_tab, others=True)
+            browser.get('about:blank')
+            browser.clear_cache(cache=True, cookies=True)
+            return True
+        except Exception as e:
+            (pooled.logger or self.logger).warning(f"重置浏览器 {pooled.key} 失败: {str(e)}")
+            return False
+
+    def _close_browsers(self, browsers, logger=None):
+        """关闭浏览器"""
+        for pooled in browsers:
+            try:
+                pooled.browser.quit()
+            except Exception as e:
+                (logger or self.logger).warning(f"关闭浏览器 {pooled.key} 失败: {str(e)}")
+
+    @staticmethod
+    def _get_browser_rss_mb(pooled):
+        """获取浏览器进程及其子进程的常驻内存总和（MB）"""
+        pid = getattr(pooled.browser, 'process_id', None)
+        if not pid:
+            return 0.0
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return 0.0
+
+        total_rss = 0
+        for proc in processes:
+            try:
+                total_rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total_rss / (1024 * 1024)
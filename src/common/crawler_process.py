@@ -0,0 +1,216 @@
+"""
+爬虫子进程运行模块
+在独立的子进程中运行监控类，父进程负责超时控制、内存上限检查和强制终止，
+避免单个爬虫卡死或泄漏浏览器进程拖垮整个调度器
+"""
+import os
+import sys
+import time
+import importlib
+import traceback
+import multiprocessing
+
+import psutil
+
+# 子进程使用 spawn 方式启动，需要保证项目根目录和 src 目录都在导入路径中
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(src_dir)
+for path in (project_root, src_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _crawler_process_entry(module_name, class_name, kwargs, conn):
+    """
+    子进程入口：实例化并运行爬虫，通过管道返回精简的运行结果
+
+    Args:
+        module_name (str): 爬虫模块名，如 sugar_monitor
+        class_name (str): 爬虫类名
+        kwargs (dict): 爬虫初始化参数
+        conn (Connection): 用于回传结果的管道写端
+    """
+    start_time = time.time()
+    message = {
+        'status': 'error',
+        'count': 0,
+        'elapsed': 0.0,
+        'inventory_file': None,
+        'http_cache': None,
+        'error': None,
+    }
+    try:
+        module = importlib.import_module(f"src.crawler.{module_name}")
+        crawler_class = getattr(module, class_name)
+        crawler_instance = crawler_class(**kwargs)
+        count = crawler_instance.run_with_log()
+
+        message['status'] = 'ok'
+        message['count'] = count or 0
+        message['inventory_file'] = getattr(crawler_instance, 'last_inventory_file', None)
+        message['http_cache'] = crawler_instance.get_http_cache_stats()
+    except Exception as e:
+        message['error'] = f"{type(e).__name__}: {str(e)}"
+        message['traceback'] = traceback.format_exc()
+    finally:
+        message['elapsed'] = time.time() - start_time
+        try:
+            conn.send(message)
+        finally:
+            conn.close()
+
+
+class CrawlerProcessRunner:
+    """
+    爬虫子进程运行器
+
+    每次运行都会启动一个新的子进程，父进程按固定间隔检查：
+    - 墙钟超时：超过 timeout_seconds 仍未返回结果则强制终止
+    - 内存上限：子进程及其所有后代进程（含浏览器）的 RSS 总和超过 max_rss_mb 则强制终止
+    终止时会连同浏览器等后代进程一起清理
+    """
+
+    def __init__(self, logger, timeout_seconds=900, max_rss_mb=2048, poll_interval=1.0):
+        """
+        Args:
+            logger (logging.Logger): 日志记录器
+            timeout_seconds (int): 单次运行的最长时间（秒）
+            max_rss_mb (int): 进程树的最大常驻内存（MB）
+            poll_interval (float): 检查子进程状态的间隔（秒）
+        """
+        self.logger = logger
+        self.timeout_seconds = timeout_seconds
+        self.max_rss_mb = max_rss_mb
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context("spawn")
+
+    def run(self, module_name, class_name, kwargs):
+        """
+        在子进程中运行爬虫并等待结果
+
+        Args:
+            module_name (str): 爬虫模块名
+            class_name (str): 爬虫类名
+            kwargs (dict): 爬虫初始化参数
+
+        Returns:
+            dict: 运行结果，包含 status(ok/error/timeout/memory_exceeded/crashed)、count、elapsed、
+                  inventory_file、http_cache、error、peak_rss_mb 字段
+        """
+        parent_conn, child_conn = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=_crawler_process_entry,
+            args=(module_name, class_name, kwargs, child_conn),
+            name=f"crawler-{module_name}",
+            daemon=True,
+        )
+
+        start_time = time.time()
+        process.start()
+        # 父进程不使用写端，关闭后子进程异常退出时 recv 才能感知到 EOF
+        child_conn.close()
+        self.logger.info(f"爬虫 {class_name} 已在子进程中启动 (PID: {process.pid})")
+
+        result = None
+        peak_rss_mb = 0.0
+        try:
+            while True:
+                if parent_conn.poll(self.poll_interval):
+                    try:
+                        result = parent_conn.recv()
+                    except EOFError:
+                        result = None
+                    break
+
+                elapsed = time.time() - start_time
+                rss_mb = self._get_tree_rss_mb(process.pid)
+                peak_rss_mb = max(peak_rss_mb, rss_mb)
+
+                if not process.is_alive():
+                    # 子进程已退出，但可能在退出前刚好写入了结果
+                    if parent_conn.poll(0):
+                        try:
+                            result = parent_conn.recv()
+                        except EOFError:
+                            result = None
+                    break
+
+                if elapsed > self.timeout_seconds:
+                    self.logger.error(f"爬虫 {class_name} 运行超过 {self.timeout_seconds} 秒，强制终止子进程")
+                    self._kill_process_tree(process)
+                    result = self._build_failure_result('timeout', elapsed, f"运行超时 ({self.timeout_seconds} 秒)")
+                    break
+
+                if self.max_rss_mb and rss_mb > self.max_rss_mb:
+                    self.logger.error(f"爬虫 {class_name} 进程树内存 {rss_mb:.0f}MB 超过上限 {self.max_rss_mb}MB，强制终止子进程")
+                    self._kill_process_tree(process)
+                    result = self._build_failure_result('memory_exceeded', elapsed,
+                                                        f"内存超过上限 ({rss_mb:.0f}MB > {self.max_rss_mb}MB)")
+                    break
+        finally:
+            parent_conn.close()
+
+        if result is None:
+            result = self._build_failure_result('crashed', time.time() - start_time,
+                                                f"子进程异常退出，退出码: {process.exitcode}")
+
+        # 正常返回结果后给子进程一段时间自行退出，仍未退出则强制清理
+        process.join(timeout=30)
+        if process.is_alive():
+            self.logger.warning(f"爬虫 {class_name} 子进程返回结果后未退出，强制终止")
+            self._kill_process_tree(process)
+            process.join(timeout=5)
+
+        result['peak_rss_mb'] = round(peak_rss_mb, 1)
+        return result
+
+    @staticmethod
+    def _build_failure_result(status, elapsed, error):
+        """构建失败结果"""
+        return {
+            'status': status,
+            'count': 0,
+            'elapsed': elapsed,
+            'inventory_file': None,
+            'http_cache': None,
+            'error': error,
+        }
+
+    @staticmethod
+    def _get_tree_rss_mb(pid):
+        """获取进程及其所有后代进程的常驻内存总和（MB）"""
+        try:
+            parent = psutil.Process(pid)
+            processes = [parent] + parent.children(recursive=True)
+        except psutil.Error:
+            return 0.0
+
+        total_rss = 0
+        for proc in processes:
+            try:
+                total_rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total_rss / (1024 * 1024)
+
+    def _kill_process_tree(self, process):
+        """强制终止子进程及其所有后代进程（包括浏览器进程）"""
+        try:
+            parent = psutil.Process(process.pid)
+            descendants = parent.children(recursive=True)
+        except psutil.Error:
+            descendants = []
+
+        for proc in descendants:
+            try:
+                proc.kill()
+            except psutil.Error:
+                continue
+
+        try:
+            process.kill()
+        except Exception as e:
+            self.logger.warning(f"终止子进程 {process.pid} 失败: {str(e)}")
+
+        psutil.wait_procs(descendants, timeout=5)
@@ -0,0 +1,505 @@
+"""
+库存增量对比引擎
+Monitor 和 DingSender 共用的库存对比实现。引擎在多次对比之间保留上一次的商品数据、
+每个商品的内容哈希以及历史窗口内出现过的商品和重点商品的价格/尺码记录，
+每次只对内容哈希发生变化的商品做详细对比，不再每轮从完整的历史快照重建历史集合；
+商品状态存储已记录快照的变化集合时，diff_delta 只处理新增、变化和下架的商品
+"""
+import re
+
+
+class InventoryDiffEngine:
+    """
+    增量库存对比引擎
+
+    返回结构与原有实现一致:
+    {
+        "new_products": [...],          # 新增商品
+        "removed_products": [...],      # 下架商品
+        "inventory_changes": [...],     # 库存变化（含 size_changes / price_change）
+        "key_product_changes": [...]    # 重点监控商品的价格或尺码变化
+    }
+    """
+
+    # 非商品字段
+    SKIP_KEYS = ("monitor", "timestamp")
+    # 缺货状态（小写）
+    STOCK_OUT_STATUSES = {"sold out", "out of stock"}
+
+    def __init__(self, key_func=None, history_size=3, suspicious_ratio=0.3, price_mode="key_filtered",
+                 separate_key_products=True, price_filter=None, id_resolver=None):
+        """
+        Args:
+            key_func (callable, optional): 商品标识函数 key_func(原始键, 商品数据) -> 标识，默认使用原始键
+            history_size (int): 历史窗口包含的快照数量，窗口内出现过的商品不再判定为新增，
+                                重点商品窗口内出现过的价格/尺码状态不再判定为变化；0 表示不使用历史窗口
+            suspicious_ratio (float, optional): 前后两次商品数量差异超过该比例时视为数据可疑，
+                                                可疑数据中的重点商品不参与新增/下架判断；None 表示不检查
+            price_mode (str): key_filtered - 只检测重点商品的价格变化，并过滤可疑变化、历史价格和货币转换；
+                              all - 检测所有商品的价格变化（前后价格均不为空且不同）
+            separate_key_products (bool): 为 True 时重点商品的变化只放入 key_product_changes，
+                                          为 False 时同时放入 inventory_changes
+            price_filter (callable, optional): price_filter(原价格, 新价格) 返回 True 时忽略该价格变化（如货币转换）
+            id_resolver (ProductIdResolver, optional): 按整个快照分配商品标识（assign_ids），
+                                                       提供时代替 key_func，冲突标识的处理与商品状态存储的哈希索引一致
+        """
+        self.key_func = key_func or (lambda key, product: key)
+        self.id_resolver = id_resolver
+        self.history_size = history_size
+        self.suspicious_ratio = suspicious_ratio
+        self.price_mode = price_mode
+        self.separate_key_products = separate_key_products
+        self.price_filter = price_filter
+        self.reset()
+
+    def reset(self):
+        """清空引擎状态"""
+        # 上一次的商品数据和内容哈希 {标识: 商品数据/哈希}
+        self._products = {}
+        self._hashes = {}
+        # 已应用的快照序号，每应用一次快照加一
+        self._cycle = 0
+        # 商品最后一次出现时的快照序号 {标识: 序号}
+        self._last_seen = {}
+        # 重点商品的价格/尺码状态最后一次出现时的快照序号 {标识: {"prices": {价格: 序号}, "sizes": {"尺码:状态": 序号}}}
+        self._key_values = {}
+        # 最近一次应用的快照标记（如快照ID或文件路径）和对应的对比结果
+        self.last_token = None
+        self._last_changes = None
+
+    @property
+    def previous_count(self):
+        """上一次快照的商品数量"""
+        return len(self._products)
+
+    def iter_products(self):
+        """上一次快照中的商品数据"""
+        return iter(self._products.values())
+
+    def iter_delta_products(self, delta):
+        """
+        上一次快照应用变化集合后的当前快照商品数据，不修改引擎状态
+
+        Args:
+            delta (dict): InventoryStore.load_snapshot_delta 的结果
+        """
+        touched = dict(delta.get("new", {}))
+        touched.update(delta.get("changed", {}))
+        dropped = set(delta.get("removed", [])) | set(touched)
+        for key, product in self._products.items():
+            if key not in dropped:
+                yield product
+        yield from touched.values()
+
+    def prime(self, snapshots, token=None):
+        """
+        用历史快照初始化引擎状态，不产生对比结果
+
+        Args:
+            snapshots (list[dict]): 历史快照列表，从旧到新排列，最后一个视为上一次快照
+            token: 最后一个快照的标记
+        """
+        for snapshot in snapshots:
+            if snapshot:
+                self._apply(self._extract_products(snapshot))
+        self.last_token = token
+        self._last_changes = None
+
+    def prime_from_history(self, previous_data, historical_data_list=None, token=None):
+        """
+        用上一次快照和最近几次历史快照初始化引擎状态
+
+        Args:
+            previous_data (dict): 上一次库存数据，为空时不初始化（下一次对比中所有商品视为新增）
+            historical_data_list (list[dict]): 最近几次历史库存数据（从新到旧，通常第一个即上一次数据）
+            token: 上一次快照的标记
+        """
+        self.reset()
+        if not previous_data:
+            return
+        snapshots = list(reversed(historical_data_list or []))
+        if not snapshots or (snapshots[-1] is not previous_data and snapshots[-1] != previous_data):
+            snapshots.append(previous_data)
+        self.prime(snapshots, token=token)
+
+    def diff_delta(self, delta, token=None):
+        """
+        按商品状态存储记录的变化集合对比，只处理新增、变化和下架的商品，未变化的商品不再读取和计算哈希
+
+        调用前引擎必须已同步到变化集合的基准快照（last_token 为基准快照的标记），
+        变化集合中的标识与引擎的 id_resolver 结果一致（均由 ProductIdResolver.assign_ids 生成）
+
+        Args:
+            delta (dict): InventoryStore.load_snapshot_delta 的结果
+                          {"new": {标识: 商品}, "changed": {标识: 商品}, "removed": [标识], "product_count": 当前商品数}
+            token: 当前快照的标记
+
+        Returns:
+            dict: 变化信息，与 diff 的结构相同
+        """
+        if token is not None and token == self.last_token and self._last_changes is not None:
+            return {change_type: list(items) for change_type, items in self._last_changes.items()}
+
+        touched = dict(delta.get("new", {}))
+        touched.update(delta.get("changed", {}))
+        removed = [key for key in delta.get("removed", []) if key in self._products and key not in touched]
+        current_hashes = {key: self.content_hash(product) for key, product in touched.items()}
+
+        changes = {
+            "new_products": [],
+            "removed_products": [],
+            "inventory_changes": [],
+            "key_product_changes": []
+        }
+
+        previous_count = len(self._products)
+        current_count = delta.get("product_count")
+        if current_count is None:
+            current_count = previous_count + sum(1 for key in touched if key not in self._products) - len(removed)
+        is_data_suspicious = self._is_suspicious(current_count, previous_count)
+
+        for key, product in touched.items():
+            previous_hash = self._hashes.get(key)
+            if previous_hash is None:
+                self._check_new(key, product, is_data_suspicious, changes)
+            elif previous_hash != current_hashes[key]:
+                self._diff_product(key, self._products[key], product, is_data_suspicious, changes)
+        for key in removed:
+            self._check_removed(key, self._products[key], is_data_suspicious, changes)
+
+        self._apply_delta(touched, current_hashes, removed)
+        self.last_token = token
+        self._last_changes = changes
+        return changes
+
+    def diff(self, current_data, token=None):
+        """
+        对比当前快照与引擎中的上一次快照，并将当前快照应用为新的上一次快照
+
+        Args:
+            current_data (dict): 当前库存数据
+            token: 当前快照的标记，与最近一次应用的标记相同时直接返回上一次的对比结果
+
+        Returns:
+            dict: 变化信息
+        """
+        if token is not None and token == self.last_token and self._last_changes is not None:
+            return {change_type: list(items) for change_type, items in self._last_changes.items()}
+
+        current_products = self._extract_products(current_data)
+        current_hashes = {key: self.content_hash(product) for key, product in current_products.items()}
+
+        changes = {
+            "new_products": [],
+            "removed_products": [],
+            "inventory_changes": [],
+            "key_product_changes": []
+        }
+
+        if not self._products:
+            # 没有上一次数据，当前所有商品都视为新增
+            changes["new_products"] = [self._with_id(key, product) for key, product in current_products.items()]
+        else:
+            self._diff_products(current_products, current_hashes, changes)
+
+        self._apply(current_products, current_hashes)
+        self.last_token = token
+        self._last_changes = changes
+        return changes
+
+    @staticmethod
+    def content_hash(product):
+        """
+        计算商品的内容哈希（仅用于进程内比较），忽略 timestamp 字段
+        """
+        inventory = product.get("inventory")
+        if isinstance(inventory, dict):
+            inventory_key = frozenset(inventory.items())
+        else:
+            inventory_key = repr(product.get("inventory_status"))
+        return hash((product.get("name"), product.get("url"), product.get("price"),
+                     product.get("key_monitoring", False), inventory_key))
+
+    def _extract_products(self, data):
+        """
+        将库存数据转换为 {标识: 商品数据}
+        支持带 products 字段的旧格式和键值对直接存储商品信息的新格式
+
+        多个商品的标识相同时，这些商品都改用"标识#原始键"，不再互相覆盖；
+        提供 id_resolver 时由其分配标识，冲突过的标识即使只剩一个商品也保留后缀
+        """
+        if not data:
+            return {}
+
+        if "products" in data:
+            items = [(product.get("name"), product) for product in data.get("products", [])]
+        else:
+            items = [(key, product) for key, product in data.items()
+                     if key not in self.SKIP_KEYS and isinstance(product, dict)]
+
+        if self.id_resolver is not None:
+            items = dict(items)
+            product_ids = self.id_resolver.assign_ids(items)
+            return {product_ids[key]: product for key, product in items.items()}
+
+        keyed = [(self.key_func(key, product), key, product) for key, product in items]
+        counts = {}
+        for product_key, _, _ in keyed:
+            counts[product_key] = counts.get(product_key, 0) + 1
+
+        products = {}
+        for product_key, key, product in keyed:
+            if counts[product_key] > 1:
+                product_key = f"{product_key}#{key}"
+            products[product_key] = product
+        return products
+
+    @staticmethod
+    def _inventory_of(product):
+        """获取商品的 {尺码: 状态}，兼容旧格式的 inventory_status 字段"""
+        if "inventory" in product:
+            return product["inventory"] or {}
+        inventory = {}
+        for status_info in product.get("inventory_status", []):
+            status = status_info.get("status", "")
+            for size in status_info.get("sizes", []):
+                inventory[size] = status
+        return inventory
+
+    @staticmethod
+    def _with_id(key, product):
+        """复制商品数据并补充标识字段"""
+        item = dict(product)
+        item.setdefault("id", key)
+        return item
+
+    def _in_history(self, seen_cycle):
+        """判断某个快照序号是否在历史窗口内（窗口包含上一次快照及更早的 history_size - 1 个快照）"""
+        return seen_cycle is not None and seen_cycle > self._cycle - self.history_size
+
+    def _is_suspicious(self, current_count, previous_count):
+        """前后两次商品数量差异是否超过 suspicious_ratio"""
+        if self.suspicious_ratio is None or max(current_count, previous_count) == 0:
+            return False
+        return abs(current_count - previous_count) / max(current_count, previous_count) > self.suspicious_ratio
+
+    def _check_new(self, key, product, is_data_suspicious, changes):
+        """新增商品：排除可疑数据中的重点商品和历史窗口内出现过的商品"""
+        if is_data_suspicious and product.get("key_monitoring", False):
+            return
+        if self.history_size and self._in_history(self._last_seen.get(key)):
+            return
+        changes["new_products"].append(self._with_id(key, product))
+
+    def _check_removed(self, key, product, is_data_suspicious, changes):
+        """下架商品：排除可疑数据中的重点商品"""
+        if is_data_suspicious and product.get("key_monitoring", False):
+            return
+        changes["removed_products"].append(self._with_id(key, product))
+
+    def _diff_products(self, current_products, current_hashes, changes):
+        """对比当前商品与上一次商品，只对内容哈希变化的商品做详细对比"""
+        previous_products = self._products
+        is_data_suspicious = self._is_suspicious(len(current_products), len(previous_products))
+
+        for key, product in current_products.items():
+            previous_hash = self._hashes.get(key)
+            if previous_hash is None:
+                self._check_new(key, product, is_data_suspicious, changes)
+            elif previous_hash != current_hashes[key]:
+                self._diff_product(key, previous_products[key], product, is_data_suspicious, changes)
+
+        for key, product in previous_products.items():
+            if key not in current_products:
+                self._check_removed(key, product, is_data_suspicious, changes)
+
+    def _diff_product(self, key, previous_product, current_product, is_data_suspicious, changes):
+        """详细对比单个商品的价格和尺码变化"""
+        is_key_product = current_product.get("key_monitoring", False)
+        key_history = self._key_values.get(key) if self.history_size else None
+        change_details = {"price_change": None, "size_changes": []}
+
+        # 价格变化
+        if "price" in current_product and "price" in previous_product:
+            price_change = self._diff_price(previous_product["price"], current_product["price"],
+                                            is_key_product, is_data_suspicious, key_history)
+            if price_change:
+                change_details["price_change"] = price_change
+
+        # 尺码变化
+        current_inventory = self._inventory_of(current_product)
+        previous_inventory = self._inventory_of(previous_product)
+
+        inventory_suspicious = False
+        if is_key_product and is_data_suspicious:
+            # 可疑数据中重点商品的尺码数量差异过大时，不记录其变化
+            max_size_count = max(len(current_inventory), len(previous_inventory))
+            if max_size_count > 0 and abs(len(current_inventory) - len(previous_inventory)) / max_size_count > 0.3:
+                inventory_suspicious = True
+
+        if current_inventory != previous_inventory and (not is_key_product or not inventory_suspicious):
+            sizes = list(current_inventory.keys()) + [size for size in previous_inventory if size not in current_inventory]
+            for size in sizes:
+                current_status = current_inventory.get(size, "Sold Out")
+                previous_status = previous_inventory.get(size, "Sold Out")
+                if current_status == previous_status:
+                    continue
+
+                # 重点商品的当前尺码状态在历史窗口内出现过时不记录变化
+                if is_key_product and key_history:
+                    if self._in_history(key_history["sizes"].get(f"{size}:{current_status}")):
+                        continue
+
+                change_details["size_changes"].append({
+                    "size": size,
+                    "from": previous_status,
+                    "to": current_status,
+                    "type": self._size_change_type(size, previous_inventory, current_inventory,
+                                                   previous_status, current_status)
+                })
+
+        has_changes = bool(change_details["price_change"] or change_details["size_changes"])
+        if not has_changes:
+            return
+
+        if not is_key_product or not self.separate_key_products:
+            product_change = self._with_id(key, current_product)
+            if change_details["size_changes"]:
+                product_change["size_changes"] = change_details["size_changes"]
+            if change_details["price_change"]:
+                product_change["price_change"] = change_details["price_change"]
+            changes["inventory_changes"].append(product_change)
+
+        if is_key_product and not inventory_suspicious:
+            key_product_change = self._with_id(key, current_product)
+            key_product_change.update(change_details)
+            changes["key_product_changes"].append(key_product_change)
+
+    def _diff_price(self, previous_price, current_price, is_key_product, is_data_suspicious, key_history):
+        """
+        对比价格，返回 {"from": 原价格, "to": 新价格} 或 None
+        """
+        if current_price == previous_price:
+            return None
+
+        if self.price_mode == "all":
+            if previous_price and current_price:
+                return {"from": previous_price, "to": current_price}
+            return None
+
+        # key_filtered 模式：只检测重点商品
+        if not is_key_product:
+            return None
+
+        # 检查价格变化是否可疑（例如从空变为有值，或价格变化过大）
+        price_change_suspicious = False
+        if not previous_price and current_price:
+            price_change_suspicious = True
+        elif previous_price and current_price:
+            prev_num = re.search(r'[\d,.]+', previous_price)
+            curr_num = re.search(r'[\d,.]+', current_price)
+            if prev_num and curr_num:
+                try:
+                    prev_val = float(prev_num.group().replace(',', ''))
+                    curr_val = float(curr_num.group().replace(',', ''))
+                    # 如果价格变化超过50%，可能是可疑的
+                    if abs(curr_val - prev_val) / max(curr_val, prev_val) > 0.5:
+                        price_change_suspicious = True
+                except (ValueError, ZeroDivisionError):
+                    if is_data_suspicious:
+                        price_change_suspicious = True
+
+        if is_data_suspicious and price_change_suspicious:
+            return None
+
+        # 当前价格在历史窗口内出现过
+        if key_history and self._in_history(key_history["prices"].get(current_price)):
+            return None
+
+        # 货币转换等需要忽略的价格变化
+        if self.price_filter and self.price_filter(previous_price, current_price):
+            return None
+
+        return {"from": previous_price, "to": current_price}
+
+    def _size_change_type(self, size, previous_inventory, current_inventory, previous_status, current_status):
+        """尺码变化类型：added / removed / stock_in（补货）/ stock_out（售罄）/ changed"""
+        if size not in previous_inventory:
+            return "added"
+        if size not in current_inventory:
+            return "removed"
+        previous_out = previous_status.lower() in self.STOCK_OUT_STATUSES
+        current_out = current_status.lower() in self.STOCK_OUT_STATUSES
+        if previous_out and not current_out:
+            return "stock_in"
+        if current_out and not previous_out:
+            return "stock_out"
+        return "changed"
+
+    def _record_key_values(self, key, product, cycle):
+        """记录重点商品的价格/尺码状态在指定快照序号中出现过"""
+        if not product.get("key_monitoring", False):
+            return
+        values = self._key_values.setdefault(key, {"prices": {}, "sizes": {}})
+        price = product.get("price", "")
+        if price:
+            values["prices"][price] = cycle
+        for size, status in self._inventory_of(product).items():
+            values["sizes"][f"{size}:{status}"] = cycle
+
+    def _apply(self, products, hashes=None):
+        """将快照应用为引擎的上一次快照，并更新历史窗口记录"""
+        self._cycle += 1
+        cycle = self._cycle
+        for key, product in products.items():
+            if not self.history_size:
+                break
+            self._last_seen[key] = cycle
+            self._record_key_values(key, product, cycle)
+
+        self._products = products
+        self._hashes = hashes if hashes is not None else {key: self.content_hash(product)
+                                                          for key, product in products.items()}
+
+        # 定期清理历史窗口外的记录，避免状态无限增长
+        if self.history_size and cycle % 20 == 0:
+            self._prune_history()
+
+    def _apply_delta(self, touched, touched_hashes, removed):
+        """
+        将变化集合应用到上一次快照
+
+        未变化的商品不更新历史窗口记录：商品和重点商品的价格/尺码状态在被替换或下架时
+        记为上一个快照中出现过，与每次全量更新记录的判断结果一致
+        """
+        self._cycle += 1
+        cycle = self._cycle
+        if self.history_size:
+            for key in removed:
+                self._last_seen[key] = cycle - 1
+                self._record_key_values(key, self._products[key], cycle - 1)
+            for key, product in touched.items():
+                previous_product = self._products.get(key)
+                if previous_product is not None:
+                    self._record_key_values(key, previous_product, cycle - 1)
+                self._last_seen[key] = cycle
+                self._record_key_values(key, product, cycle)
+
+        for key in removed:
+            del self._products[key]
+            self._hashes.pop(key, None)
+        self._products.update(touched)
+        self._hashes.update(touched_hashes)
+
+        if self.history_size and cycle % 20 == 0:
+            self._prune_history()
+
+    def _prune_history(self):
+        """清理历史窗口外的商品和重点商品记录"""
+        self._last_seen = {key: seen for key, seen in self._last_seen.items() if self._in_history(seen)}
+        for key in list(self._key_values):
+            values = self._key_values[key]
+            values["prices"] = {price: seen for price, seen in values["prices"].items() if self._in_history(seen)}
+            values["sizes"] = {size: seen for size, seen in values["sizes"].items() if self._in_history(seen)}
+            if not values["prices"] and not values["sizes"]:
+                del self._key_values[key]
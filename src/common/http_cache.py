@@ -0,0 +1,206 @@
+"""
+HTTP条件请求缓存模块
+挂载到 SessionPage 使用的 requests.Session 上，按URL保存 ETag/Last-Modified 和响应内容：
+再次请求时携带 If-None-Match/If-Modified-Since，服务器返回 304 时用缓存内容构造 200 响应，
+返回 200 但内容哈希与缓存相同时同样视为未变化，供监控类跳过目录页的重新解析
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+from requests.adapters import HTTPAdapter
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    带条件请求缓存的 HTTPAdapter
+
+    只缓存 GET 请求，缓存文件保存在 cache_dir 下：<URL哈希>.json 为校验信息，<URL哈希>.body 为响应内容
+    """
+
+    # 每个URL最近一次请求的缓存结果
+    NOT_MODIFIED = "not_modified"   # 服务器返回 304
+    UNCHANGED = "unchanged"         # 服务器返回 200，但内容与缓存相同
+    MISS = "miss"                   # 没有缓存或内容已变化
+
+    def __init__(self, cache_dir, logger, **kwargs):
+        """
+        Args:
+            cache_dir (str): 缓存目录，如 data/<site>/cache/http
+            logger (logging.Logger): 日志记录器
+            **kwargs: 传给 HTTPAdapter 的连接池参数
+        """
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.logger = logger
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.stats = {self.NOT_MODIFIED: 0, self.UNCHANGED: 0, self.MISS: 0}
+        self._last_status = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.cache_key(request.url)
+        entry = self._load_entry(key)
+        if entry:
+            if entry.get("etag"):
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            body = self._load_body(key)
+            if body is not None:
+                self._record(request.url, self.NOT_MODIFIED)
+                self._touch_entry(key)
+                return self._build_cached_response(response, entry, body)
+
+        if response.status_code == 200:
+            content = response.content
+            body_hash = hashlib.sha1(content).hexdigest()
+            if entry and entry.get("body_hash") == body_hash:
+                self._record(request.url, self.UNCHANGED)
+            else:
+                self._record(request.url, self.MISS)
+            self._save_entry(key, request.url, response, body_hash, content)
+        else:
+            self._record(request.url, self.MISS)
+
+        return response
+
+    def last_status(self, url):
+        """URL 最近一次请求的缓存结果，未请求过时返回 None"""
+        with self._lock:
+            return self._last_status.get(url)
+
+    def is_unchanged(self, url):
+        """URL 最近一次请求的内容是否与缓存相同（304 或内容哈希相同）"""
+        return self.last_status(url) in (self.NOT_MODIFIED, self.UNCHANGED)
+
+    def hit_rate(self):
+        """缓存命中率（304 和内容未变化都计为命中）"""
+        total = sum(self.stats.values())
+        if not total:
+            return 0.0
+        return (self.stats[self.NOT_MODIFIED] + self.stats[self.UNCHANGED]) / total
+
+    @staticmethod
+    def cache_key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _record(self, url, status):
+        with self._lock:
+            self._last_status[url] = status
+            self.stats[status] += 1
+
+    def _load_entry(self, key):
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"读取HTTP缓存失败: {path}, {str(e)}")
+            return None
+
+    def _load_body(self, key):
+        path = os.path.join(self.cache_dir, f"{key}.body")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save_entry(self, key, url, response, body_hash, content):
+        """保存校验信息和响应内容，内容未变化时只更新校验信息"""
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+            "body_hash": body_hash,
+        }
+        try:
+            body_path = os.path.join(self.cache_dir, f"{key}.body")
+            if self._last_status.get(url) != self.UNCHANGED or not os.path.exists(body_path):
+                with open(body_path, "wb") as f:
+                    f.write(content)
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+        except OSError as e:
+            self.logger.warning(f"保存HTTP缓存失败: {url}, {str(e)}")
+
+    def _touch_entry(self, key):
+        """更新校验信息文件的修改时间，prune 按修改时间判断缓存是否仍在使用"""
+        try:
+            os.utime(os.path.join(self.cache_dir, f"{key}.json"))
+        except OSError:
+            pass
+
+    def prune(self, max_age_seconds):
+        """
+        删除超过 max_age_seconds 没有再请求过的缓存文件（校验信息和响应内容），并清除其最近一次请求结果
+
+        Returns:
+            int: 删除的缓存条目数
+        """
+        cutoff = time.time() - max_age_seconds
+        removed_urls = set()
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            entry_path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(entry_path) >= cutoff:
+                    continue
+                entry = self._load_entry(key) or {}
+                os.remove(entry_path)
+            except OSError:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{key}.body"))
+            except OSError:
+                pass
+            removed_urls.add(entry.get("url"))
+            removed += 1
+
+        # 没有对应校验信息的响应内容（保存中断等）
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext == ".body" and not os.path.exists(os.path.join(self.cache_dir, f"{key}.json")):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+        with self._lock:
+            for url in removed_urls:
+                self._last_status.pop(url, None)
+        return removed
+
+    @staticmethod
+    def _build_cached_response(response, entry, body):
+        """将 304 响应改写为携带缓存内容的 200 响应"""
+        response.status_code = 200
+        response.reason = "OK"
+        response._content = body
+        response._content_consumed = True
+        # 缓存的是解压后的内容，去掉与原始传输相关的响应头
+        response.headers.pop("Content-Encoding", None)
+        response.headers["Content-Length"] = str(len(body))
+        if entry.get("content_type"):
+            response.headers["Content-Type"] = entry["content_type"]
+        if entry.get("encoding"):
+            response.encoding = entry["encoding"]
+        return response
@@ -0,0 +1,468 @@
+"""
+商品状态存储模块
+使用 SQLite 保存每个网站的商品当前状态、库存快照和追加式变化事件，
+替代每次扫描 data/<site>/inventory 目录并整体解析 JSON 快照文件的方式
+
+表结构:
+- product_state: 每个网站每个商品的当前状态 (site, product_id) 唯一
+- product_versions: 按内容哈希去重的商品数据，快照之间未变化的商品只保存一份
+- snapshots: 每次爬取生成的快照元数据
+- snapshot_products: 快照与商品版本的对应关系
+- events: 追加式的商品变化事件日志（new / changed / removed）
+- detail_cache: 商品详情页缓存，按目录指纹判断详情页是否需要重新获取
+- product_index: 按稳定商品标识（ProductIdResolver）保存的每个网站当前商品内容哈希
+- product_index_snapshots / product_index_changes: 每个快照相对上一个快照的变化集合（新增/变化/下架的标识），
+  对比引擎据此只处理变化的商品
+- product_id_collisions: 出现过多个商品共用的稳定标识，这些标识之后始终带"#原始键"后缀
+"""
+import os
+import json
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class InventoryStore:
+    """
+    基于 SQLite 的商品状态存储
+
+    每次操作使用独立的短连接，开启 WAL 模式，支持多个爬虫线程/进程同时写入
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS product_state (
+        site TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL,
+        removed_at TEXT,
+        PRIMARY KEY (site, product_id)
+    );
+    CREATE TABLE IF NOT EXISTS product_versions (
+        content_hash TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        site TEXT NOT NULL,
+        taken_at TEXT NOT NULL,
+        source_file TEXT,
+        product_count INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_snapshots_site ON snapshots (site, id);
+    CREATE INDEX IF NOT EXISTS idx_snapshots_source_file ON snapshots (source_file);
+    CREATE TABLE IF NOT EXISTS snapshot_products (
+        snapshot_id INTEGER NOT NULL,
+        product_id TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        PRIMARY KEY (snapshot_id, product_id)
+    );
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        site TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        snapshot_id INTEGER,
+        occurred_at TEXT NOT NULL,
+        old_hash TEXT,
+        new_hash TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_events_site ON events (site, id);
+    CREATE TABLE IF NOT EXISTS product_index (
+        site TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        PRIMARY KEY (site, product_id)
+    );
+    CREATE TABLE IF NOT EXISTS product_index_snapshots (
+        snapshot_id INTEGER PRIMARY KEY,
+        site TEXT NOT NULL,
+        base_snapshot_id INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_product_index_snapshots_site ON product_index_snapshots (site, snapshot_id);
+    CREATE TABLE IF NOT EXISTS product_index_changes (
+        snapshot_id INTEGER NOT NULL,
+        product_id TEXT NOT NULL,
+        change_type TEXT NOT NULL,
+        content_hash TEXT,
+        PRIMARY KEY (snapshot_id, product_id)
+    );
+    CREATE TABLE IF NOT EXISTS product_id_collisions (
+        site TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        PRIMARY KEY (site, product_id)
+    );
+    CREATE TABLE IF NOT EXISTS detail_cache (
+        site TEXT NOT NULL,
+        product_key TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        inventory TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (site, product_key)
+    );
+    """
+
+    # 计算内容哈希和保存商品版本时忽略的字段：每次爬取都会变化的时间戳，以及标记数据来自缓存的 cached
+    VOLATILE_FIELDS = ("timestamp", "cached")
+
+    def __init__(self, db_path, timeout=30):
+        """
+        Args:
+            db_path (str): SQLite 数据库文件路径
+            timeout (int): 数据库被锁定时的等待时间（秒）
+        """
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """创建数据库短连接，退出时提交事务（异常时回滚）并关闭连接"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def content_hash(product):
+        """
+        计算商品内容哈希，忽略每次爬取都会变化的 timestamp 字段和缓存标记
+        """
+        content = {key: value for key, value in product.items() if key not in InventoryStore.VOLATILE_FIELDS}
+        payload = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def record_snapshot(self, site, products, source_file=None, taken_at=None, product_ids=None):
+        """
+        保存一次库存快照，同时更新商品当前状态并追加变化事件
+
+        Args:
+            site (str): 网站名称（monitor_name）
+            products (dict): {商品ID: 商品数据}
+            source_file (str, optional): 对应的 JSON 快照文件路径
+            taken_at (str, optional): 快照时间（ISO 格式），默认为当前时间
+            product_ids (dict, optional): {商品ID: 稳定商品标识}（ProductIdResolver.assign_ids），
+                                          提供时同时更新稳定标识哈希索引并记录本快照的变化集合
+
+        Returns:
+            int: 快照ID
+        """
+        taken_at = taken_at or datetime.now().isoformat()
+        hashed_products = {}
+        versions = []
+        for product_id, product in products.items():
+            if not isinstance(product, dict):
+                continue
+            product_hash = self.content_hash(product)
+            hashed_products[str(product_id)] = product_hash
+            content = {key: value for key, value in product.items() if key not in self.VOLATILE_FIELDS}
+            versions.append((product_hash, json.dumps(content, ensure_ascii=False)))
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO snapshots (site, taken_at, source_file, product_count) VALUES (?, ?, ?, ?)",
+                (site, taken_at, os.path.normpath(str(source_file)) if source_file else None, len(hashed_products)),
+            )
+            snapshot_id = cursor.lastrowid
+
+            conn.executemany("INSERT OR IGNORE INTO product_versions (content_hash, data) VALUES (?, ?)", versions)
+            conn.executemany(
+                "INSERT INTO snapshot_products (snapshot_id, product_id, content_hash) VALUES (?, ?, ?)",
+                [(snapshot_id, product_id, product_hash) for product_id, product_hash in hashed_products.items()],
+            )
+
+            # 与当前状态对比，生成变化事件
+            current_state = {
+                product_id: (product_hash, removed_at)
+                for product_id, product_hash, removed_at in conn.execute(
+                    "SELECT product_id, content_hash, removed_at FROM product_state WHERE site = ?", (site,)
+                )
+            }
+
+            events = []
+            state_updates = []
+            for product_id, product_hash in hashed_products.items():
+                old_hash, removed_at = current_state.get(product_id, (None, None))
+                if old_hash is None or removed_at is not None:
+                    events.append((site, product_id, "new", snapshot_id, taken_at, old_hash, product_hash))
+                elif old_hash != product_hash:
+                    events.append((site, product_id, "changed", snapshot_id, taken_at, old_hash, product_hash))
+                state_updates.append((site, product_id, product_hash, taken_at, taken_at))
+
+            removed_ids = [
+                product_id for product_id, (old_hash, removed_at) in current_state.items()
+                if removed_at is None and product_id not in hashed_products
+            ]
+            for product_id in removed_ids:
+                events.append((site, product_id, "removed", snapshot_id, taken_at, current_state[product_id][0], None))
+
+            conn.executemany(
+                """
+                INSERT INTO product_state (site, product_id, content_hash, first_seen, last_seen, removed_at)
+                VALUES (?, ?, ?, ?, ?, NULL)
+                ON CONFLICT (site, product_id) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen,
+                    removed_at = NULL
+                """,
+                state_updates,
+            )
+            conn.executemany(
+                "UPDATE product_state SET removed_at = ? WHERE site = ? AND product_id = ?",
+                [(taken_at, site, product_id) for product_id in removed_ids],
+            )
+            conn.executemany(
+                """
+                INSERT INTO events (site, product_id, event_type, snapshot_id, occurred_at, old_hash, new_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                events,
+            )
+
+            if product_ids is not None:
+                indexed_hashes = {product_ids[product_id]: product_hash
+                                  for product_id, product_hash in hashed_products.items() if product_id in product_ids}
+                self._update_product_index(conn, site, snapshot_id, indexed_hashes)
+
+        return snapshot_id
+
+    @staticmethod
+    def _update_product_index(conn, site, snapshot_id, indexed_hashes):
+        """
+        用本快照的 {稳定标识: 内容哈希} 更新哈希索引，并记录相对上一个已索引快照的变化集合
+
+        网站还没有已索引的快照时基准快照为空，对比时不能使用该变化集合
+        """
+        base_row = conn.execute(
+            "SELECT MAX(snapshot_id) FROM product_index_snapshots WHERE site = ?", (site,)
+        ).fetchone()
+        base_snapshot_id = base_row[0] if base_row else None
+        previous_hashes = dict(conn.execute(
+            "SELECT product_id, content_hash FROM product_index WHERE site = ?", (site,)
+        ).fetchall())
+
+        index_changes = []
+        index_updates = []
+        for product_id, product_hash in indexed_hashes.items():
+            previous_hash = previous_hashes.get(product_id)
+            if previous_hash == product_hash:
+                continue
+            change_type = "new" if previous_hash is None else "changed"
+            index_changes.append((snapshot_id, product_id, change_type, product_hash))
+            index_updates.append((site, product_id, product_hash))
+        removed_ids = [product_id for product_id in previous_hashes if product_id not in indexed_hashes]
+        index_changes.extend((snapshot_id, product_id, "removed", None) for product_id in removed_ids)
+
+        conn.execute(
+            "INSERT INTO product_index_snapshots (snapshot_id, site, base_snapshot_id) VALUES (?, ?, ?)",
+            (snapshot_id, site, base_snapshot_id),
+        )
+        conn.executemany(
+            "INSERT INTO product_index_changes (snapshot_id, product_id, change_type, content_hash) VALUES (?, ?, ?, ?)",
+            index_changes,
+        )
+        conn.executemany("INSERT OR REPLACE INTO product_index (site, product_id, content_hash) VALUES (?, ?, ?)",
+                         index_updates)
+        conn.executemany("DELETE FROM product_index WHERE site = ? AND product_id = ?",
+                         [(site, product_id) for product_id in removed_ids])
+
+    def load_id_collisions(self, site):
+        """加载网站出现过冲突的稳定标识集合"""
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute(
+                "SELECT product_id FROM product_id_collisions WHERE site = ?", (site,)
+            )}
+
+    def record_id_collisions(self, site, product_ids):
+        """记录新出现冲突的稳定标识，已记录的标识保持不变"""
+        first_seen = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO product_id_collisions (site, product_id, first_seen) VALUES (?, ?, ?)",
+                [(site, product_id, first_seen) for product_id in product_ids],
+            )
+
+    def load_snapshot_delta(self, snapshot_id):
+        """
+        加载快照相对上一个已索引快照的变化集合，只读取新增和变化商品的数据
+
+        Returns:
+            dict: {"base_snapshot_id": 基准快照ID或None, "product_count": 快照商品数量,
+                   "new": {稳定标识: 商品数据}, "changed": {稳定标识: 商品数据}, "removed": [稳定标识]}，
+                  快照没有哈希索引记录时返回 None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT pis.base_snapshot_id, s.product_count, s.taken_at
+                FROM product_index_snapshots pis JOIN snapshots s ON s.id = pis.snapshot_id
+                WHERE pis.snapshot_id = ?
+                """,
+                (snapshot_id,),
+            ).fetchone()
+            if not row:
+                return None
+            base_snapshot_id, product_count, taken_at = row
+
+            delta = {"base_snapshot_id": base_snapshot_id, "product_count": product_count,
+                     "new": {}, "changed": {}, "removed": []}
+            rows = conn.execute(
+                """
+                SELECT pic.product_id, pic.change_type, pv.data
+                FROM product_index_changes pic LEFT JOIN product_versions pv ON pic.content_hash = pv.content_hash
+                WHERE pic.snapshot_id = ?
+                """,
+                (snapshot_id,),
+            )
+            for product_id, change_type, data in rows:
+                if change_type == "removed":
+                    delta["removed"].append(product_id)
+                    continue
+                product = json.loads(data)
+                product["timestamp"] = taken_at
+                delta[change_type][product_id] = product
+        return delta
+
+    def find_snapshot(self, source_file):
+        """
+        根据 JSON 快照文件路径查找快照
+
+        Returns:
+            tuple: (快照ID, 网站名称)，未找到时返回 None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, site FROM snapshots WHERE source_file = ? ORDER BY id DESC LIMIT 1",
+                (os.path.normpath(str(source_file)),),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def find_previous_snapshot_id(self, site, snapshot_id):
+        """查找网站中早于指定快照的上一个快照ID，没有时返回 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM snapshots WHERE site = ? AND id < ? ORDER BY id DESC LIMIT 1", (site, snapshot_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_snapshot(self, snapshot_id):
+        """
+        加载指定快照的完整商品数据
+
+        Returns:
+            dict: {商品ID: 商品数据}，快照不存在时返回 None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT taken_at FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if not row:
+                return None
+            return self._load_snapshot_products(conn, snapshot_id, row[0])
+
+    def load_latest_snapshot(self, site):
+        """加载网站最近一次快照，没有快照时返回 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, taken_at FROM snapshots WHERE site = ? ORDER BY id DESC LIMIT 1", (site,)
+            ).fetchone()
+            if not row:
+                return None
+            return self._load_snapshot_products(conn, row[0], row[1])
+
+    @staticmethod
+    def _load_snapshot_products(conn, snapshot_id, taken_at):
+        """读取快照中的所有商品，并补回 timestamp 字段"""
+        products = {}
+        rows = conn.execute(
+            """
+            SELECT sp.product_id, pv.data
+            FROM snapshot_products sp JOIN product_versions pv ON sp.content_hash = pv.content_hash
+            WHERE sp.snapshot_id = ?
+            """,
+            (snapshot_id,),
+        )
+        for product_id, data in rows:
+            product = json.loads(data)
+            product["timestamp"] = taken_at
+            products[product_id] = product
+        return products
+
+    def prune_snapshots(self, site, keep=50):
+        """
+        删除网站较早的快照，只保留最近 keep 个，并清理不再被引用的商品版本
+        事件日志和商品当前状态不受影响
+
+        Returns:
+            int: 删除的快照数量
+        """
+        with self._connect() as conn:
+            old_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM snapshots WHERE site = ? ORDER BY id DESC LIMIT -1 OFFSET ?", (site, keep)
+            )]
+            if not old_ids:
+                return 0
+
+            conn.executemany("DELETE FROM snapshot_products WHERE snapshot_id = ?", [(i,) for i in old_ids])
+            conn.executemany("DELETE FROM product_index_changes WHERE snapshot_id = ?", [(i,) for i in old_ids])
+            conn.executemany("DELETE FROM product_index_snapshots WHERE snapshot_id = ?", [(i,) for i in old_ids])
+            conn.executemany("DELETE FROM snapshots WHERE id = ?", [(i,) for i in old_ids])
+            conn.execute(
+                """
+                DELETE FROM product_versions
+                WHERE content_hash NOT IN (SELECT content_hash FROM snapshot_products)
+                  AND content_hash NOT IN (SELECT content_hash FROM product_state)
+                  AND content_hash NOT IN (SELECT content_hash FROM product_index)
+                """
+            )
+        return len(old_ids)
+
+    def load_detail_cache(self, site):
+        """
+        加载网站的商品详情页缓存
+
+        Returns:
+            dict: {商品标识: {"fingerprint": 目录指纹, "inventory": 库存信息, "fetched_at": 获取时间戳}}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT product_key, fingerprint, inventory, fetched_at FROM detail_cache WHERE site = ?", (site,)
+            ).fetchall()
+        return {
+            row[0]: {"fingerprint": row[1], "inventory": json.loads(row[2]), "fetched_at": row[3]}
+            for row in rows
+        }
+
+    def save_detail_cache(self, site, entries, keep_keys=None):
+        """
+        保存商品详情页缓存
+
+        Args:
+            site (str): 网站名称
+            entries (dict): {商品标识: (目录指纹, 库存信息, 获取时间戳)}
+            keep_keys (iterable, optional): 本次目录中的全部商品标识，不在其中的缓存会被删除
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO detail_cache (site, product_key, fingerprint, inventory, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(site, key, fingerprint, json.dumps(inventory, ensure_ascii=False), fetched_at)
+                 for key, (fingerprint, inventory, fetched_at) in entries.items()],
+            )
+            if keep_keys is not None:
+                keep_keys = set(keep_keys)
+                stale_keys = [row[0] for row in conn.execute(
+                    "SELECT product_key FROM detail_cache WHERE site = ?", (site,)
+                ) if row[0] not in keep_keys]
+                conn.executemany(
+                    "DELETE FROM detail_cache WHERE site = ? AND product_key = ?",
+                    [(site, key) for key in stale_keys],
+                )
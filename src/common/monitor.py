@@ -4,22 +4,32 @@
 """
 import json
 import glob
+import hashlib
 import os.path
 import logging
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
-from urllib.parse import urlparse, urlunparse
 import re
 
 import requests
 from DrissionPage import ChromiumPage, ChromiumOptions, SessionPage, SessionOptions
 
 from common.project_path import ProjectPaths
+from common.inventory_store import InventoryStore
+from common.diff_engine import InventoryDiffEngine
+from common.browser_pool import BrowserPool
+from common.async_fetcher import AsyncFetcher
+from common.http_cache import CachingHTTPAdapter
+from common.product_identity import ProductIdResolver, normalize_url as normalize_product_url
 from utils.page_setting import configure_logger, load_cookies, random_sleep
 from utils.proxy_setting import create_proxyauth_extension, set_switchy_omega
 from utils.utils import load_toml
+from utils.rate_limiter import TokenBucket
 
 
 class Monitor(ABC):
@@ -68,7 +78,23 @@ class Monitor(ABC):
         # 上次的库存数据，用于对比变化
         self.previous_inventory = {}
 
+        # 本次运行保存的库存文件路径，供调度器直接获取，无需重新扫描目录
+        self.last_inventory_file: str | None = None
+
         self.page: ChromiumPage | None = None
+        # 从浏览器池租用的浏览器，未启用浏览器池时为 None
+        self.browser_lease = None
+        # HTTP条件请求缓存，由 init_session 在启用时创建
+        self.http_cache: CachingHTTPAdapter | None = None
+        # 挂载了HTTP缓存时串行获取详情页使用的不带缓存的会话
+        self._serial_detail_session: SessionPage | None = None
+        # 异步请求客户端，由 init_async_fetcher 创建
+        self.fetcher: AsyncFetcher | None = None
+        # 并发获取详情页时每个工作线程独立的会话对象
+        self.session: SessionPage | None = None
+        self._detail_local = threading.local()
+        self._detail_sessions: list[SessionPage] = []
+        self._detail_sessions_lock = threading.Lock()
 
         ## 可选参数处理
         self._handle_params(**kwargs)
@@ -90,6 +116,22 @@ class Monitor(ABC):
             self.catalog_url = url_config[f"{self.monitor_name}_category_url"]
             self.product_url = url_config[f"{self.monitor_name}_specific_url"] if f"{self.monitor_name}_specific_url" in url_config else None
 
+        # 爬虫运行配置，包括浏览器池等共享设置
+        self.crawler_config = load_toml(os.path.join(self.project_path.CONFIG, 'crawler_monitor.toml'), self.logger)
+        self.browser_pool_config = self.crawler_config.get('browser_pool', {})
+        # 网站级配置，位于 [site.<monitor_name>]
+        self.site_config = self.crawler_config.get('site', {}).get(self.monitor_name, {})
+
+        # 商品状态存储，保存快照、当前状态和变化事件
+        try:
+            self.inventory_store = InventoryStore(os.path.join(self.data_root, "inventory_state.db"))
+        except Exception as e:
+            self.logger.error(f"初始化商品状态存储失败，将只使用JSON文件: {str(e)}")
+            self.inventory_store = None
+
+        # 商品稳定标识解析器，快照对比和商品状态存储的哈希索引都按该标识匹配商品
+        self.product_ids = ProductIdResolver(self.monitor_name, store=self.inventory_store)
+
         # 加载上次的库存数据用于对比
         self._load_previous_inventory()
 
@@ -173,11 +215,64 @@ class Monitor(ABC):
 
     def init_page(self) -> ChromiumPage:
         """
-        初始化Chromium浏览器页面
+        初始化Chromium浏览器页面，启用浏览器池时从池中租用浏览器
         
         Returns:
             ChromiumPage: 配置好的浏览器页面对象
         """
+        if not self.browser_pool_config.get('enabled', False):
+            return self._create_page()
+
+        pool = BrowserPool.get_instance(
+            max_uses=self.browser_pool_config.get('max_uses', 20),
+            max_rss_growth_mb=self.browser_pool_config.get('max_rss_growth_mb', 512),
+            max_browsers_per_key=self.browser_pool_config.get('max_browsers_per_key', 1),
+            idle_timeout_minutes=self.browser_pool_config.get('idle_timeout_minutes', 30),
+        )
+        port = self._get_browser_port()
+        # 分组键：代理类型、无头模式、图片加载、加载模式和端口策略相同的监控共用浏览器
+        key = (self.proxy_type, self.is_headless, self.is_no_img, self.load_mode, self.is_auto_port, port)
+        self.browser_lease = pool.acquire(
+            key, self._create_page, port=port,
+            timeout=self.browser_pool_config.get('acquire_timeout_seconds', 600),
+            logger=self.logger,
+        )
+        self.logger.debug(f"{self.monitor_name} - 已从浏览器池租用浏览器")
+        return self.browser_lease.browser
+
+    def release_page(self, healthy=True):
+        """
+        释放浏览器页面：租用的浏览器归还浏览器池，自动端口的独立浏览器直接关闭
+
+        Args:
+            healthy (bool): 浏览器是否仍可复用
+        """
+        if self.browser_lease:
+            BrowserPool.get_instance().release(self.browser_lease, healthy=healthy)
+            self.browser_lease = None
+            self.page = None
+        elif self.page and self.is_auto_port:
+            self.page.quit()
+
+    def _get_browser_port(self):
+        """
+        获取浏览器的调试端口，自动端口时返回 None
+
+        julian 和 mrporter 固定使用 19999 端口，其余关闭自动端口的监控使用 DrissionPage 默认的 9222 端口
+        """
+        if self.monitor_name == "julian" or self.monitor_name == "mrporter":
+            return 19999
+        if self.is_auto_port:
+            return None
+        return 9222
+
+    def _build_chromium_options(self) -> ChromiumOptions:
+        """
+        根据监控配置创建浏览器选项
+
+        Returns:
+            ChromiumOptions: 浏览器选项
+        """
         # 创建浏览器选项
         option = ChromiumOptions()
 
@@ -200,11 +295,11 @@ class Monitor(ABC):
         option.headless(self.is_headless)
 
         # 根据配置决定是否自动切换端口
-        if self.monitor_name != "julian" and self.is_auto_port:
-            option.auto_port(self.is_auto_port)
-
-        if self.monitor_name == "julian" or self.monitor_name == "mrporter":
-            option.set_local_port(19999)
+        port = self._get_browser_port()
+        if port is None:
+            option.auto_port(True)
+        elif port != 9222:
+            option.set_local_port(port)
 
         option.ignore_certificate_errors(True)
 
@@ -234,8 +329,17 @@ class Monitor(ABC):
         user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0"
         option.set_argument(f'--user-agent={user_agent}')
 
+        return option
+
+    def _create_page(self) -> ChromiumPage:
+        """
+        启动新的浏览器并返回页面对象
+
+        Returns:
+            ChromiumPage: 配置好的浏览器页面对象
+        """
         # 创建并返回浏览器页面
-        page = ChromiumPage(option)
+        page = ChromiumPage(self._build_chromium_options())
 
         if self.proxy_type == "ipcool" and self.page:
             set_switchy_omega(page)
@@ -243,9 +347,15 @@ class Monitor(ABC):
         self.logger.debug(f"{self.monitor_name} - 浏览器页面已初始化")
         return page
 
-    def init_session(self) -> SessionPage:
+    def init_session(self, use_http_cache: bool = True) -> SessionPage:
         """
         初始化会话对象，用于发送HTTP请求
+
+        启用HTTP缓存（[http_cache] 或 [site.<monitor_name>] 中的 http_cache）时，
+        会话会挂载条件请求缓存，GET 请求自动携带 If-None-Match/If-Modified-Since
+        
+        Args:
+            use_http_cache (bool): 是否挂载HTTP缓存，详情页等不需要缓存的会话可以关闭
         
         Returns:
             SessionPage: 配置好的会话对象
@@ -255,7 +365,201 @@ class Monitor(ABC):
             if self.proxy_type == "clash":
                 session_option.set_proxies(self.proxy_clash_url)
 
-        return SessionPage(session_option)
+        session_page = SessionPage(session_option)
+
+        if use_http_cache and self.site_config.get('http_cache', self.crawler_config.get('http_cache', {}).get('enabled', False)):
+            if self.http_cache is None:
+                self.http_cache = CachingHTTPAdapter(os.path.join(self.data_root, self.monitor_name, "cache", "http"),
+                                                     self.logger)
+            session_page.session.mount("http://", self.http_cache)
+            session_page.session.mount("https://", self.http_cache)
+
+        return session_page
+
+    def load_cached_catalog(self, url: str, response=None) -> list[dict] | None:
+        """
+        目录页内容与上次相同（304 或内容哈希相同）时返回上次的解析结果，并恢复解析时写入 inventory_data 的商品
+
+        需在 self.session.get(url) 之后调用，未启用HTTP缓存、页面已变化或没有解析缓存时返回 None
+
+        Args:
+            url (str): 目录页URL
+            response (requests.Response, optional): 本次请求的响应（self.session.response），
+                                                    发生重定向时按最终URL判断缓存结果
+
+        Returns:
+            list[dict] | None: 上次解析出的商品列表
+        """
+        response_url = response.url if response is not None else url
+        if not self.http_cache or not self.http_cache.is_unchanged(response_url):
+            return None
+
+        cache_file = self._catalog_cache_file(url)
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # 重点监控列表变化后，上次的解析结果中的 key_monitoring 已不可信
+        if cached.get('product_url_hash') != self._product_url_hash():
+            return None
+
+        self.inventory_data.update(cached['inventory_items'])
+        try:
+            # 更新修改时间，清理时按修改时间判断解析缓存是否仍在使用
+            os.utime(cache_file)
+        except OSError:
+            pass
+        self.logger.info(f"目录页未变化，复用上次的解析结果: {url}，共 {len(cached['products'])} 个商品")
+        return cached['products']
+
+    def save_cached_catalog(self, url: str, products: list[dict]):
+        """
+        保存目录页的解析结果，供页面未变化时直接复用
+
+        Args:
+            url (str): 目录页URL
+            products (list[dict]): parse_inventory_catalog 返回的商品列表
+        """
+        if not self.http_cache:
+            return
+
+        # parse_inventory_catalog 写入 inventory_data 的商品与返回的商品是同一个对象
+        product_ids = {id(product) for product in products}
+        inventory_items = {key: item for key, item in self.inventory_data.items() if id(item) in product_ids}
+
+        cache_file = self._catalog_cache_file(url)
+        try:
+            self._ensure_dir(os.path.dirname(cache_file))
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'product_url_hash': self._product_url_hash(),
+                           'products': products, 'inventory_items': inventory_items}, f, ensure_ascii=False)
+        except OSError as e:
+            self.logger.warning(f"保存目录解析缓存失败: {url}, {str(e)}")
+
+    def _catalog_cache_file(self, url: str) -> str:
+        return os.path.join(self.data_root, self.monitor_name, "cache", "catalog",
+                            f"{CachingHTTPAdapter.cache_key(url)}.json")
+
+    def _product_url_hash(self) -> str:
+        product_url = getattr(self, 'product_url', None) or []
+        return hashlib.sha1(json.dumps(sorted(product_url), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get_http_cache_stats(self) -> dict | None:
+        """
+        HTTP缓存统计，未启用时返回 None
+
+        Returns:
+            dict: {"not_modified": 304次数, "unchanged": 内容未变化次数, "miss": 未命中次数, "hit_rate": 命中率}
+        """
+        if not self.http_cache:
+            return None
+        stats = dict(self.http_cache.stats)
+        stats['hit_rate'] = round(self.http_cache.hit_rate(), 3)
+        return stats
+
+    def init_async_fetcher(self, headers: dict = None, **kwargs) -> AsyncFetcher:
+        """
+        初始化异步请求客户端，用于并发获取目录页和商品详情页
+
+        配置优先级：调用参数 > [site.<monitor_name>.async_fetch] > [async_fetch]
+
+        Args:
+            headers (dict, optional): 默认请求头
+            **kwargs: 覆盖 AsyncFetcher 的其他参数（per_host_limit、min_interval 等）
+
+        Returns:
+            AsyncFetcher: 异步请求客户端
+        """
+        fetch_config = dict(self.crawler_config.get('async_fetch', {}))
+        fetch_config.update(self.site_config.get('async_fetch', {}))
+        fetch_config.update(kwargs)
+
+        proxies = None
+        if self.proxy_type == "clash":
+            proxies = self.proxy_clash_url
+        elif self.proxy_type == "ipcool":
+            proxies = self.ipcool_url
+
+        if self.fetcher:
+            self.fetcher.close()
+        self.fetcher = AsyncFetcher(self.logger, headers=headers, proxies=proxies, **fetch_config)
+        return self.fetcher
+
+    def fetch_pages_in_tabs(self, urls: list[str], wait_locator: str, timeout: float = None,
+                            max_tabs: int = None) -> dict:
+        """
+        在同一个浏览器的多个标签页中并行加载页面，返回每个页面的HTML快照
+
+        标签页使用 none 加载模式，导航命令发出后立即返回，所有页面同时加载；
+        之后逐个等待 wait_locator 对应的元素出现并且文档加载完成（代替固定等待），取一次 HTML 后关闭标签页，
+        总耗时接近最慢的单个页面。超时的页面视为加载失败，不会返回加载了一半的 HTML
+
+        Args:
+            urls (list[str]): 页面URL列表
+            wait_locator (str): 页面加载完成的判断条件（DrissionPage 定位符），如 'x://article[@class="product"]'
+            timeout (float, optional): 单个页面加载的超时时间（秒），从标签页打开时开始计算，
+                                       默认读取 [site.<monitor_name>] 的 tab_timeout
+            max_tabs (int, optional): 同时打开的最大标签页数，默认读取 [site.<monitor_name>] 的 max_tabs
+
+        Returns:
+            dict: {url: html}，加载失败或超时的页面为空字符串
+        """
+        timeout = timeout or self.site_config.get('tab_timeout', 30)
+        max_tabs = max(1, max_tabs or self.site_config.get('max_tabs', 4))
+        if self.page is None:
+            self.page = self.init_page()
+
+        snapshots = {}
+        start_time = time.perf_counter()
+        for batch_start in range(0, len(urls), max_tabs):
+            batch_urls = urls[batch_start:batch_start + max_tabs]
+            tabs = []
+            try:
+                # 同一批标签页同时加载，超时时间从打开标签页时开始计算
+                deadline = time.perf_counter() + timeout
+                for url in batch_urls:
+                    tab = self.page.new_tab()
+                    tabs.append((url, tab))
+                    tab.set.load_mode.none()
+                    tab.get(url)
+
+                for url, tab in tabs:
+                    snapshots[url] = self._snapshot_tab(tab, url, wait_locator, deadline, timeout)
+            except Exception as e:
+                self.logger.error(f"打开标签页失败: {str(e)}")
+            finally:
+                for url, tab in tabs:
+                    try:
+                        tab.close()
+                    except Exception as e:
+                        self.logger.debug(f"关闭标签页失败: {str(e)}")
+            for url in batch_urls:
+                snapshots.setdefault(url, "")
+
+        self.logger.info(f"{len(urls)} 个页面并行加载完成（最多 {max_tabs} 个标签页），耗时 {time.perf_counter() - start_time:.1f} 秒")
+        return snapshots
+
+    def _snapshot_tab(self, tab, url: str, wait_locator: str, deadline: float, timeout: float) -> str:
+        """
+        等待标签页中的 wait_locator 元素出现并且文档加载完成后取 HTML
+
+        元素出现时文档可能仍在传输，只有在文档加载完成后才停止加载，超时或出错时返回空字符串
+        """
+        try:
+            if not tab.wait.eles_loaded(wait_locator, timeout=max(deadline - time.perf_counter(), 0.1)):
+                self.logger.warning(f"等待页面元素超时（{timeout} 秒）: {url}")
+                return ""
+            if not tab.wait.doc_loaded(timeout=max(deadline - time.perf_counter(), 0.1)):
+                self.logger.warning(f"等待页面加载完成超时（{timeout} 秒）: {url}")
+                return ""
+            # 文档已加载完成，停止页面中仍在进行的其他请求
+            tab.stop_loading()
+            return tab.html
+        except Exception as e:
+            self.logger.error(f"标签页加载页面失败: {url}, {str(e)}")
+            return ""
 
     def save_json_data(self, data: dict | list[dict], filename: str = None, category: str = "inventory"):
         """
@@ -287,6 +591,16 @@ class Monitor(ABC):
 
         self.logger.debug(f"数据已保存到 {file_path}")
 
+        if category == "inventory":
+            self.last_inventory_file = file_path
+            if self.inventory_store and isinstance(data, dict):
+                try:
+                    snapshot_id = self.inventory_store.record_snapshot(self.monitor_name, data, source_file=file_path,
+                                                                       product_ids=self.product_ids.assign_ids(data))
+                    self.logger.debug(f"库存快照已写入商品状态存储，快照ID: {snapshot_id}")
+                except Exception as e:
+                    self.logger.error(f"写入商品状态存储失败: {str(e)}")
+
         return file_path
 
     def save_summary_data(self, data: str, category: str = "summary") -> str:
@@ -330,42 +644,263 @@ class Monitor(ABC):
         """
         生成库存信息dict
 
+        [site.<monitor_name>] 中 detail_workers 大于 1 时并发获取商品详情页，
+        由令牌桶（detail_rate / detail_burst）代替每个商品前的随机延迟控制请求速率
+
         参数:
             inventory_info (dict):
         返回:
         """
+        # 开启详情页缓存时只获取目录信息发生变化、重点监控或缓存过期的商品
+        detail_cache = self._load_detail_cache()
+        if detail_cache is not None:
+            products_to_fetch = self._apply_detail_cache(detail_cache)
+        else:
+            products_to_fetch = self.products_list
+
+        workers = self.site_config.get('detail_workers', 1)
+        if workers > 1:
+            self._create_inventory_data_concurrent(products_to_fetch, workers)
+        else:
+            self._create_inventory_data_serial(products_to_fetch)
+
+        if detail_cache is not None:
+            self._save_detail_cache(products_to_fetch)
+            self._restore_catalog_order()
+
+    def _restore_catalog_order(self):
+        """
+        按目录中的商品顺序重建 inventory_data
+
+        复用缓存的商品先于获取详情页的商品写入，不重建时每个周期保存的数据顺序会随缓存命中情况变化
+        """
+        ordered = {}
+        for product in self.products_list:
+            key = self._inventory_key(product)
+            if key in self.inventory_data and key not in ordered:
+                ordered[key] = self.inventory_data[key]
+        for key, item in self.inventory_data.items():
+            ordered.setdefault(key, item)
+        self.inventory_data = ordered
+
+    def _create_inventory_data_serial(self, products: list[dict]):
+        """
+        逐个获取商品详情页，每个商品前随机延迟
+
+        参数:
+            products (list): 需要获取详情页的商品列表
+        """
         # 获取每个商品的库存信息
         successful_products = 0
-        for i, product in enumerate(self.products_list):
+        for i, product in enumerate(products):
             try:
-                self.logger.debug(f"正在获取商品 [{i + 1}/{len(self.products_list)}]: {product['name']}")
+                self.logger.debug(f"正在获取商品 [{i + 1}/{len(products)}]: {product['name']}")
                 # 随机延迟，避免被网站反爬
                 random_sleep(1, 3)
 
                 # 获取库存信息
                 inventory_info = self.get_inventory_page(product['url'])
 
-                if inventory_info:
-                    # 将库存信息添加到总数据中
-                    # 使用URL的最后部分作为唯一标识，避免重复键
-                    url_parts = product['url'].rstrip('/').split('/')
-                    unique_key = f"{product['name']}_{url_parts[-1]}"
-
-                    self.inventory_data[unique_key] = {
-                        'name': product['name'],  # 保存原始名称
-                        'url': product['url'],
-                        'price': product.get('price', ''),
-                        'inventory': inventory_info,
-                        'timestamp': datetime.now().isoformat()
-                    }
+                if self._add_inventory_item(product, inventory_info):
                     successful_products += 1
-                    self.logger.info(f"成功获取商品 '{product['name']}' 的库存信息，共 {len(inventory_info)} 种尺码")
-                else:
-                    self.logger.warning(f"商品 '{product['name']}' 未获取到库存信息")
             except Exception as e:
                 self.logger.error(f"获取商品 '{product['name']}' 库存信息时出错: {str(e)}")
 
-        self.logger.info(f"库存信息获取完成，成功: {successful_products}/{len(self.products_list)}")
+        self.logger.info(f"库存信息获取完成，成功: {successful_products}/{len(products)}")
+
+    def _create_inventory_data_concurrent(self, products: list[dict], workers: int):
+        """
+        并发获取商品详情页，结果按商品列表的原始顺序写入 inventory_data
+
+        参数:
+            products (list): 需要获取详情页的商品列表
+            workers (int): 并发线程数
+        """
+        rate = self.site_config.get('detail_rate', 1.0)
+        burst = self.site_config.get('detail_burst', workers)
+        bucket = TokenBucket(rate, burst)
+        total = len(products)
+        self.logger.info(f"并发获取商品库存信息: {total} 个商品, {workers} 个线程, 限速 {rate} 次/秒 (突发 {burst})")
+
+        def fetch(index, product):
+            self._detail_local.in_worker = True
+            bucket.acquire()
+            self.logger.debug(f"正在获取商品 [{index + 1}/{total}]: {product['name']}")
+            return self.get_inventory_page(product['url'])
+
+        start_time = time.perf_counter()
+        results = [None] * total
+        errors = [None] * total
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.monitor_name}_detail") as executor:
+            futures = {executor.submit(fetch, i, product): i for i, product in enumerate(products)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    errors[index] = e
+
+        # 按原始顺序写入结果，保证保存的数据顺序与串行模式一致
+        successful_products = 0
+        failed_products = 0
+        for product, inventory_info, error in zip(products, results, errors):
+            if error is not None:
+                failed_products += 1
+                self.logger.error(f"获取商品 '{product['name']}' 库存信息时出错: {str(error)}")
+            elif self._add_inventory_item(product, inventory_info):
+                successful_products += 1
+
+        self._close_detail_sessions()
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"库存信息获取完成，成功: {successful_products}/{total}，出错: {failed_products}，耗时 {elapsed:.1f} 秒")
+
+    def _add_inventory_item(self, product: dict, inventory_info: dict) -> bool:
+        """
+        将单个商品的库存信息写入 inventory_data
+
+        返回:
+            bool: 是否获取到库存信息
+        """
+        if not inventory_info:
+            self.logger.warning(f"商品 '{product['name']}' 未获取到库存信息")
+            return False
+
+        # 将库存信息添加到总数据中
+        self.inventory_data[self._inventory_key(product)] = {
+            'name': product['name'],  # 保存原始名称
+            'url': product['url'],
+            'price': product.get('price', ''),
+            'inventory': inventory_info,
+            'key_monitoring': product.get('key_monitoring', False),
+            'timestamp': datetime.now().isoformat()
+        }
+        self.logger.info(f"成功获取商品 '{product['name']}' 的库存信息，共 {len(inventory_info)} 种尺码")
+        return True
+
+    @staticmethod
+    def _inventory_key(product: dict) -> str:
+        """使用商品名称和URL的最后部分作为唯一标识，避免重复键"""
+        url_parts = product['url'].rstrip('/').split('/')
+        return f"{product['name']}_{url_parts[-1]}"
+
+    @classmethod
+    def catalog_fingerprint(cls, product: dict) -> str:
+        """
+        计算商品目录信息（名称、价格、URL）的指纹，目录信息不变时可以复用上次的详情页结果
+        """
+        payload = json.dumps([product.get('name', ''), product.get('price', ''),
+                              cls.normalize_url(product.get('url', ''))], ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _load_detail_cache(self) -> dict | None:
+        """
+        加载商品详情页缓存，[site.<monitor_name>] 未开启 detail_cache 或存储不可用时返回 None
+        """
+        if not self.site_config.get('detail_cache', False) or not self.inventory_store:
+            return None
+        try:
+            return self.inventory_store.load_detail_cache(self.monitor_name)
+        except Exception as e:
+            self.logger.error(f"加载详情页缓存失败，将获取全部商品详情页: {str(e)}")
+            return None
+
+    def _apply_detail_cache(self, detail_cache: dict) -> list[dict]:
+        """
+        用缓存填充目录信息未变化的商品，返回仍需获取详情页的商品
+
+        以下情况需要重新获取详情页：没有缓存、目录指纹变化、重点监控商品、缓存超过 detail_cache_ttl_minutes
+        复用缓存的商品会标记 cached = True，保存的快照仍包含全部商品
+
+        参数:
+            detail_cache (dict): load_detail_cache 返回的缓存
+        返回:
+            list: 需要获取详情页的商品列表
+        """
+        ttl_seconds = self.site_config.get('detail_cache_ttl_minutes', 360) * 60
+        now = time.time()
+        products_to_fetch = []
+        cached_count = 0
+        for product in self.products_list:
+            entry = detail_cache.get(self._inventory_key(product))
+            if (not entry
+                    or entry['fingerprint'] != self.catalog_fingerprint(product)
+                    or product.get('key_monitoring', False)
+                    or now - entry['fetched_at'] > ttl_seconds
+                    or not entry['inventory']):
+                products_to_fetch.append(product)
+                continue
+
+            self.inventory_data[self._inventory_key(product)] = {
+                'name': product['name'],
+                'url': product['url'],
+                'price': product.get('price', ''),
+                'inventory': entry['inventory'],
+                'key_monitoring': False,
+                'timestamp': datetime.fromtimestamp(entry['fetched_at']).isoformat(),
+                'cached': True
+            }
+            cached_count += 1
+
+        self.logger.info(f"详情页缓存命中 {cached_count}/{len(self.products_list)}，需要获取 {len(products_to_fetch)} 个商品详情页")
+        return products_to_fetch
+
+    def _save_detail_cache(self, fetched_products: list[dict]):
+        """
+        保存本次成功获取的详情页结果，并删除已不在目录中的商品缓存
+
+        参数:
+            fetched_products (list): 本次获取了详情页的商品列表
+        """
+        entries = {}
+        for product in fetched_products:
+            key = self._inventory_key(product)
+            item = self.inventory_data.get(key)
+            if item and item.get('inventory') and not item.get('cached'):
+                entries[key] = (self.catalog_fingerprint(product), item['inventory'], time.time())
+        try:
+            self.inventory_store.save_detail_cache(
+                self.monitor_name, entries, keep_keys=[self._inventory_key(product) for product in self.products_list]
+            )
+        except Exception as e:
+            self.logger.error(f"保存详情页缓存失败: {str(e)}")
+
+    def get_detail_session(self) -> SessionPage:
+        """
+        获取用于请求商品详情页的会话对象
+
+        并发获取详情页时每个工作线程使用独立的 SessionPage（SessionPage 保存了最近一次响应，不能跨线程共享）；
+        串行获取时返回监控自身的 self.session，self.session 挂载了HTTP缓存时改用一个不带缓存的会话，
+        HTTP缓存只保存目录页
+
+        返回:
+            SessionPage: 会话对象
+        """
+        if not getattr(self._detail_local, 'in_worker', False):
+            if self.http_cache is None:
+                return self.session
+            if self._serial_detail_session is None:
+                self._serial_detail_session = self.init_session(use_http_cache=False)
+            return self._serial_detail_session
+
+        session = getattr(self._detail_local, 'session', None)
+        if session is None:
+            session = self.init_session(use_http_cache=False)
+            self._detail_local.session = session
+            with self._detail_sessions_lock:
+                self._detail_sessions.append(session)
+        return session
+
+    def _close_detail_sessions(self):
+        """关闭并发获取详情页时创建的会话对象"""
+        with self._detail_sessions_lock:
+            sessions = self._detail_sessions
+            self._detail_sessions = []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                self.logger.debug(f"关闭详情页会话失败: {str(e)}")
+        self._detail_local = threading.local()
 
     def _normalize_inventory_data(self, data: dict) -> dict:
         """
@@ -421,7 +956,18 @@ class Monitor(ABC):
     def _load_previous_inventory(self):
         """
         加载最近一次的库存数据，用于对比变化
+        优先从商品状态存储中读取，存储中没有快照时再扫描JSON文件
         """
+        if self.inventory_store:
+            try:
+                latest_snapshot = self.inventory_store.load_latest_snapshot(self.monitor_name)
+                if latest_snapshot is not None:
+                    self.previous_inventory = latest_snapshot
+                    self.logger.debug(f"从商品状态存储加载了上次的库存数据，共 {len(latest_snapshot)} 个商品")
+                    return
+            except Exception as e:
+                self.logger.error(f"从商品状态存储加载历史库存数据出错: {str(e)}")
+
         inventory_dir = os.path.join(self.data_root, self.monitor_name, "inventory")
 
         if not os.path.exists(inventory_dir):
@@ -488,105 +1034,16 @@ class Monitor(ABC):
             self.logger.warning(f"当前数据({current_count}个)与上次数据({previous_count}个)相差{diff_percentage:.1f}%，超过阈值，不进行变化检测")
             return None
 
-        # 检测变化
-        changes = {
-            "new_products": [],  # 新上架的商品
-            "removed_products": [],  # 下架的商品
-            "inventory_changes": [],  # 库存变化
-            "key_product_changes": []  # 重点监控商品的变化
-        }
-
-        # 检测新上架的商品
-        for key, item in current.items():
-            if key not in self.previous_inventory:
-                changes["new_products"].append({
-                    "id": key,
-                    "name": item.get("name", ""),
-                    "url": item.get("url", ""),
-                    "price": item.get("price", ""),
-                    "inventory": item.get("inventory", {})
-                })
-
-        # 检测下架的商品
-        for key, item in self.previous_inventory.items():
-            if key not in current:
-                changes["removed_products"].append({
-                    "id": key,
-                    "name": item.get("name", ""),
-                    "url": item.get("url", ""),
-                    "price": item.get("price", "")
-                })
-
-        # 检测库存变化
-        for key, item in current.items():
-            if key in self.previous_inventory:
-                prev_inventory = self.previous_inventory[key].get("inventory", {})
-                curr_inventory = item.get("inventory", {})
-                
-                # 检查价格变化
-                prev_price = self.previous_inventory[key].get("price", "")
-                curr_price = item.get("price", "")
-                price_change = None
-                if prev_price != curr_price and prev_price and curr_price:
-                    price_change = {
-                        "from": prev_price,
-                        "to": curr_price
-                    }
-
-                # 检测尺码变化
-                size_changes = []
-
-                # 检测新增尺码
-                for size, status in curr_inventory.items():
-                    if size not in prev_inventory:
-                        size_changes.append({
-                            "size": size,
-                            "type": "added",
-                            "status": status
-                        })
-                    elif prev_inventory[size] != status:
-                        change_type = "changed"
-                        # 特别标记补货和售罄情况
-                        if prev_inventory[size].lower() in ["sold out", "out of stock"] and status.lower() in ["in stock", "available"]:
-                            change_type = "stock_in"  # 补货
-                        elif prev_inventory[size].lower() in ["in stock", "available"] and status.lower() in ["sold out", "out of stock"]:
-                            change_type = "stock_out"  # 售罄
-                            
-                        size_changes.append({
-                            "size": size,
-                            "type": change_type,
-                            "from": prev_inventory[size],
-                            "to": status
-                        })
-
-                # 检测移除尺码
-                for size, status in prev_inventory.items():
-                    if size not in curr_inventory:
-                        size_changes.append({
-                            "size": size,
-                            "type": "removed",
-                            "previous_status": status
-                        })
-
-                if size_changes or price_change:
-                    change_info = {
-                        "id": key,
-                        "name": item.get("name", ""),
-                        "url": item.get("url", ""),
-                        "price": item.get("price", "")
-                    }
-                    
-                    if size_changes:
-                        change_info["size_changes"] = size_changes
-                    
-                    if price_change:
-                        change_info["price_change"] = price_change
-                        
-                    changes["inventory_changes"].append(change_info)
-                    
-                    # 如果是重点监控商品，添加到key_product_changes
-                    if item.get("key_monitoring", False):
-                        changes["key_product_changes"].append(change_info)
+        # 检测变化：按商品稳定标识对比，检测所有商品的价格变化，重点商品的变化同时记录到 key_product_changes
+        diff_engine = InventoryDiffEngine(
+            id_resolver=self.product_ids,
+            history_size=0,
+            suspicious_ratio=None,
+            price_mode="all",
+            separate_key_products=False,
+        )
+        diff_engine.prime([self.previous_inventory])
+        changes = diff_engine.diff(current)
 
         # 如果有变化，保存变化记录
         has_changes = (
@@ -649,16 +1106,24 @@ class Monitor(ABC):
         
         这是run方法的包装器，在运行完成后保存日志
         """
+        run_failed = True
         try:
             result = self.run()
+            run_failed = False
             return result
         finally:
             # 确保在方法结束时记录和保存日志
             self.save_log_to_file()
             # 清理多余的日志和数据文件
             self.cleanup_files()
-            if self.page and self.is_auto_port:
-                self.page.quit()
+            # 归还或关闭浏览器，运行异常时浏览器可能处于异常状态，不再复用
+            self.release_page(healthy=not run_failed)
+            if self.fetcher:
+                self.fetcher.close()
+            cache_stats = self.get_http_cache_stats()
+            if cache_stats:
+                self.logger.info(f"HTTP缓存统计: 304 {cache_stats['not_modified']} 次, 内容未变化 {cache_stats['unchanged']} 次, "
+                                 f"未命中 {cache_stats['miss']} 次, 命中率 {cache_stats['hit_rate']:.0%}")
             return len(self.inventory_data)
 
     def cleanup_files(self, max_log_files=20, max_data_files=50, max_days_to_keep=30):
@@ -694,9 +1159,39 @@ class Monitor(ABC):
             summary_dir = os.path.join(monitor_data_dir, "summary")
             self._cleanup_dir_files(summary_dir, "*.txt", max_data_files, "总结文件", cutoff_time)
             self._cleanup_dir_files(summary_dir, "*.json", max_data_files, "总结JSON", cutoff_time)
-        
+
+            # 清理长时间没有再请求过的HTTP缓存和目录解析缓存
+            self._prune_http_cache(monitor_data_dir)
+
+        # 清理商品状态存储中的旧快照
+        if self.inventory_store:
+            try:
+                pruned_count = self.inventory_store.prune_snapshots(self.monitor_name, keep=max_data_files)
+                if pruned_count:
+                    self.logger.info(f"已清理商品状态存储中 {pruned_count} 个旧快照")
+            except Exception as e:
+                self.logger.error(f"清理商品状态存储快照失败: {str(e)}")
+
         self.logger.debug("文件清理完成")
 
+    def _prune_http_cache(self, monitor_data_dir):
+        """删除 [http_cache] 的 keep_days 天内没有再使用过的HTTP缓存文件和目录解析缓存"""
+        keep_seconds = self.crawler_config.get('http_cache', {}).get('keep_days', 7) * 24 * 60 * 60
+        http_cache_dir = os.path.join(monitor_data_dir, "cache", "http")
+        if os.path.isdir(http_cache_dir):
+            try:
+                http_cache = self.http_cache or CachingHTTPAdapter(http_cache_dir, self.logger)
+                pruned_count = http_cache.prune(keep_seconds)
+                if pruned_count:
+                    self.logger.info(f"已清理 {pruned_count} 个过期的HTTP缓存")
+            except Exception as e:
+                self.logger.error(f"清理HTTP缓存失败: {str(e)}")
+
+        catalog_cache_dir = os.path.join(monitor_data_dir, "cache", "catalog")
+        catalog_files = glob.glob(os.path.join(catalog_cache_dir, "*.json"))
+        self._cleanup_dir_files(catalog_cache_dir, "*.json", len(catalog_files), "目录解析缓存",
+                                time.time() - keep_seconds)
+
     def _cleanup_dir_files(self, directory, pattern, max_files, file_type, cutoff_time=None):
         """
         清理指定目录下的文件，保留最新的文件
@@ -860,9 +1355,8 @@ class Monitor(ABC):
 
     @staticmethod
     def normalize_url(url):
-        parsed = urlparse(url)
         # 保留路径，忽略查询参数和片段
-        return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+        return normalize_product_url(url)
 
 # if __name__ == '__main__':
 # monitor = Monitor(is_headless=False)
@@ -0,0 +1,125 @@
+"""
+商品标识解析
+为每个网站的商品生成跨快照稳定的标识，代替按商品名称或"名称_URL末段"匹配：
+商品改名不会被误判为一次下架加一次新增，不同商品重名也不会互相覆盖
+
+标识按以下顺序取得：
+1. 网站商品数据中自带的ID字段（如 duomo 的 id）
+2. 网站商品URL中的ID（如 mrporter URL 末尾的数字ID、cettire 的 /products/<handle>）
+3. 规范化后的商品URL（去掉协议、查询参数、片段和末尾的 /）
+4. 都没有时使用原始键
+
+多个商品解析出相同标识时，这些商品改用"标识#原始键"；冲突过的标识记录在商品状态存储中，
+之后即使只剩一个商品也保留后缀，商品标识不会因另一个商品下架而变化
+"""
+import re
+from urllib.parse import urlparse, urlunparse
+
+
+def normalize_url(url):
+    """规范化URL：保留路径，忽略查询参数和片段"""
+    parsed = urlparse(url)
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+
+
+class ProductIdResolver:
+    """
+    单个网站的商品标识解析器
+
+    标识带类型前缀（id: / url: / key:），不同来源的标识不会相互冲突
+    """
+
+    # 商品数据中自带的ID字段 {网站: 字段名}
+    SITE_ID_FIELDS = {
+        "duomo": "id",
+    }
+
+    # 从规范化URL的路径中提取商品ID的正则 {网站: 正则}，第一个分组为商品ID
+    SITE_ID_PATTERNS = {
+        "cettire": re.compile(r"/products/([^/]+)"),
+        "mrporter": re.compile(r"/(\d{6,})$"),
+        "mytheresa": re.compile(r"-(p\d{6,})$"),
+    }
+
+    def __init__(self, site=None, store=None):
+        """
+        :param site: 网站名称（monitor_name），为空时只使用规范化URL和原始键
+        :param store: 商品状态存储（InventoryStore），用于在多个进程之间共享冲突过的标识，为空时只在内存中记录
+        """
+        self.site = (site or "").lower()
+        self.id_field = self.SITE_ID_FIELDS.get(self.site)
+        self.id_pattern = self.SITE_ID_PATTERNS.get(self.site)
+        self.store = store
+        self.collided_ids = set()
+        # URL解析结果缓存 {商品URL: 标识}，同一商品的URL在各个快照之间基本不变
+        self.url_ids = {}
+
+    def resolve(self, product, fallback_key=None):
+        """
+        解析单个商品的稳定标识
+
+        :param product: 商品数据
+        :param fallback_key: 商品没有ID和URL时使用的原始键，为空时使用商品名称
+        :return: 带类型前缀的标识字符串
+        """
+        if self.id_field:
+            product_id = product.get(self.id_field)
+            if product_id not in (None, ""):
+                return f"id:{product_id}"
+
+        url = product.get("url") or ""
+        if url:
+            product_id = self.url_ids.get(url)
+            if product_id is None:
+                product_id = self.url_ids[url] = self._resolve_url(url)
+            return product_id
+
+        return f"key:{fallback_key if fallback_key is not None else product.get('name', '')}"
+
+    def _resolve_url(self, url):
+        """从商品URL解析标识：网站商品ID优先，否则使用规范化URL"""
+        parsed = urlparse(normalize_url(url))
+        path = parsed.path.rstrip("/")
+        if self.id_pattern:
+            match = self.id_pattern.search(path)
+            if match:
+                return f"id:{match.group(1)}"
+        return f"url:{parsed.netloc.lower()}{path}"
+
+    def resolve_key(self, key, product):
+        """不区分冲突的单个商品标识：key_func(原始键, 商品数据) -> 标识"""
+        return self.resolve(product, key)
+
+    def assign_ids(self, products):
+        """
+        为整个快照的商品分配标识，InventoryDiffEngine 和商品状态存储的哈希索引都使用本方法的结果
+
+        多个商品解析出相同标识时（如同一URL的不同颜色），这些商品都改用"标识#原始键"，结果与商品顺序无关；
+        冲突过的标识之后始终带后缀，其中一个商品下架时另一个商品的标识保持不变
+
+        :param products: {原始键: 商品数据}
+        :return: {原始键: 标识}
+        """
+        resolved = {key: self.resolve(product, key) for key, product in products.items()
+                    if isinstance(product, dict)}
+        if len(self.url_ids) > 2 * len(resolved):
+            # 缓存中大部分是已下架商品的URL时，只保留当前快照中的URL
+            current_urls = {product.get("url") for product in products.values() if isinstance(product, dict)}
+            self.url_ids = {url: product_id for url, product_id in self.url_ids.items() if url in current_urls}
+        counts = {}
+        for product_id in resolved.values():
+            counts[product_id] = counts.get(product_id, 0) + 1
+        collided_ids = self._update_collisions({product_id for product_id, count in counts.items() if count > 1})
+        return {key: (f"{product_id}#{key}" if product_id in collided_ids else product_id)
+                for key, product_id in resolved.items()}
+
+    def _update_collisions(self, colliding_ids):
+        """合并存储中和本次快照中冲突的标识，新出现的冲突写入存储，返回所有冲突过的标识"""
+        if self.store is not None:
+            self.collided_ids |= self.store.load_id_collisions(self.site)
+        new_ids = colliding_ids - self.collided_ids
+        if new_ids:
+            self.collided_ids |= new_ids
+            if self.store is not None:
+                self.store.record_id_collisions(self.site, new_ids)
+        return self.collided_ids
@@ -3,7 +3,6 @@ antonioli监控模块 - 负责监控antonioli网站上Balenciaga鞋子的库存
 该模块实现了对antonioli网站的爬取、解析和数据保存功能
 """
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 import os
 import sys
 
@@ -13,6 +12,7 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from src.utils.html_extractor import ExtractionSpec, FieldSpec
 from src.common.monitor import Monitor
 
 
@@ -24,6 +24,20 @@ class AntonioliMonitor(Monitor):
     负责爬取antonioli网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card="//*[contains(@class, 'card-information')]",
+        fields={
+            "name": ".//*[contains(@class, 'tw-h3-reg tw-capitalize')]",
+            "price": './/*[@class="price__regular"]/span[2]',
+            "sizes": FieldSpec("(.//*[starts-with(@class, 'card-product__sizes')])[1]//span"
+                               "[not(contains(@class, 'tw-line-through'))]", many=True),
+        },
+        page_fields={
+            "url": '//h3[@class="card__heading"]/a/@href',
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化antonioli监控器
@@ -142,9 +156,16 @@ class AntonioliMonitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
-                    data = self.session.s_eles('@class:card-information')
+                    data = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                     encoding=self.session.response.encoding)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -156,6 +177,7 @@ class AntonioliMonitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -170,58 +192,34 @@ class AntonioliMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
         """
         try:
             products_list = []
-            url_eles = self.session.s_eles('x://h3[@class="card__heading"]/a')
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('@class:tw-h3-reg tw-capitalize')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
-                        # 替换新的catalog_eles
-                        catalog_eles = self.page.s_eles('@class^card-information')
-                        item = catalog_eles[i]
-                        name_ele = item.s_ele('@class:tw-h3-reg tw-capitalize')
-                        if not name_ele:
-                            self.logger.warning(f"无法找到商品名称元素，跳过此商品")
-                            continue
-
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = url_eles[i]
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('x://*[@class="price__regular"]/span[2]')
-                    price = price_ele.text if price_ele else ""
-
-                    sizes_eles = item.s_ele('@class^card-product__sizes').s_eles("x://span")
-                    sizes_dict = {}
-                    for size_item in sizes_eles:
-                        size_label = size_item.text
-                        if 'tw-line-through' not in size_item.attr('class'):
-                            sizes_dict[size_label] = "available"
-
-                    # 修正URL格式
-                    full_url = f"https://antonioli.eu{url}" if not url.startswith('http') else url
-
-                    if self.normalize_url(full_url) in self.product_url:
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
+
+                    url = item["url"]
+                    price = item["price"]
+                    sizes_dict = {size_label: "available" for size_label in item["sizes"]}
+
+                    if self.normalize_url(url) in self.product_url:
                         key_monitoring = True
-                        self.logger.info(f"已获取重点检测对象信息: {name}, URL: {full_url}")
+                        self.logger.info(f"已获取重点检测对象信息: {name}, URL: {url}")
                     else:
                         key_monitoring = False
 
@@ -231,7 +229,7 @@ class AntonioliMonitor(Monitor):
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": sizes_dict,
                             "key_monitoring": key_monitoring
@@ -240,7 +238,7 @@ class AntonioliMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -22,6 +22,18 @@ class CettireMonitor(Monitor):
     负责爬取Cettire网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # Algolia 商品索引及目录查询的公共过滤条件（与网站前端一致）
+    ALGOLIA_INDEX_NAME = "production_rep_cettire_vip_date_desc"
+    ALGOLIA_FILTERS = "visibility:YES AND (vipLevel: 0 OR vipLevel: null) AND eu_eur_price_f > 0"
+    # Algolia 单页最多返回的商品数量
+    ALGOLIA_MAX_HITS_PER_PAGE = 1000
+
+    GRAPHQL_URL = 'https://api.cettire.com/graphql'
+    # 单个商品查询的库存字段，parse_inventory_info 依赖的字段
+    GRAPHQL_PRODUCT_FIELDS = "product { title variants { size isSoldOut inventoryAvailableToSell } }"
+    GRAPHQL_PRODUCT_QUERY = ("query catalogItemProduct($slugOrId: String!) { "
+                             "catalogItemProduct(slugOrId: $slugOrId) { " + GRAPHQL_PRODUCT_FIELDS + " } }")
+
     def __init__(self, **kwargs):
         """
         初始化Cettire监控器
@@ -39,7 +51,13 @@ class CettireMonitor(Monitor):
         self.session = self.init_session()
         self.base_url = 'https://6l0oqj41cq-2.algolianet.com/1/indexes/*/queries?x-algolia-agent=Algolia%20for%20JavaScript%20(4.4.0)%3B%20Browser%20(lite)%3B%20JS%20Helper%20(3.24.1)%3B%20react%20(16.8.6)%3B%20react-instantsearch%20(6.7.0)&x-algolia-api-key=ee556f77348dacc02278dafa57be6d34&x-algolia-application-id=6L0OQJ41CQ'
 
-        # self.headers, self.json_data = self.init_params()
+        # GraphQL 库存查询的请求头和单个商品查询参数
+        self.headers = self.init_graphql_headers()
+        self.json_data = {
+            'operationName': 'catalogItemProduct',
+            'query': self.GRAPHQL_PRODUCT_QUERY,
+            'variables': {'slugOrId': None},
+        }
 
     def init_params(self, url):
         """
@@ -73,6 +91,23 @@ class CettireMonitor(Monitor):
 
         return headers, json_data
 
+    @staticmethod
+    def init_graphql_headers() -> dict:
+        """
+        初始化 GraphQL 库存查询的请求头
+
+        返回:
+            dict: 请求头
+        """
+        return {
+            'Accept': 'application/json',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
+            'Content-Type': 'application/json',
+            'Origin': 'https://www.cettire.com',
+            'Referer': 'https://www.cettire.com/',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36 Edg/136.0.0.0',
+        }
+
     @staticmethod
     def parse_json_data(json_data: dict, vendor: str) -> str:
         """
@@ -139,6 +174,10 @@ class CettireMonitor(Monitor):
 
             self.logger.info(f"监控开始，共获取到 {len(self.products_list)} 个商品信息")
 
+            # 批量获取尺码库存，[site.cettire] 中 fetch_details 开启时才获取
+            if self.site_config.get('fetch_details', False):
+                self.create_inventory_data_bulk()
+
             # 保存库存数据
             if self.inventory_data:
                 # 标准化库存数据
@@ -176,6 +215,102 @@ class CettireMonitor(Monitor):
         获取商品目录
 
         从Cettire网站获取Balenciaga鞋子的商品列表
+        [site.cettire] 中 batch_catalog 开启时使用批量查询，所有品牌合并为一次 Algolia 多索引请求
+
+        返回:
+            list: 商品信息列表，每个元素为包含name和url的字典
+        """
+        if self.site_config.get('batch_catalog', True):
+            return self.get_inventory_catalog_batched()
+        return self.get_inventory_catalog_per_url()
+
+    def get_inventory_catalog_batched(self) -> list[dict]:
+        """
+        批量获取商品目录
+
+        每个目录URL对应一个品牌查询，所有查询打包进同一个 queries 请求，不再附带网站前端用于筛选栏的 facet 子请求；
+        之后每轮只为还有下一页的查询翻页，直到所有查询的结果取完
+
+        返回:
+            list: 商品信息列表，每个元素为包含name和url的字典
+        """
+        self.logger.info(f"正在批量获取商品目录: {self.catalog_url}")
+
+        hits_per_page = min(self.site_config.get('hits_per_page', self.ALGOLIA_MAX_HITS_PER_PAGE),
+                            self.ALGOLIA_MAX_HITS_PER_PAGE)
+        headers, _ = self.init_params(self.catalog_url[0]) if self.catalog_url else (None, None)
+
+        # 待查询的品牌及页码
+        pending = {}
+        for url in self.catalog_url:
+            vendor = self.transform_brand_name(url)
+            if not vendor:
+                self.logger.warning(f"无法从URL中解析品牌: {url}")
+                continue
+            pending[vendor] = 0
+
+        products_list = []
+        seen_urls = set()
+        round_trips = 0
+        try:
+            while pending:
+                vendors = list(pending.keys())
+                payload = {"requests": [self.build_catalog_query(vendor, pending[vendor], hits_per_page)
+                                        for vendor in vendors]}
+                self.session.post(self.base_url, headers=headers, data=json.dumps(payload, separators=(',', ':')),
+                                  proxies=self.ipcool_url)
+                round_trips += 1
+
+                data = self.session.json
+                if not data or len(data.get('results', [])) != len(vendors):
+                    self.logger.error("获取页面失败：批量查询响应为空或结果数量不匹配")
+                    return []
+
+                next_pending = {}
+                for vendor, result in zip(vendors, data['results']):
+                    page_products = self.parse_inventory_catalog({'results': [result]})
+                    for product in page_products:
+                        if product['url'] not in seen_urls:
+                            seen_urls.add(product['url'])
+                            products_list.append(product)
+
+                    page = result.get('page', pending[vendor])
+                    if page + 1 < result.get('nbPages', 0):
+                        next_pending[vendor] = page + 1
+                    self.logger.debug(f"品牌 {vendor} 第 {page + 1}/{result.get('nbPages', 0)} 页: {len(page_products)} 个商品")
+                pending = next_pending
+
+            self.logger.info(f"批量获取商品目录完成，共 {len(products_list)} 个商品，请求 {round_trips} 次")
+            return products_list
+
+        except Exception as e:
+            self.logger.error(f"批量获取商品目录过程中出错: {str(e)}")
+            return []
+
+    def build_catalog_query(self, vendor: str, page: int, hits_per_page: int) -> dict:
+        """
+        构建单个品牌的 Algolia 目录查询
+
+        参数:
+            vendor (str): 品牌名称
+            page (int): 页码（从 0 开始）
+            hits_per_page (int): 每页商品数量
+        返回:
+            dict: queries 请求中的一个查询
+        """
+        params = {
+            "distinct": 1,
+            "facetFilters": json.dumps(["tags:Shoes", ["department:men"], [f"vendor:{vendor}"]]),
+            "filters": self.ALGOLIA_FILTERS,
+            "hitsPerPage": hits_per_page,
+            "page": page,
+            "query": "",
+        }
+        return {"indexName": self.ALGOLIA_INDEX_NAME, "params": urllib.parse.urlencode(params)}
+
+    def get_inventory_catalog_per_url(self) -> list[dict]:
+        """
+        逐个目录URL获取商品目录（每个URL一次请求）
 
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
@@ -240,12 +375,11 @@ class CettireMonitor(Monitor):
                 return {}
 
             # 设置GraphQL查询参数
-            json_data = self.json_data
-            json_data['variables']['slugOrId'] = product_id
+            json_data = dict(self.json_data, variables={'slugOrId': product_id})
 
             # 发送GraphQL请求
             self.session.post(
-                'https://api.cettire.com/graphql',
+                self.GRAPHQL_URL,
                 headers=self.headers,
                 json=json_data,
                 proxies={'http': None, 'https': None}
@@ -260,6 +394,88 @@ class CettireMonitor(Monitor):
             self.logger.error(f"获取商品库存信息过程中出错: {str(e)}")
             return {}
 
+    def create_inventory_data_bulk(self):
+        """
+        批量获取所有商品的尺码库存
+
+        按 _extract_product_id 提取的商品ID分块，每块用一个带别名的 GraphQL 请求查询多个商品，
+        块大小由 [site.cettire] 的 bulk_batch_size 控制，整个库存刷新只需 商品数/块大小 次请求
+        """
+        batch_size = max(1, self.site_config.get('bulk_batch_size', 25))
+
+        products_by_id = {}
+        for product in self.products_list:
+            product_id = self._extract_product_id(product['url'])
+            if product_id:
+                products_by_id.setdefault(product_id, product)
+            else:
+                self.logger.error(f"无法从URL提取产品ID: {product['url']}")
+
+        product_ids = list(products_by_id.keys())
+        successful_products = 0
+        request_count = 0
+        for start in range(0, len(product_ids), batch_size):
+            chunk = product_ids[start:start + batch_size]
+            request_count += 1
+            try:
+                results = self.get_inventory_bulk(chunk)
+            except Exception as e:
+                self.logger.error(f"批量获取商品库存信息时出错 [{start + 1}-{start + len(chunk)}]: {str(e)}")
+                continue
+
+            for product_id in chunk:
+                if self._add_inventory_item(products_by_id[product_id], results.get(product_id, {})):
+                    successful_products += 1
+
+        self.logger.info(f"批量获取库存信息完成，成功: {successful_products}/{len(product_ids)}，请求 {request_count} 次")
+
+    def get_inventory_bulk(self, product_ids: list[str]) -> dict:
+        """
+        用一个带别名的 GraphQL 请求查询多个商品的尺码库存
+
+        参数:
+            product_ids (list): 商品ID（slug）列表
+        返回:
+            dict: {商品ID: {尺码: 库存状态}}
+        """
+        json_data = self.build_bulk_query(product_ids)
+        self.session.post(
+            self.GRAPHQL_URL,
+            headers=self.headers,
+            json=json_data,
+            proxies={'http': None, 'https': None}
+        )
+
+        response_data = self.session.json
+        if not response_data or not response_data.get('data'):
+            raise ValueError(f"批量查询响应为空: {response_data.get('errors') if response_data else None}")
+
+        results = {}
+        for index, product_id in enumerate(product_ids):
+            item = response_data['data'].get(f"p{index}")
+            # 复用单个商品的解析逻辑
+            results[product_id] = self.parse_inventory_info({'data': {'catalogItemProduct': item or {}}})
+        return results
+
+    @classmethod
+    def build_bulk_query(cls, product_ids: list[str]) -> dict:
+        """
+        构建批量查询：每个商品对应一个别名字段 p<序号>，变量 id<序号>
+
+        参数:
+            product_ids (list): 商品ID（slug）列表
+        返回:
+            dict: GraphQL 请求体
+        """
+        variable_defs = ", ".join(f"$id{i}: String!" for i in range(len(product_ids)))
+        fields = " ".join(f"p{i}: catalogItemProduct(slugOrId: $id{i}) {{ {cls.GRAPHQL_PRODUCT_FIELDS} }}"
+                          for i in range(len(product_ids)))
+        return {
+            'operationName': 'bulkCatalogItemProducts',
+            'query': f"query bulkCatalogItemProducts({variable_defs}) {{ {fields} }}",
+            'variables': {f"id{i}": product_id for i, product_id in enumerate(product_ids)},
+        }
+
     def parse_inventory_catalog(self, catalog_eles: dict) -> list[dict]:
         """
         解析商品目录HTML数据，提取关键商品信息
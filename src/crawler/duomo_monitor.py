@@ -108,52 +108,87 @@ class DuomoMonitor(Monitor):
         """
         获取商品目录
 
-        从Duomo网站获取Balenciaga鞋子的商品列表
+        从Duomo网站获取Balenciaga鞋子的商品列表，逐页请求并解析，
+        每页解析完成后即释放原始JSON，只保留标准化后的商品信息；
+        任意一页请求失败时返回空列表，不保存不完整的目录
 
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
         """
         products_list: list = []
         try:
-            for url in self.catalog_url:
-                self.logger.info(f"正在获取商品目录: {url}")
-                headers, params = self.init_params(url)
-
-                # 设置代理并访问页面
-                self.session.get(self.base_url, params=params, headers=headers)
-
-                # 检查页面响应
-                if not self.session.json:
-                    self.logger.error("获取页面失败：页面响应为空")
-                    return {}
+            for product_info in self.iter_inventory_catalog():
+                products_list.append(product_info)
 
-                # 尝试查找JSON数据
-                try:
-                    data = self.session.json
+            self.logger.info(f"获取到 {len(products_list)} 个Balenciaga商品")
+            return products_list
 
-                    if not data:
-                        self.logger.error("未找到任何商品列表元素")
-                        return []
+        except Exception as e:
+            self.logger.error(f"获取商品目录过程中出错: {str(e)}")
+            return []
 
-                    self.logger.debug(f"找到 {len(data)} 个商品元素")
+    def iter_inventory_catalog(self):
+        """
+        按目录和页码依次产出标准化后的商品信息，同时写入 inventory_data
 
-                    inventory_catalog_data = self.parse_inventory_catalog(data)
+        返回:
+            generator: 商品信息字典
+        """
+        self._seen_ids = set()
+        for url in self.catalog_url:
+            self.logger.info(f"正在获取商品目录: {url}")
+            for catalog_data in self.iter_catalog_pages(url):
+                yield from self.iter_parse_catalog(catalog_data)
 
-                    if inventory_catalog_data:
-                        products_list += inventory_catalog_data
-                    else:
-                        self.logger.error("解析商品目录失败")
-                        return []
+    def iter_catalog_pages(self, url):
+        """
+        逐页请求设计师商品接口，产出每页的JSON数据
 
-                except Exception as e:
-                    self.logger.error(f"处理商品目录元素时出错: {str(e)}")
-                    return {}
+        遇到空页、整页都是已获取过的商品、已到达接口返回的总页数或 max_pages 时停止；
+        请求失败（无响应、状态码异常或响应不是JSON）以及第一页为空时抛出 ConnectionError，
+        不把请求失败当作目录结束，避免保存缺少部分商品的目录
 
-            return products_list
+        参数:
+            url (str): 设计师目录URL
 
-        except Exception as e:
-            self.logger.error(f"获取商品目录过程中出错: {str(e)}")
-            return {}
+        返回:
+            generator: 每页的JSON数据
+        """
+        headers, params = self.init_params(url)
+        max_pages = self.site_config.get('max_pages', 50)
+
+        for page_num in range(1, max_pages + 1):
+            params['page'] = str(page_num)
+            self.session.get(self.base_url, params=params, headers=headers)
+
+            response = self.session.response
+            if response is None or response.status_code != 200:
+                status = response.status_code if response is not None else "无响应"
+                raise ConnectionError(f"获取第 {page_num} 页失败（{status}）: {url}")
+
+            data = self.session.json
+            if not isinstance(data, dict):
+                raise ConnectionError(f"第 {page_num} 页响应不是有效的JSON: {url}")
+
+            products = (data.get('psdata') or {}).get('products') or []
+            if not products:
+                if page_num == 1:
+                    raise ConnectionError(f"获取页面失败：页面响应为空 {url}")
+                break
+
+            page_ids = {product.get("id_product") for product in products}
+            if not page_ids - self._seen_ids:
+                self.logger.debug(f"第 {page_num} 页没有新商品，停止翻页")
+                break
+
+            self.logger.debug(f"第 {page_num} 页找到 {len(products)} 个商品元素")
+            yield data
+
+            pages_count = (data['psdata'].get('pagination') or {}).get('pages_count')
+            if pages_count and page_num >= int(pages_count):
+                break
+        else:
+            self.logger.warning(f"已达到最大页数 {max_pages}，停止翻页: {url}")
 
     def parse_inventory_catalog(self, catalog_data: dict):
         """
@@ -166,60 +201,69 @@ class DuomoMonitor(Monitor):
             list: 商品信息列表，每个元素为包含商品详细信息的字典
         """
         try:
-            # 检查是否成功获取数据
-            if not catalog_data or 'psdata' not in catalog_data or 'products' not in catalog_data['psdata']:
-                self.logger.error("商品目录数据格式错误或为空")
-                return []
+            return list(self.iter_parse_catalog(catalog_data))
+        except Exception as e:
+            self.logger.error(f"解析商品目录数据时出错: {str(e)}")
+            return []
 
-            products_list = []
-            
-            # 提取商品列表
-            products = catalog_data['psdata']['products']
-            self.logger.info(f"获取到 {len(products)} 个Balenciaga商品")
-            pattern = r'https?://[^/]+/([^/]+)/([^/]+)\.html'
-
-            # 遍历每个商品并提取关键信息
-            for product in products:
-                # 基本信息
-                product_info = {
-                    "id": product.get("id_product", ""),
-                    "name": product.get("name", ""),
-                    "url": product.get("link", ""),
-                    "price": product.get("price", ""),
-                }
-                match = re.search(pattern, product.get("link", ""))
-                if match:
-                    product_info["url"] = 'https://www.ilduomo.it/product/' + match.group(2)
+    def iter_parse_catalog(self, catalog_data: dict):
+        """
+        逐个解析一页商品目录中的商品，跳过已解析过的商品ID
+
+        参数:
+            catalog_data (dict): 单页商品目录的JSON数据
+
+        返回:
+            generator: 商品信息字典
+        """
+        # 检查是否成功获取数据
+        if not catalog_data or 'psdata' not in catalog_data or 'products' not in catalog_data['psdata']:
+            self.logger.error("商品目录数据格式错误或为空")
+            return
+
+        seen_ids = getattr(self, '_seen_ids', set())
+        pattern = r'https?://[^/]+/([^/]+)/([^/]+)\.html'
+
+        # 遍历每个商品并提取关键信息
+        for product in catalog_data['psdata']['products']:
+            product_id = product.get("id_product", "")
+            if product_id in seen_ids:
+                continue
+            seen_ids.add(product_id)
+
+            # 基本信息
+            product_info = {
+                "id": product_id,
+                "name": product.get("name", ""),
+                "url": product.get("link", ""),
+                "price": product.get("price", ""),
+            }
+            match = re.search(pattern, product.get("link", ""))
+            if match:
+                product_info["url"] = 'https://www.ilduomo.it/product/' + match.group(2)
+            else:
+                self.logger.warning(f"无法解析商品链接: {product.get('link', '')}")
+
+            ### 提取尺码和库存信息
+            sizes_inventory = {}
+            for size in product.get("aviable_size", []):
+                size_name = size.get("attribute_name", "")
+                size_info = size.get("quantity", 0)
+                if size_info > 0:
+                    size_info = str(size_info)
                 else:
-                    self.logger.warning(f"无法解析商品链接: {product.get('link', '')}")
-
-                ### 提取尺码和库存信息
-                sizes_inventory = {}
-                if "aviable_size" in product:
-                    for size in product["aviable_size"]:
-                        size_name = size.get("attribute_name", "")
-                        size_info = size.get("quantity", 0)
-                        if size_info > 0:
-                            size_info = str(size_info)
-                        else:
-                            size_info = "sold out"
-
-                        sizes_inventory[size_name] = size_info
-                
-                product_info["inventory"] = sizes_inventory
+                    size_info = "sold out"
 
-                ### 创造库存信息
-                unique_key = f"{product_info['id']}_{product_info['name']}"
-                self.inventory_data[unique_key] = product_info
+                sizes_inventory[size_name] = size_info
 
-                products_list.append(product_info)
-                self.logger.debug(f"解析商品: {product_info['name']}, 尺码数量: {len(product_info['inventory'])}")
-            
-            return products_list
-            
-        except Exception as e:
-            self.logger.error(f"解析商品目录数据时出错: {str(e)}")
-            return []
+            product_info["inventory"] = sizes_inventory
+
+            ### 创造库存信息
+            unique_key = f"{product_info['id']}_{product_info['name']}"
+            self.inventory_data[unique_key] = product_info
+
+            self.logger.debug(f"解析商品: {product_info['name']}, 尺码数量: {len(product_info['inventory'])}")
+            yield product_info
 
     def generate_inventory_summary(self):
         """
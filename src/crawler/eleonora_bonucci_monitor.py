@@ -4,8 +4,11 @@ EleonoraBonucci监控模块 - 负责监控EleonoraBonucci网站上Balenciaga鞋
 """
 import os
 import sys
+import time
 from datetime import datetime
 
+from lxml import etree
+
 # 添加项目根目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
@@ -13,8 +16,8 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.utils.page_setting import *
+from src.utils.html_extractor import ExtractionSpec, html_parser, response_encoding
 from src.common.monitor import Monitor
-from DrissionPage._elements.session_element import SessionElement
 
 
 class EleonoraBonucciMonitor(Monitor):
@@ -25,6 +28,29 @@ class EleonoraBonucciMonitor(Monitor):
     负责爬取EleonoraBonucci网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card='//*[@class="product-desc center"]',
+        fields={
+            "name": './/div[contains(@class, "product-description")]/h4/a',
+            "url": './/div[contains(@class, "product-description")]/h4/a/@href',
+            "price": './/div[contains(@class, "product-price")]/ins',
+        },
+    )
+
+    # 商品详情页的选择器组（商品名称、尺码选项），每轮从第一个成功解析的页面确定使用哪一组
+    DETAIL_SELECTOR_SETS = (
+        {
+            "name": etree.XPath('//*[@id="content"]/div/div/div[1]/div/div[2]/h2'),
+            "sizes": etree.XPath('//*[@id="MainContent_iTaglia"]/option'),
+        },
+        {
+            "name": etree.XPath('//h2[contains(@class, "product-title")]'),
+            "sizes": etree.XPath('//select[contains(@class, "size-select")]/option'),
+        },
+    )
+    SIZE_PLACEHOLDERS = {'size', 'taglia', 'select size', 'select taglia', '- select -'}
+
     def __init__(self, **kwargs):
         """
         初始化EleonoraBonucci监控器
@@ -37,6 +63,8 @@ class EleonoraBonucciMonitor(Monitor):
 
         super().__init__(**kwargs)
         self.session = self.init_session()
+        # 本轮使用的详情页选择器组，None 表示尚未确定
+        self._selector_set = None
 
     def init_params(self):
         """
@@ -92,8 +120,9 @@ class EleonoraBonucciMonitor(Monitor):
 
             self.logger.info(f"监控开始，共获取到 {len(self.products_list)} 个商品信息")
 
-            # 生成库存数据
-            # self.create_inventory_data()
+            # 生成库存数据，[site.eleonora_bonucci] 中 fetch_details 开启时才逐个获取商品详情页
+            if self.site_config.get('fetch_details', False):
+                self.create_inventory_data()
 
             # 保存库存数据
             if self.inventory_data:
@@ -154,10 +183,17 @@ class EleonoraBonucciMonitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
                     # 修改选择器以匹配所有商品项
-                    img_frames = self.session.eles("@class=product-desc center")
+                    img_frames = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                           encoding=self.session.response.encoding)
 
                     if not img_frames:
                         self.logger.error("未找到任何商品列表元素")
@@ -170,6 +206,7 @@ class EleonoraBonucciMonitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -184,6 +221,53 @@ class EleonoraBonucciMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
+    def create_inventory_data(self):
+        """
+        生成库存信息，每轮开始时重新确定详情页选择器组
+        """
+        self._selector_set = None
+        super().create_inventory_data()
+
+    def _create_inventory_data_concurrent(self, products: list[dict], workers: int):
+        """
+        通过异步请求客户端并发获取商品详情页，所有请求共用一个保持长连接的连接池
+
+        并发数为 detail_workers，同一域名的请求间隔由 detail_rate 换算，结果按商品列表的原始顺序写入
+
+        参数:
+            products (list): 需要获取详情页的商品列表
+            workers (int): 并发请求数
+        """
+        rate = self.site_config.get('detail_rate', 1.0)
+        fetcher = self.init_async_fetcher(headers=self.init_params(), per_host_limit=workers,
+                                          min_interval=1.0 / rate if rate > 0 else 0.0)
+        total = len(products)
+        self.logger.info(f"并发获取商品库存信息: {total} 个商品, 并发 {workers}, 限速 {rate} 次/秒")
+
+        start_time = time.perf_counter()
+        results = fetcher.fetch_many([(product['url'], {'verify': False}) for product in products])
+
+        successful_products = 0
+        failed_products = 0
+        for product, result in zip(products, results):
+            if not result.ok:
+                failed_products += 1
+                reason = f"状态码 {result.response.status_code}" if result.response is not None else str(result.error)
+                self.logger.error(f"获取商品 '{product['name']}' 库存信息时出错: {reason}")
+                continue
+            try:
+                inventory_info = self.parse_inventory_html(result.response.content,
+                                                          response_encoding(result.response))
+            except Exception as e:
+                failed_products += 1
+                self.logger.error(f"解析商品 '{product['name']}' 库存信息时出错: {str(e)}")
+                continue
+            if self._add_inventory_item(product, inventory_info):
+                successful_products += 1
+
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"库存信息获取完成，成功: {successful_products}/{total}，出错: {failed_products}，耗时 {elapsed:.1f} 秒")
+
     def get_inventory_page(self, url):
         """
         获取单个商品的库存信息
@@ -196,29 +280,29 @@ class EleonoraBonucciMonitor(Monitor):
         """
         self.logger.debug(f"正在获取商品库存信息: {url}")
         try:
+            session = self.get_detail_session()
+
             # 访问商品页面
-            self.session.get(url)
+            session.get(url, headers=self.init_params(), verify=False)
 
             # 检查页面响应
-            if not self.session.html.strip():
+            if session.response is None or not session.response.content.strip():
                 self.logger.error(f"获取商品页面失败: {url}")
                 return {}
 
             # 解析库存信息
-            inventory_info = self.parse_inventory_info(self.session)
-
-            return inventory_info
+            return self.parse_inventory_html(session.response.content, session.response.encoding)
 
         except Exception as e:
             self.logger.error(f"获取商品库存信息过程中出错: {str(e)}")
             return {}
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -227,41 +311,29 @@ class EleonoraBonucciMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for item in catalog_eles:
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('x://div[contains(@class, "product-description")]/h4/a')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
+                    name = item["name"]
+                    if not name:
                         self.logger.warning(f"无法找到商品名称元素，跳过此商品")
                         continue
 
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('x://div[contains(@class, "product-description")]/h4/a')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('x://div[contains(@class, "product-price")]/ins')
-                    price = price_ele.text if price_ele else ""
+                    url = item["url"]
+                    price = item["price"]
 
                     if name and url:
-                        # 修正URL格式
-                        full_url = f"https://eleonorabonucci.com{url}" if not url.startswith('http') else url
-
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": {}
                         }
                         self.inventory_data[unique_key] = product_info
                         products_list.append(product_info)
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -273,81 +345,61 @@ class EleonoraBonucciMonitor(Monitor):
             self.logger.error(f"处理商品目录数据时出错: {str(e)}")
             return []
 
-    def parse_inventory_info(self, session) -> dict:
+    def parse_inventory_html(self, content, encoding=None) -> dict:
         """
-        解析商品库存信息
+        解析商品详情页HTML中的尺码库存
+
+        本轮第一个匹配到尺码选项的页面决定使用哪一组选择器，之后的页面直接使用该组，
+        不再逐个商品尝试备用选择器
 
-        从商品页面的尺码元素中提取尺码和库存状态
-        
         参数：
-            session: 页面会话对象
-            
+            content (bytes): 商品页面内容
+            encoding (str, optional): 页面编码（响应编码），为空时由 lxml 根据 <meta charset> 检测
+
         返回:
             dict: 尺码和库存状态的字典，格式为 {尺码: 库存状态}
         """
         inventory_info = {}
+        root = etree.fromstring(content, html_parser(encoding))
+        if root is None:
+            return inventory_info
 
-        try:
-            # 获取商品名称
-            try:
-                good_name_ele = session.ele('x://*[@id="content"]/div/div/div[1]/div/div[2]/h2')
-                if not good_name_ele:
-                    good_name_ele = session.ele('x://h2[contains(@class, "product-title")]')
-                good_name = good_name_ele.text if good_name_ele else "未知商品"
-                self.logger.debug(f"商品名称: {good_name}")
-            except Exception as e:
-                good_name = "未知商品"
-                self.logger.warning(f"获取商品名称失败: {str(e)}")
+        selector_set = self._selector_set
+        if selector_set is None:
+            selector_set = self._choose_selector_set(root)
+            if selector_set is None:
+                self.logger.warning("未找到尺码选择器，本页面无法确定使用哪一组选择器")
+                return inventory_info
 
-            # 获取尺码信息
-            try:
-                # 首先尝试select/option方式的尺码选择器
-                size_items = session.eles('x://*[@id="MainContent_iTaglia"]/option')
-
-                # 如果没有找到，尝试其他常见的尺码选择器
-                if not size_items:
-                    self.logger.debug("尝试查找其他尺码选择器")
-                    size_items = session.eles('x://select[contains(@class, "size-select")]/option')
-
-                self.logger.debug(f"找到 {len(size_items)} 个尺码元素")
-
-                # 遍历每个尺码元素，提取尺码和库存状态
-                for item in size_items:
-                    try:
-                        # 获取尺码文本
-                        label = item.text.strip()
-
-                        # 判断库存状态
-                        is_available = True
-
-                        # 跳过空尺码或明显无效的尺码
-                        if not label or label.lower() in ['size', 'taglia', 'select size', 'select taglia',
-                                                          '- select -']:
-                            continue
-
-                        # 添加到库存信息
-                        status = 'available' if is_available else 'sold out'
-                        inventory_info[label] = status
-                    except Exception as e:
-                        self.logger.warning(f"处理单个尺码元素时出错: {str(e)}")
-                        continue
+        name_eles = selector_set["name"](root)
+        good_name = " ".join("".join(name_eles[0].itertext()).split()) if name_eles else "未知商品"
 
-            except Exception as e:
-                self.logger.error(f"获取尺码元素失败: {str(e)}")
+        # 下拉框中列出的尺码均视为有货
+        for option in selector_set["sizes"](root):
+            label = "".join(option.itertext()).strip()
+            if not label or label.lower() in self.SIZE_PLACEHOLDERS:
+                continue
+            inventory_info[label] = 'available'
 
-            # 记录库存信息
-            if inventory_info:
-                self.logger.debug(f"商品 '{good_name}' 共有 {len(inventory_info)} 种尺码")
-                for size, availability in inventory_info.items():
-                    self.logger.debug(f"尺码: {size}, 库存状态: {availability}")
-            else:
-                self.logger.warning(f"商品 '{good_name}' 未找到尺码信息")
+        if inventory_info:
+            self.logger.debug(f"商品 '{good_name}' 共有 {len(inventory_info)} 种尺码")
+        else:
+            self.logger.warning(f"商品 '{good_name}' 未找到尺码信息")
 
-            return inventory_info
+        return inventory_info
 
-        except Exception as e:
-            self.logger.error(f"解析库存信息时出错: {str(e)}")
-            return inventory_info
+    def _choose_selector_set(self, root):
+        """
+        按顺序尝试各组选择器，选中第一组能找到尺码选项的选择器并在本轮后续页面中使用
+
+        并发解析时多个线程可能同时选择，结果相同，不需要加锁
+        """
+        for index, selector_set in enumerate(self.DETAIL_SELECTOR_SETS):
+            if selector_set["sizes"](root):
+                self._selector_set = selector_set
+                self.logger.debug(f"本轮详情页使用第 {index + 1} 组选择器")
+                return selector_set
+        return None
 
     def generate_inventory_summary(self):
         """
@@ -5,7 +5,6 @@ Giglio监控模块 - 负责监控Giglio网站上Balenciaga鞋子的库存状态
 import os
 import sys
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 
 # 添加项目根目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,6 +12,7 @@ project_root = os.path.dirname(os.path.dirname(current_dir))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from src.utils.html_extractor import ExtractionSpec, FieldSpec
 from src.common.monitor import Monitor
 
 
@@ -24,6 +24,17 @@ class GiglioMonitor(Monitor):
     负责爬取Giglio网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card="//article[contains(@class, 'prod-card prod-card-new')]",
+        fields={
+            "name": './/header/a',
+            "url": './/header/a/@href',
+            "price": ".//small[contains(@class, 'prod-card__price')]",
+            "sizes": FieldSpec('(.//em)[1]//i[not(@class)]', many=True),
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化Giglio监控器
@@ -143,9 +154,16 @@ class GiglioMonitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
-                    data = self.session.s_eles('tag:article@@class:prod-card prod-card-new')
+                    data = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                     encoding=self.session.response.encoding)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -157,6 +175,7 @@ class GiglioMonitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -171,12 +190,12 @@ class GiglioMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -185,53 +204,30 @@ class GiglioMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('x://header/a')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
-                        # 替换新的catalog_eles
-                        catalog_eles = self.session.s_eles('tag:article@@class:prod-card prod-card-new')
-                        item = catalog_eles[i]
-                        name_ele = item.s_ele('x://header/a')
-                        if not name_ele:
-                            self.logger.warning(f"无法找到商品名称元素，跳过此商品")
-                            continue
-
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('x://header/a')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('tag:small@class:prod-card__price')
-                    price = price_ele.text if price_ele else ""
-
-                    sizes_eles = item.s_ele('tag:em').s_eles('tag:i')
-                    sizes_dict = {}
-                    for size_item in sizes_eles:
-                        size_label = size_item.text
-                        if size_label and 'class' not in size_item.attrs:
-                            sizes_dict[size_label] = "available"
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
 
-                    if name and url:
-                        # 修正URL格式
-                        full_url = f"https://www.giglio.com{url}" if not url.startswith('http') else url
+                    url = item["url"]
+                    price = item["price"]
+                    sizes_dict = {size_label: "available" for size_label in item["sizes"]}
 
+                    if name and url:
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
-                        if self.normalize_url(full_url) in self.product_url:
+                        if self.normalize_url(url) in self.product_url:
                             key_monitoring = True
-                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {full_url}")
+                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {url}")
                         else:
                             key_monitoring = False
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": sizes_dict,
                             "key_monitoring": key_monitoring
@@ -240,7 +236,7 @@ class GiglioMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -5,7 +5,6 @@ Grifo210监控模块 - 负责监控Grifo210网站上Balenciaga鞋子的库存状
 import os
 import sys
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 
 # 添加项目根目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,6 +13,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from src.utils.page_setting import *
+from src.utils.html_extractor import ExtractionSpec
 from src.common.monitor import Monitor
 
 
@@ -25,6 +25,16 @@ class Grifo210Monitor(Monitor):
     负责爬取Grifo210网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card='//div[@class="product"]',
+        fields={
+            "name": './/div[@class="product-desc"]/p',
+            "url": './/a/@href',
+            "price": './/div[@class="price-box"]/span',
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化Giglio监控器
@@ -146,9 +156,16 @@ class Grifo210Monitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
-                    data = self.session.s_eles('x://div[@class="product"]')
+                    data = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                     encoding=self.session.response.encoding)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -160,6 +177,7 @@ class Grifo210Monitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -174,12 +192,12 @@ class Grifo210Monitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -188,40 +206,23 @@ class Grifo210Monitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('x://div[@class="product-desc"]/p')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
-                        # 替换新的catalog_eles
-                        catalog_eles = self.session.s_eles('x://div[@class="product"]')
-                        item = catalog_eles[i]
-                        name_ele = item.s_ele('x://div[@class="product-desc"]/p')
-                        if not name_ele:
-                            self.logger.warning(f"无法找到商品名称元素，跳过此商品")
-                            continue
-
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('x://a')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('x://div[@class="price-box"]/span')
-                    price = price_ele.text if price_ele else ""
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
 
-                    if name and url:
-                        # 修正URL格式
-                        full_url = f"https://www.giglio.com{url}" if not url.startswith('http') else url
+                    url = item["url"]
+                    price = item["price"]
 
+                    if name and url:
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": {}
                         }
@@ -229,7 +230,7 @@ class Grifo210Monitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
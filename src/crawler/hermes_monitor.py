@@ -4,8 +4,8 @@ Hermès监控模块 - 负责监控Hermès网站上Balenciaga鞋子的库存状
 """
 from datetime import datetime
 
-from DrissionPage._elements.session_element import SessionElement
 
+from src.utils.html_extractor import ExtractionSpec
 from src.common.monitor import Monitor
 from src.utils.slide_validate import slide_validate
 
@@ -18,6 +18,16 @@ class HermesMonitor(Monitor):
     负责爬取Hermès网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card='//div[@class="product-item"]',
+        fields={
+            "name": ".//a[starts-with(@class, 'product-item-name')]",
+            "url": ".//a[starts-with(@class, 'product-item-name')]/@href",
+            "price": './/span[@class="price price-color small"]',
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化Hermès监控器
@@ -138,9 +148,16 @@ class HermesMonitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
-                    data = self.session.eles('x://div[@class="product-item"]')
+                    data = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                     encoding=self.session.response.encoding)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -152,6 +169,7 @@ class HermesMonitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -166,12 +184,12 @@ class HermesMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -180,30 +198,23 @@ class HermesMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('tag:a@@class^product-item-name')
-                    name = name_ele.text
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
 
-                    # 尝试多种选择器找到URL
-                    url_ele = name_ele
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('x://span[@class="price price-color small"]')
-                    price = price_ele.text if price_ele else ""
+                    url = item["url"]
+                    price = item["price"]
 
                     if name and url:
-                        # 修正URL格式
-                        full_url = f"https://www.hermes.com{url}" if not url.startswith('http') else url
-
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": {}
                         }
@@ -211,7 +222,7 @@ class HermesMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -5,9 +5,9 @@ julian监控模块 - 负责监控julian网站上Balenciaga鞋子的库存状态
 import os
 import time
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 
 from utils.page_setting import *
+from utils.html_extractor import ExtractionSpec, FieldSpec
 from common.monitor import Monitor
 
 
@@ -19,6 +19,17 @@ class JulianMonitor(Monitor):
     负责爬取julian网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card="//span[contains(@class, 'product__actions row no-gutters')]",
+        fields={
+            "name": ".//span[contains(@class, 'name')]",
+            "url": ".//a[contains(@class, 'js-product js-gtm-product-click')]/@href",
+            "price": ".//b[contains(@class, 'js-pairing-price')]",
+            "sizes": FieldSpec("(.//span[contains(@class, 'sizes ty-left')])[1]//span", many=True),
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化julian监控器
@@ -33,7 +44,12 @@ class JulianMonitor(Monitor):
         
         self.page = self.init_page()
 
-        self.headers = self.init_params(self.project_path, self.logger)
+        # 初始化失败时归还已租用的浏览器，避免浏览器池名额被一直占用
+        try:
+            self.headers = self.init_params(self.project_path, self.logger)
+        except Exception:
+            self.release_page(healthy=True)
+            raise
 
     @staticmethod
     def init_params(project_paths, logger):
@@ -120,7 +136,7 @@ class JulianMonitor(Monitor):
         """
         获取商品目录
 
-        从sugar网站获取Balenciaga鞋子的商品列表
+        所有分类页在同一个浏览器的多个标签页中并行加载，等待商品元素出现后各取一次HTML快照解析
 
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
@@ -128,24 +144,20 @@ class JulianMonitor(Monitor):
 
         products_list: list[dict] = []
         try:
-            for url in self.catalog_url:
-                # 设置代理并访问页面
-                # self.session.get(self.catalog_url, headers=self.headers)
-                self.logger.info(f"正在获取商品目录: {url}")
-                tab = self.page.new_tab()
-                tab.get(url)
-                self.page.get_tab(-1).close()
+            snapshots = self.fetch_pages_in_tabs(self.catalog_url, wait_locator='tag:span@@class:product__actions row no-gutters')
 
-                page = self.page.latest_tab
+            for url in self.catalog_url:
+                self.logger.info(f"正在解析商品目录: {url}")
+                html = snapshots.get(url, "")
 
                 # 检查页面响应
-                if not page.html.strip():
+                if not html.strip():
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
                 # 尝试查找商品元素
                 try:
-                    data = page.s_eles('tag:span@@class:product__actions row no-gutters')
+                    data = self.CATALOG_SPEC.extract(html, base_url=url)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -171,12 +183,12 @@ class JulianMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -185,53 +197,31 @@ class JulianMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('tag:span@class:name')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
-                        # 替换新的catalog_eles
-                        catalog_eles = self.session.s_eles('tag:span@@class:product__actions row no-gutters')
-                        item = catalog_eles[i]
-                        name_ele = item.s_ele('tag:span@class:name')
-                        if not name_ele:
-                            self.logger.warning(f"无法找到商品名称元素，跳过此商品")
-                            continue
-
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('tag:a@@class:js-product js-gtm-product-click')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('tag:b@class:js-pairing-price')
-                    price = price_ele.text if price_ele else ""
-
-                    sizes_eles = item.s_ele('tag:span@class:sizes ty-left').s_eles('tag:span')
-                    sizes_dict = {}
-                    for size_item in sizes_eles:
-                        size_label = size_item.text
-                        if size_label and contains_digit(size_label):
-                            sizes_dict[size_label] = "available"
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
 
-                    if name and url:
-                        # 修正URL格式
-                        full_url = f"https://www.julian-fashion.com{url}" if not url.startswith('http') else url
+                    url = item["url"]
+                    price = item["price"]
+                    sizes_dict = {size_label: "available" for size_label in item["sizes"]
+                                  if contains_digit(size_label)}
 
+                    if name and url:
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
-                        if full_url in self.product_url:
+                        if url in self.product_url:
                             key_monitoring = True
-                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {full_url}")
+                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {url}")
                         else:
                             key_monitoring = False
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": sizes_dict,
                             "key_monitoring": key_monitoring
@@ -240,7 +230,7 @@ class JulianMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -2,7 +2,7 @@
 MrPorter监控模块 - 负责监控MrPorter网站上Balenciaga鞋子的库存状态
 该模块实现了对MrPorter网站的爬取、解析和数据保存功能
 """
-import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 import re
@@ -10,6 +10,7 @@ from curl_cffi import requests
 
 
 from src.utils.page_setting import *
+from src.utils.ld_json import extract_ld_json
 from src.common.monitor import Monitor
 
 
@@ -124,62 +125,41 @@ class MrPorterMonitor(Monitor):
     def get_inventory_catalog(self) -> list[dict]:
         """
         获取商品目录
-        
-        从MrPorter网站获取Balenciaga鞋子的商品列表
-        
+
+        从MrPorter网站获取Balenciaga鞋子的商品列表，多个目录页并发请求，
+        直接从响应内容中提取 ItemList 类型的 JSON-LD 数据，按目录顺序解析；
+        任意一个目录页获取或解析失败时返回空列表，不保存缺少整个分类的不完整目录
+
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
         """
 
         products_list: list[dict] = []
         try:
-            for url in self.catalog_url:
-                headers, cookies = self._init_params(url)
-                # 设置代理并访问页面
-                response = requests.get(url, cookies=cookies, headers=headers, proxies=self.ipcool_url)
-                save_path = os.path.join(self.data_root, f"{self.name}.html")
-                with open(save_path, 'w', encoding='utf-8') as file:
-                    file.write(response.text)
-
-                self.session.get(save_path)
-                # self.page.get(url)
-                self.logger.info(f"正在获取商品目录: {url}")
-
-                page = self.session
+            workers = max(1, min(self.site_config.get('catalog_workers', 4), len(self.catalog_url)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                contents = list(executor.map(self._fetch_catalog_page, self.catalog_url))
 
+            for url, content in zip(self.catalog_url, contents):
                 # 检查页面响应
-                if not page.html.strip():
-                    self.logger.error("获取页面失败：页面响应为空")
+                if not content or not content.strip():
+                    self.logger.error(f"获取页面失败：页面响应为空 {url}")
                     return []
 
-                self.logger.debug("页面加载成功，开始查找商品信息")
-
-                # 使用更精确的XPath来查找JSON数据
-                script_elements = page.s_eles('xpath://script[@type="application/ld+json"]')
-
-                if not script_elements:
-                    self.logger.error("未找到包含商品目录的script元素")
+                item_lists = extract_ld_json(content, "ItemList")
+                if not item_lists:
+                    self.logger.error(f"未找到包含商品目录的JSON-LD数据: {url}")
                     return []
 
-                # 遍历所有script元素，查找包含商品目录的JSON数据
-                for script_ele in script_elements:
-                    script_frame = script_ele.text or script_ele.inner_html
+                for item_list in item_lists:
+                    self.logger.debug("找到商品目录JSON数据")
+                    inventory_catalog_data = self.parse_inventory_catalog(item_list)
+                    self.logger.info(f"共找到 {len(inventory_catalog_data)} 个商品")
 
-                    data = json.loads(script_frame)
-                    # 检查这是否是我们需要的商品目录数据
-                    if data.get("@type") == "ItemList":
-                        self.logger.debug("找到商品目录JSON数据")
-
-                        inventory_catalog_data = self.parse_inventory_catalog(script_frame)
-                        self.logger.info(f"共找到 {len(inventory_catalog_data)} 个商品")
-
-                        if inventory_catalog_data:
-                            products_list += inventory_catalog_data
-                        else:
-                            self.logger.error("解析商品目录失败")
-                            return []
+                    if inventory_catalog_data:
+                        products_list += inventory_catalog_data
                     else:
-                        self.logger.debug("当前script元素不是包含商品目录的JSON数据")
+                        self.logger.error(f"解析商品目录失败: {url}")
                         return []
 
             return products_list
@@ -188,6 +168,19 @@ class MrPorterMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
+    def _fetch_catalog_page(self, url) -> bytes:
+        """
+        请求单个目录页，返回原始响应内容，请求失败时返回空字节串
+        """
+        headers, cookies = self._init_params(url)
+        self.logger.info(f"正在获取商品目录: {url}")
+        try:
+            response = requests.get(url, cookies=cookies, headers=headers, proxies=self.ipcool_url)
+            return response.content
+        except Exception as e:
+            self.logger.error(f"请求目录页失败: {url}, {str(e)}")
+            return b""
+
     # def get_inventory_page(self, url) -> dict:
     #     """
     #     获取单个商品的库存信息
@@ -282,12 +275,12 @@ class MrPorterMonitor(Monitor):
     #
     #     return {}
 
-    def parse_inventory_catalog(self, catalog_info: str) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_info) -> list[dict]:
         """
         解析商品目录JSON数据
         
         参数:
-            catalog_info (str): 包含商品目录的JSON字符串
+            catalog_info (str | dict): 包含商品目录的JSON字符串，或已解析的 ItemList 对象
             
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
@@ -295,7 +288,7 @@ class MrPorterMonitor(Monitor):
         self.logger.debug("开始解析商品目录JSON数据")
         try:
             # 解析JSON数据
-            data = json.loads(catalog_info)
+            data = json.loads(catalog_info) if isinstance(catalog_info, (str, bytes)) else catalog_info
             products_list = []
 
             # 提取每个商品的名称和URL
@@ -21,6 +21,15 @@ class MytheresaMonitor(Monitor):
     负责爬取Mytheresa网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品列表接口
+    API_URL = 'https://api.mytheresa.com/api'
+    # 网站前端使用的每页商品数量
+    DEFAULT_PAGE_SIZE = 120
+    # 浏览器辅助模式下监听的商品列表请求
+    LISTEN_TARGET = 'api.mytheresa.com/api'
+    # 回放请求时不能沿用的请求头（由 requests 重新生成）
+    REPLAY_SKIP_HEADERS = {'content-length', 'host', 'connection', 'accept-encoding'}
+
     def __init__(self, **kwargs):
         """
         初始化mytheresa监控器
@@ -37,9 +46,11 @@ class MytheresaMonitor(Monitor):
         # 初始化浏览器页面
         # self.page = self.init_page()
         self.session = self.init_session()
+        # 已解析商品的 slug，用于跨分页和分类去重
+        self._seen_slugs = set()
 
     @staticmethod
-    def init_params(section: str, categories: str, slug: str, page_num: int):
+    def init_params(section: str, categories: str, slug: str, page_num: int, page_size: int = DEFAULT_PAGE_SIZE):
         headers = {
             'accept': '*/*',
             'accept-language': 'en',
@@ -76,6 +87,8 @@ class MytheresaMonitor(Monitor):
 
         data["variables"]["page"] = page_num
 
+        data["variables"]["size"] = page_size
+
         # 3. 处理查询字符串中的转义问题（可选）
         # 如果您需要修改查询中的内容，先解码查询字符串
         decoded_query = data["query"].encode().decode('unicode_escape')
@@ -175,18 +188,26 @@ class MytheresaMonitor(Monitor):
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
         """
+        # 浏览器辅助模式：浏览器只加载一次分类页，捕获请求模板后通过HTTP回放其余页
+        if self.site_config.get('catalog_mode', 'api') == 'browser':
+            return self.get_inventory_catalog_browser()
+
         products_list = []
         url_total_count = len(self.catalog_url)
+        # 不同分类URL和分页之间按 slug 去重
+        self._seen_slugs = set()
+        page_size = self.site_config.get('page_size', self.DEFAULT_PAGE_SIZE)
 
         try:
             for url_index, url in enumerate(self.catalog_url):
                 self.logger.info(f"正在获取商品目录 [{url_index + 1}/{url_total_count}]: {url}")
 
-                data, headers = self.generate_payload(url, 1)
+                data, headers = self.generate_payload(url, 1, page_size)
 
-                self.session.post('https://api.mytheresa.com/api', headers=headers, data=data, proxies=self.ipcool_url)
+                self.session.post(self.API_URL, headers=headers, data=data, proxies=self.ipcool_url)
 
-                response = self.session.json['data']['xProductListingPage']['products']
+                listing_page = self.session.json['data']['xProductListingPage']
+                response = listing_page['products']
                 self.logger.debug(f"找到 {len(response)} 个商品元素")
 
                 url_products = self.parse_inventory_catalog(response)
@@ -194,16 +215,19 @@ class MytheresaMonitor(Monitor):
                     return []
                 products_list.extend(url_products)
 
-                total_items = self.session.json['data']['xProductListingPage']['pagination']['totalItems']
+                pagination = listing_page['pagination']
+                total_items = int(pagination['totalItems'])
+                # 以服务器实际使用的每页数量计算页数，接口不支持请求的 page_size 时也能取全
+                items_per_page = int(pagination.get('itemsPerPage') or page_size)
+                total_pages = math.ceil(total_items / items_per_page)
 
-                self.logger.info(f"获取到 {len(url_products)} 个商品, 共 {math.ceil(total_items/120)} 页")
+                self.logger.info(f"获取到 {len(url_products)} 个商品, 共 {total_pages} 页")
 
-                # 判断是否存在"Show more"按钮
-                if int(total_items) > 120:
-                    url_products = self.loop_each_catalog_item(url, total_items)
-                    if not url_products:
-                        return []
-                    products_list.extend(url_products)
+                # 其余页并发获取
+                if total_pages > 1:
+                    more_products = self.loop_each_catalog_item(url, total_pages, items_per_page)
+                    url_products = url_products + more_products
+                    products_list.extend(more_products)
 
                 self.logger.info(f"URL {url} 爬取成功，获取到 {len(url_products)} 个商品")
 
@@ -213,72 +237,127 @@ class MytheresaMonitor(Monitor):
             # 即使出现全局错误，也返回已经获取到的产品列表，而不是空列表
             return products_list
 
-        # try:
-        #     for url_index, url in enumerate(self.catalog_url):
-        #         self.logger.info(f"正在获取商品目录 [{url_index + 1}/{url_total_count}]: {url}")
-        #         try:
-        #             tab = self.page.new_tab()
-        #             tab.get(url, timeout=60)
-        #             tab.wait.eles_loaded('x://div[@class="item"]', timeout=60)
-        #
-        #             # 尝试查找商品元素
-        #             try:
-        #                 tab.scroll.to_bottom()
-        #
-        #                 category_items = tab.s_eles('x://div[@class="item"]') + tab.s_eles('x://div[@class="item item--soldout"]')
-        #
-        #                 self.logger.info(f"找到 {len(category_items)} 个商品元素")
-        #                 url_products = self.parse_inventory_catalog_html(category_items)
-        #                 products_list.extend(url_products)
-        #
-        #                 show_more_button = tab.ele('@text():Show more')
-        #
-        #                 # 判断是否存在"Show more"按钮
-        #                 if show_more_button:
-        #                     self.loop_through_button(tab, show_more_button, products_list)
-        #
-        #                 self.url_success_count += 1
-        #                 self.logger.info(f"URL {url} 爬取成功，获取到 {len(url_products)} 个商品")
-        #
-        #             except Exception as e:
-        #                 self.logger.error(f"处理URL {url} 的商品目录元素时出错: {str(e)}")
-        #                 # 继续处理下一个URL，而不是直接返回空列表
-        #         except Exception as e:
-        #             self.logger.error(f"获取URL {url} 时出错: {str(e)}")
-        #             # 继续处理下一个URL，而不是直接返回空列表
-        #         finally:
-        #             # 关闭当前标签页，释放资源
-        #             try:
-        #                 tab.close()
-        #             except:
-        #                 pass
-        #
-        #     # 在所有URL处理完成后，检查成功率
-        #     if self.url_success_count == 0:
-        #         self.logger.error(f"所有URL ({url_total_count}个) 都爬取失败")
-        #         return []
-        #
-        #     success_rate = self.url_success_count / url_total_count
-        #     if success_rate < 0.5:  # 如果成功率低于50%
-        #         self.logger.warning(f"URL爬取成功率过低: {success_rate:.1%} ({self.url_success_count}/{url_total_count})")
-        #
-        #     self.logger.info(f"共爬取了 {url_total_count} 个URL，成功 {self.url_success_count} 个，获取到 {len(products_list)} 个商品")
-        #
-        #     # 如果产品数量异常少，记录警告
-        #     if len(products_list) < 5 and self.url_success_count > 0:
-        #         self.logger.warning(f"爬取到的商品数量异常少 ({len(products_list)}个)，可能是爬取不完整")
-        #
-        #     return products_list
-        #
-        # except Exception as e:
-        #     self.logger.error(f"获取商品目录过程中出错: {str(e)}")
-        #     # 即使出现全局错误，也返回已经获取到的产品列表，而不是空列表
-        #     return products_list
-
-    def generate_payload(self, url: str, page_num: int):
+    def get_inventory_catalog_browser(self):
+        """
+        浏览器辅助模式获取商品目录
+
+        每个分类页在浏览器中只加载一次，通过网络监听捕获商品列表接口的请求模板（请求头、Cookie、GraphQL 请求体），
+        之后的所有分页直接修改模板中的页码通过HTTP并发回放，浏览器耗时与分类的总页数无关
+
+        返回:
+            list: 商品信息列表，每个元素为包含name和url的字典
+        """
+        products_list = []
+        url_total_count = len(self.catalog_url)
+        self._seen_slugs = set()
+
+        try:
+            if self.page is None:
+                self.page = self.init_page()
+
+            for url_index, url in enumerate(self.catalog_url):
+                self.logger.info(f"正在获取商品目录（浏览器辅助） [{url_index + 1}/{url_total_count}]: {url}")
+                tab = self.page.new_tab()
+                try:
+                    template, listing_page, html_products = self.capture_listing_request(tab, url)
+                finally:
+                    tab.close()
+
+                if template is None:
+                    self.logger.error(f"未捕获到商品列表请求，跳过该分类: {url}")
+                    continue
+
+                url_products = html_products + self.parse_inventory_catalog(listing_page['products'])
+
+                pagination = listing_page['pagination']
+                captured_page = int(template['payload']['variables'].get('page') or 1)
+                items_per_page = int(pagination.get('itemsPerPage') or self.DEFAULT_PAGE_SIZE)
+                total_pages = math.ceil(int(pagination['totalItems']) / items_per_page)
+                self.logger.info(f"捕获第{captured_page}页请求模板，获取到 {len(url_products)} 个商品, 共 {total_pages} 页")
+
+                if total_pages > captured_page:
+                    url_products += self.loop_each_catalog_item(url, total_pages, items_per_page,
+                                                                template=template, start_page=captured_page + 1)
+
+                products_list.extend(url_products)
+                self.logger.info(f"URL {url} 爬取成功，获取到 {len(url_products)} 个商品")
+
+            return products_list
+        except Exception as e:
+            self.logger.error(f"浏览器辅助获取商品目录过程中出错: {str(e)}")
+            return products_list
+
+    def capture_listing_request(self, tab, url):
+        """
+        加载分类页并捕获商品列表接口的请求
+
+        页面加载时没有发出接口请求（第一页由服务端渲染）时，点击一次"Show more"触发第二页请求，
+        并从页面HTML中解析第一页的商品
+
+        :param tab: 浏览器标签页
+        :param url: 分类URL
+        :return: (请求模板, 捕获到的 xProductListingPage 数据, 从HTML解析的商品列表)，未捕获到时模板为 None
+        """
+        timeout = self.site_config.get('listen_timeout', 30)
+        html_products = []
+
+        tab.listen.start(self.LISTEN_TARGET, method='POST')
+        try:
+            tab.get(url, timeout=60)
+            packet = tab.listen.wait(timeout=timeout)
+
+            if not packet:
+                self.logger.debug("页面加载时未发出商品列表请求，点击 Show more 触发")
+                category_items = tab.s_eles('x://div[@class="item"]') + tab.s_eles('x://div[@class="item item--soldout"]')
+                html_products = self.parse_inventory_catalog_html(category_items)
+                show_more_button = tab.ele('@text():Show more', timeout=10)
+                if show_more_button:
+                    show_more_button.click(by_js=True)
+                    packet = tab.listen.wait(timeout=timeout)
+        finally:
+            tab.listen.stop()
+
+        if not packet:
+            return None, None, html_products
+
+        body = packet.response.body
+        listing_page = (body or {}).get('data', {}).get('xProductListingPage') if isinstance(body, dict) else None
+        post_data = packet.request.postData
+        payload = post_data if isinstance(post_data, dict) else json.loads(post_data)
+        if not listing_page or 'variables' not in payload:
+            self.logger.error("捕获到的商品列表请求格式异常")
+            return None, None, html_products
+
+        headers = {key: value for key, value in packet.request.headers.items()
+                   if not key.startswith(':') and key.lower() not in self.REPLAY_SKIP_HEADERS}
+        # 部分 Cookie 只出现在 CDP 的附加信息中，请求头里没有时单独补上
+        if 'cookie' not in {key.lower() for key in headers}:
+            cookies = packet.request.cookies
+            if cookies:
+                headers['cookie'] = '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+        template = {'url': packet.url, 'headers': headers, 'payload': payload}
+        return template, listing_page, html_products
+
+    @staticmethod
+    def build_replay_request(template: dict, page_num: int):
+        """
+        用捕获的请求模板生成指定页码的请求
+
+        :param template: capture_listing_request 返回的请求模板
+        :param page_num: 页码（从 1 开始）
+        :return: (url, 请求参数) 元组，供 AsyncFetcher.fetch_many 使用
+        """
+        payload = dict(template['payload'])
+        payload['variables'] = dict(payload['variables'], page=page_num)
+        return template['url'], {'method': 'POST', 'headers': template['headers'], 'data': json.dumps(payload)}
+
+    def generate_payload(self, url: str, page_num: int, page_size: int = DEFAULT_PAGE_SIZE):
         """
         生成请求参数和请求头
         :param url:
+        :param page_num: 页码（从 1 开始）
+        :param page_size: 每页商品数量
         :return:
         """
         parsed = urlparse(url)
@@ -293,30 +372,54 @@ class MytheresaMonitor(Monitor):
         query_params = parse_qs(parsed.query)
         category_id = query_params.get('categories', [''])[0]
 
-        headers, data = self.init_params(gender, category_id, designer, page_num=page_num)
+        headers, data = self.init_params(gender, category_id, designer, page_num=page_num, page_size=page_size)
 
         return data, headers
 
-    def loop_each_catalog_item(self, url: str, total_items: int) -> list:
-        """
-
-        :param total_items:
-        :param url:
-        :return:
+    def loop_each_catalog_item(self, url: str, total_pages: int, page_size: int,
+                               template: dict = None, start_page: int = 2) -> list:
         """
-        products_list = []
-        for i in range(2, math.ceil(total_items/120) + 1):
-            if i != 1:
-                data, headers = self.generate_payload(url, i)
-
-                self.session.post('https://api.mytheresa.com/api', headers=headers, data=data, proxies=self.ipcool_url)
+        并发获取第 start_page 页到最后一页的商品
 
-                response = self.session.json['data']['xProductListingPage']['products']
+        通过连接池复用的异步请求客户端发送，并发数由 [site.mytheresa] 的 page_workers 控制，
+        结果按页码顺序解析；单页在重试后仍失败时记录错误并跳过该页
 
-                url_products = self.parse_inventory_catalog(response)
-                products_list.extend(url_products)
-                self.logger.info(f"获取到 {len(url_products)} 个商品, 第{i}/{math.ceil(total_items/120)}页")
+        :param url: 分类URL
+        :param total_pages: 总页数
+        :param page_size: 每页商品数量
+        :param template: 浏览器捕获的请求模板，提供时按模板回放，否则使用内置的请求参数
+        :param start_page: 起始页码
+        :return: 商品列表
+        """
+        workers = self.site_config.get('page_workers', 4)
+        if self.fetcher is None:
+            self.init_async_fetcher(per_host_limit=workers)
+
+        page_numbers = list(range(start_page, total_pages + 1))
+        request_list = []
+        for page_num in page_numbers:
+            if template:
+                request_list.append(self.build_replay_request(template, page_num))
+                continue
+            data, headers = self.generate_payload(url, page_num, page_size)
+            request_list.append((self.API_URL, {'method': 'POST', 'headers': headers, 'data': data}))
+
+        start_time = time.perf_counter()
+        results = self.fetcher.fetch_many(request_list)
 
+        products_list = []
+        for page_num, result in zip(page_numbers, results):
+            response_json = result.json()
+            if not result.ok or not response_json:
+                self.logger.error(f"获取第{page_num}/{total_pages}页失败: {result.error or result.response.status_code}")
+                continue
+
+            response = response_json['data']['xProductListingPage']['products']
+            url_products = self.parse_inventory_catalog(response)
+            products_list.extend(url_products)
+            self.logger.info(f"获取到 {len(url_products)} 个商品, 第{page_num}/{total_pages}页")
+
+        self.logger.info(f"并发获取 {len(page_numbers)} 页完成，耗时 {time.perf_counter() - start_time:.1f} 秒")
         return products_list
 
     def parse_inventory_catalog(self, catalog_items: dict) -> list:
@@ -342,7 +445,13 @@ class MytheresaMonitor(Monitor):
                         self.logger.warning(f"无法找到商品名称元素，跳过此商品")
                         continue
 
-                    url = 'https://www.mytheresa.com/mo/en/men' + item.get('slug')
+                    slug = item.get('slug')
+                    # 跳过已在其他分页或分类中出现过的商品
+                    if slug in self._seen_slugs:
+                        continue
+                    self._seen_slugs.add(slug)
+
+                    url = 'https://www.mytheresa.com/mo/en/men' + slug
                     
                     # 提取价格信息
                     price = f"{item.get('price').get('currencySymbol')}{item.get('price').get('original') * 0.01}"
@@ -451,73 +560,6 @@ class MytheresaMonitor(Monitor):
             self.logger.error(f"处理商品目录数据时出错: {str(e)}")
             return []
 
-    def loop_through_button(self, tab, show_more_button, products_list):
-        """
-        循环点击"Show more"按钮获取更多商品
-        :param tab: 浏览器标签页
-        :param show_more_button: "Show more"按钮元素
-        :param products_list: 产品列表，用于累积结果
-        :return: 无返回值，直接修改传入的products_list
-        """
-        # 判断是否存在"Show more"按钮
-        if show_more_button:
-            try:
-                # 检查已浏览产品和总产品数量信息
-                show_info = tab.ele('x://div[@class="loadmore__info"]')
-                if show_info:
-                    info_text = show_info.text
-                    self.logger.debug(f"显示信息: {info_text}")
-                    
-                    # 解析 "You've viewed X out of Y products" 格式的文本
-                    import re
-                    match = re.search(r"You've viewed (\d+) out of (\d+) products", info_text)
-                    if match:
-                        viewed = int(match.group(1))
-                        total = int(match.group(2))
-                        self.logger.info(f"已浏览 {viewed}/{total} 个商品")
-                        
-                        # 如果已经浏览了所有商品，不再点击加载更多
-                        if viewed >= total:
-                            self.logger.info(f"已加载所有 {total} 个商品，停止加载更多")
-                            return
-                
-                # 开始监听API请求
-                tab.listen.start('api.mytheresa.com/api')
-                
-                # 点击"Show more"按钮加载更多商品
-                self.logger.debug("点击 Show more 按钮加载更多商品")
-                show_more_button.click(by_js=True)
-                
-                # 等待API响应
-                data_json = tab.listen.wait().response.body
-                tab.listen.stop()
-                
-                # 获取监听数据中的商品列表
-                catalog_items = data_json.get('data', {}).get('xProductListingPage', {}).get('products', [])
-                
-                # 解析并添加新获取的商品数据
-                new_products = self.parse_inventory_catalog(catalog_items)
-                products_list.extend(new_products)
-                self.logger.debug(f"加载了额外的 {len(new_products)} 个商品，当前总数: {len(products_list)}")
-                
-                # 检查按钮是否仍然可见（是否还有更多商品可加载）
-                # 重新获取按钮元素，因为DOM可能已更新
-                show_more_button = tab.ele('@text():Show more')
-                
-                # 设置递归深度限制，防止无限递归
-                # 使用全局变量或类属性跟踪递归深度可能更好
-                if len(products_list) > 150:
-                    self.logger.warning("达到最大产品数量限制，停止加载更多")
-                    return
-
-                time.sleep(7.5)
-                # 递归调用继续加载更多商品
-                self.loop_through_button(tab, show_more_button, products_list)
-            except Exception as e:
-                self.logger.error(f"点击'Show more'按钮或处理响应时出错: {str(e)}")
-        else:
-            self.logger.info("没有更多商品可加载或'Show more'按钮不可见")
-
 
 if __name__ == '__main__':
     # 创建监控实例并运行
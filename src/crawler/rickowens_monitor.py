@@ -3,8 +3,8 @@ RickOwens监控模块 - 负责监控RickOwens网站上Balenciaga鞋子的库存
 该模块实现了对RickOwens网站的爬取、解析和数据保存功能
 """
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 
+from src.utils.html_extractor import ExtractionSpec
 from src.common.monitor import Monitor
 
 
@@ -16,6 +16,16 @@ class RickOwensMonitor(Monitor):
     负责爬取RickOwens网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card='//article[@class="product"]',
+        fields={
+            "name": './/div[@class="brand-name"]',
+            "url": './/a[@itemprop="url"]/@href',
+            "price": './/strong',
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化RickOwens监控器
@@ -31,7 +41,12 @@ class RickOwensMonitor(Monitor):
         self.page = self.init_page()
         # self.session = self.init_session()
 
-        self.headers = self.init_params()
+        # 初始化失败时归还已租用的浏览器，避免浏览器池名额被一直占用
+        try:
+            self.headers = self.init_params()
+        except Exception:
+            self.release_page(healthy=True)
+            raise
 
     @staticmethod
     def init_params():
@@ -116,7 +131,7 @@ class RickOwensMonitor(Monitor):
         """
         获取商品目录
 
-        从sugar网站获取Balenciaga鞋子的商品列表
+        所有分类页在同一个浏览器的多个标签页中并行加载，等待商品元素出现后各取一次HTML快照解析
 
         返回:
             list: 商品信息列表，每个元素为包含name和url的字典
@@ -124,21 +139,20 @@ class RickOwensMonitor(Monitor):
 
         products_list: list[dict] = []
         try:
-            for url in self.catalog_url:
-                tab = self.page.new_tab()
-                tab.get(url)
-                self.page.get_tab(-1).close()
+            snapshots = self.fetch_pages_in_tabs(self.catalog_url, wait_locator='x://article[@class="product"]')
 
-                self.logger.info(f"正在获取商品目录: {url}")
+            for url in self.catalog_url:
+                self.logger.info(f"正在解析商品目录: {url}")
+                html = snapshots.get(url, "")
 
                 # 检查页面响应
-                if not tab.html.strip():
+                if not html.strip():
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
                 # 尝试查找商品元素
                 try:
-                    data = tab.s_eles('x://article[@class="product"]')
+                    data = self.CATALOG_SPEC.extract(html, base_url=url)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -164,12 +178,12 @@ class RickOwensMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -178,38 +192,27 @@ class RickOwensMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('x://div[@class="brand-name"]')
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('x://a[@itemprop="url"]')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('x://strong')
-                    price = price_ele.text if price_ele else ""
+                    name = item["name"]
+                    url = item["url"]
+                    price = item["price"]
 
                     sizes_dict = {}
 
                     if name and url:
-                        # 修正URL格式
-                        full_url = f"https://antonioli.eu{url}" if not url.startswith('http') else url
-
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
-                        if full_url in self.product_url:
+                        if url in self.product_url:
                             key_monitoring = True
-                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {full_url}")
+                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {url}")
                         else:
                             key_monitoring = False
 
                         product_info = {
                             "name": unique_key,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": sizes_dict,
                             "key_monitoring": key_monitoring
@@ -218,7 +221,7 @@ class RickOwensMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -3,8 +3,8 @@ Sugar监控模块 - 负责监控Sugar网站上Balenciaga鞋子的库存状态
 该模块实现了对Sugar网站的爬取、解析和数据保存功能
 """
 from datetime import datetime
-from DrissionPage._elements.session_element import SessionElement
 
+from src.utils.html_extractor import ExtractionSpec, FieldSpec
 from src.common.monitor import Monitor
 
 
@@ -16,6 +16,17 @@ class SugarMonitor(Monitor):
     负责爬取Sugar网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品目录页提取规则，XPath 在类定义时编译一次
+    CATALOG_SPEC = ExtractionSpec(
+        card="//*[contains(@class, 'product__wrapper')]",
+        fields={
+            "name": ".//*[contains(@class, 'product__name')]",
+            "url": './/a/@href',
+            "price": ".//*[contains(@class, 'product__price')]",
+            "sizes": FieldSpec("(.//*[contains(@class, 'product__sizes')])[1]//*[starts-with(@class, 'field-size field-size--fake')]", many=True),
+        },
+    )
+
     def __init__(self, **kwargs):
         """
         初始化Cettire监控器
@@ -133,9 +144,16 @@ class SugarMonitor(Monitor):
                     self.logger.error("获取页面失败：页面响应为空")
                     return []
 
+                # 目录页未变化时直接复用上次的解析结果
+                cached_catalog = self.load_cached_catalog(url, self.session.response)
+                if cached_catalog is not None:
+                    products_list += cached_catalog
+                    continue
+
                 # 尝试查找商品元素
                 try:
-                    data = self.session.s_eles('@class:product__wrapper')
+                    data = self.CATALOG_SPEC.extract(self.session.response.content, base_url=self.session.response.url,
+                                                     encoding=self.session.response.encoding)
 
                     if not data:
                         self.logger.error("未找到任何商品列表元素")
@@ -147,6 +165,7 @@ class SugarMonitor(Monitor):
 
                     if inventory_catalog_data:
                         products_list += inventory_catalog_data
+                        self.save_cached_catalog(url, inventory_catalog_data)
                     else:
                         self.logger.error("解析商品目录失败")
                         return []
@@ -161,12 +180,12 @@ class SugarMonitor(Monitor):
             self.logger.error(f"获取商品目录过程中出错: {str(e)}")
             return []
 
-    def parse_inventory_catalog(self, catalog_eles: list[SessionElement]) -> list[dict]:
+    def parse_inventory_catalog(self, catalog_records: list[dict]) -> list[dict]:
         """
-        解析商品目录HTML数据，提取关键商品信息
+        解析商品目录数据，提取关键商品信息
         
         参数:
-            catalog_eles (element): 包含商品目录的element数据
+            catalog_records (list[dict]): CATALOG_SPEC 从目录页提取的商品卡片字段
         
         返回:
             list: 商品信息列表，每个元素为包含商品详细信息的字典
@@ -175,53 +194,30 @@ class SugarMonitor(Monitor):
             products_list = []
 
             # 提取每个商品的名称和URL
-            for i, item in enumerate(catalog_eles):
+            for item in catalog_records:
                 try:
-                    # 尝试多种选择器找到商品名称
-                    name_ele = item.s_ele('@class:product__name')
-                    # 如果无法找到名称，记录警告并尝试下一个元素
-                    if not name_ele:
-                        # 替换新的catalog_eles
-                        catalog_eles = self.session.s_eles('@class^product__wrapper')
-                        item = catalog_eles[i]
-                        name_ele = item.s_ele('@class:product__name')
-                        if not name_ele:
-                            self.logger.warning(f"无法找到商品名称元素，跳过此商品")
-                            continue
-
-                    name = name_ele.text
-
-                    # 尝试多种选择器找到URL
-                    url_ele = item.s_ele('x://a')
-                    url = url_ele.attr('href')
-
-                    # 尝试多种选择器找到价格
-                    price_ele = item.s_ele('@class:product__price')
-                    price = price_ele.text if price_ele else ""
-
-                    sizes_eles = item.s_ele('@class:product__sizes').s_eles('@class^field-size field-size--fake')
-                    sizes_dict = {}
-                    for size_item in sizes_eles:
-                        size_label = size_item.text
-                        if size_label:
-                            sizes_dict[size_label] = "available"
+                    name = item["name"]
+                    if not name:
+                        self.logger.warning(f"无法找到商品名称元素，跳过此商品")
+                        continue
 
-                    if name and url:
-                        # 修正URL格式
-                        full_url = f"https://www.sugar.it{url}" if not url.startswith('http') else url
+                    url = item["url"]
+                    price = item["price"]
+                    sizes_dict = {size_label: "available" for size_label in item["sizes"]}
 
+                    if name and url:
                         url_parts = url.rstrip('/').split('/')
                         unique_key = f"{name}_{url_parts[-1]}"
 
-                        if full_url in self.product_url:
+                        if url in self.product_url:
                             key_monitoring = True
-                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {full_url}")
+                            self.logger.info(f"已获取重点检测对象信息: {name}, URL: {url}")
                         else:
                             key_monitoring = False
 
                         product_info = {
                             "name": name,
-                            "url": full_url,
+                            "url": url,
                             "price": price,
                             "inventory": sizes_dict,
                             "key_monitoring": key_monitoring
@@ -230,7 +226,7 @@ class SugarMonitor(Monitor):
 
                         products_list.append(product_info)
 
-                        self.logger.debug(f"找到商品: {name}, URL: {full_url}")
+                        self.logger.debug(f"找到商品: {name}, URL: {url}")
                 except Exception as e:
                     self.logger.warning(f"解析单个商品时出错: {str(e)}")
                     continue
@@ -2,10 +2,16 @@
 SUUS监控模块 - 负责监控SUUS网站上Balenciaga鞋子的库存状态
 该模块实现了对SUUS网站的爬取、解析和数据保存功能
 """
+import re
+import json
+import threading
 import time
 from datetime import datetime
 
+from lxml import etree
+
 from src.utils.page_setting import *
+from src.utils.html_extractor import html_parser
 from src.common.monitor import Monitor
 
 
@@ -16,6 +22,17 @@ class SuusMonitor(Monitor):
     负责爬取Suus网站上Balenciaga品牌鞋子的商品列表和库存信息
     """
 
+    # 商品详情页的解析规则，直接作用于会话请求返回的原始HTML
+    NAME_XPATH = etree.XPath('//*[@class="heading-text el-text"]/h1')
+    VARIATIONS_XPATH = etree.XPath('//form[contains(@class, "variations_form")]/@data-product_variations')
+    SIZE_OPTIONS_XPATH = etree.XPath('//*[@class="value"]//option')
+
+    # 反爬验证页面的特征，命中时改用浏览器获取
+    # 普通商品页面也会引入 reCAPTCHA 脚本，captcha 只在页面标题中出现时才视为验证页面
+    CHALLENGE_STATUS_CODES = {403, 429, 503}
+    CHALLENGE_MARKERS = (b"cf-chl", b"challenge-platform", b"Just a moment...", b"Attention Required!")
+    CHALLENGE_TITLE = re.compile(rb"<title[^>]*>[^<]*captcha", re.IGNORECASE)
+
     def __init__(self, **kwargs):
         """
         初始化Suus监控器
@@ -31,6 +48,9 @@ class SuusMonitor(Monitor):
         
         # 初始化浏览器页面
         self.session = self.init_session()
+        # 浏览器只在详情页遇到验证页面时才启动，多个工作线程共用时需要加锁
+        self.page = None
+        self._page_lock = threading.Lock()
 
     @staticmethod
     def _init_params():
@@ -83,6 +103,10 @@ class SuusMonitor(Monitor):
 
             self.logger.info(f"监控开始，共获取到 {len(self.products_list)} 个商品信息")
 
+            # 生成库存数据，[site.suus] 中 fetch_details 开启时才获取商品详情页中的尺码
+            if self.site_config.get('fetch_details', False):
+                self.create_inventory_data()
+
             # 保存库存数据
             if self.inventory_data:
                 # 标准化库存数据
@@ -159,6 +183,9 @@ class SuusMonitor(Monitor):
         """
         获取单个商品的库存信息
 
+        先用会话直接请求商品页面，从原始HTML中解析尺码；
+        只有返回反爬验证页面时才改用浏览器获取
+
         参数:
             url (str): 商品页面URL
 
@@ -167,42 +194,93 @@ class SuusMonitor(Monitor):
         """
         self.logger.debug(f"正在获取商品库存信息: {url}")
         try:
-            # 访问商品页面
-            self.page.get(url)
+            session = self.get_detail_session()
+            # 验证页面重试没有意义，关闭 SessionPage 自带的重试
+            session.get(url, headers=self._init_params(), proxies=self.ipcool_url, retry=0)
+            response = session.response
+
+            if self.is_challenge_page(response):
+                self.logger.warning(f"商品页面返回验证页面，改用浏览器获取: {url}")
+                return self.get_inventory_page_browser(url)
 
-            # 检查页面响应
-            if not self.page.html.strip():
+            if response is None or not response.content.strip():
                 self.logger.error(f"获取商品页面失败: {url}")
                 return {}
 
-            # 获取商品名称
+            good_name, inventory_info = self.parse_inventory_html(response.content, response.encoding)
+            self._log_inventory_info(good_name, inventory_info)
+            return inventory_info
+
+        except Exception as e:
+            self.logger.error(f"获取商品库存信息过程中出错: {str(e)}")
+            return {}
+
+    def get_inventory_page_browser(self, url):
+        """
+        使用浏览器获取单个商品的库存信息，仅在会话请求遇到验证页面时调用
+
+        参数:
+            url (str): 商品页面URL
+
+        返回:
+            dict: 商品的尺码和库存状态信息
+        """
+        with self._page_lock:
             try:
-                good_name_ele = self.page.ele('x://*[@class="heading-text el-text"]/h1')
-                good_name = good_name_ele.text if good_name_ele else "未知商品"
-                self.page.scroll.to_half()
-                random_sleep()
-                self.page.scroll.to_bottom()
+                if self.page is None:
+                    self.page = self.init_page()
+
+                # 访问商品页面
+                self.page.get(url)
+
+                # 检查页面响应
+                if not self.page.html.strip():
+                    self.logger.error(f"获取商品页面失败: {url}")
+                    return {}
+
+                try:
+                    self.page.scroll.to_half()
+                    random_sleep()
+                    self.page.scroll.to_bottom()
+                except Exception as e:
+                    self.logger.warning(f"滚动商品页面失败: {str(e)}")
+
+                # 与会话方式使用同一解析规则，保证两种方式的尺码键一致
+                good_name, inventory_info = self.parse_inventory_html(self.page.html.encode("utf-8"), "utf-8")
                 self.logger.debug(f"商品名称: {good_name}")
-            except Exception as e:
-                self.logger.warning(f"获取商品名称失败: {str(e)}")
-                good_name = "未知商品"
+                self._log_inventory_info(good_name, inventory_info)
+                return inventory_info
 
-            # 解析库存信息
-            inventory_info = self.parse_inventory_info()
+            except Exception as e:
+                self.logger.error(f"使用浏览器获取商品库存信息过程中出错: {str(e)}")
+                return {}
 
-            # 记录库存信息
-            if inventory_info:
-                self.logger.debug(f"商品 '{good_name}' 共有 {len(inventory_info)} 种尺码")
-                for size, availability in inventory_info.items():
-                    self.logger.debug(f"尺码: {size}, 库存状态: {availability}")
-            else:
-                self.logger.warning(f"商品 '{good_name}' 未找到尺码信息")
+    def is_challenge_page(self, response) -> bool:
+        """
+        判断会话请求是否返回了反爬验证页面
 
-            return inventory_info
+        参数:
+            response (requests.Response): 商品页面响应
 
-        except Exception as e:
-            self.logger.error(f"获取商品库存信息过程中出错: {str(e)}")
-            return {}
+        返回:
+            bool: 是否为验证页面
+        """
+        if response is None:
+            return False
+        if response.status_code in self.CHALLENGE_STATUS_CODES:
+            return True
+        # 验证页面的特征都在页面开头，只检查前 16KB
+        head = response.content[:16384]
+        return any(marker in head for marker in self.CHALLENGE_MARKERS) or bool(self.CHALLENGE_TITLE.search(head))
+
+    def _log_inventory_info(self, good_name, inventory_info):
+        """记录单个商品的库存信息"""
+        if inventory_info:
+            self.logger.debug(f"商品 '{good_name}' 共有 {len(inventory_info)} 种尺码")
+            for size, availability in inventory_info.items():
+                self.logger.debug(f"尺码: {size}, 库存状态: {availability}")
+        else:
+            self.logger.warning(f"商品 '{good_name}' 未找到尺码信息")
 
     def parse_inventory_catalog(self, catalog_items):
         """
@@ -269,43 +347,62 @@ class SuusMonitor(Monitor):
             self.logger.error(f"处理商品目录数据时出错: {str(e)}")
             return []
 
-    def parse_inventory_info(self):
+    def parse_inventory_html(self, content, encoding=None):
         """
-        解析商品库存信息
+        从商品页面的原始HTML中解析商品名称和尺码库存
 
-        从商品页面的尺码元素中提取尺码和库存状态
+        优先使用 WooCommerce 嵌入在 variations_form 中的变体JSON（包含每个尺码的库存状态），
+        变体过多时 WooCommerce 不嵌入JSON（值为 false），此时退回读取尺码下拉框的 option；
+        会话和浏览器两种方式都使用本方法，结果只包含有货的数字尺码，尺码使用下拉框中显示的名称，
+        同一商品不会因获取方式不同而产生不同的尺码键
+
+        参数:
+            content (bytes): 商品页面内容
+            encoding (str, optional): 页面编码（响应编码），为空时由 lxml 根据 <meta charset> 检测
 
         返回:
-            dict: 尺码和库存状态的字典，格式为 {尺码: 库存状态}
+            tuple: (商品名称, {尺码: 库存状态})
         """
-        inventory_info = {}
-
-        try:
-            # 获取所有尺码元素
-            size_items = self.page.eles('x://*[@class="value"]//option')
-
-            if not size_items:
-                self.logger.warning("未找到尺码元素")
-                return inventory_info
-
-            # 遍历每个尺码元素，提取尺码和库存状态
-            for item in size_items:
-                try:
-                    label = item.text
-                    if not label:
+        root = etree.fromstring(content, html_parser(encoding))
+        if root is None:
+            return "未知商品", {}
+
+        name_eles = self.NAME_XPATH(root)
+        good_name = " ".join("".join(name_eles[0].itertext()).split()) if name_eles else "未知商品"
+
+        # 下拉框 option 的 value 是变体JSON中的属性值（slug），文本是显示的尺码名称
+        option_labels = {}
+        for option in self.SIZE_OPTIONS_XPATH(root):
+            label = "".join(option.itertext()).strip()
+            if label.isdigit():
+                option_labels[option.get("value", label)] = label
+
+        variations = self.VARIATIONS_XPATH(root)
+        if variations and variations[0] not in ("", "false"):
+            try:
+                variation_list = json.loads(variations[0])
+            except ValueError as e:
+                self.logger.warning(f"解析商品变体JSON失败: {str(e)}")
+                variation_list = []
+
+            inventory_info = {}
+            found_size = False
+            for variation in variation_list:
+                for attribute, slug in variation.get("attributes", {}).items():
+                    if "size" not in attribute and "taglia" not in attribute:
                         continue
-
-                    if label.isdigit():
+                    slug = str(slug).strip()
+                    label = option_labels.get(slug, slug)
+                    if not label.isdigit():
+                        continue
+                    found_size = True
+                    if variation.get("is_in_stock"):
                         inventory_info[label] = 'available'
-                except Exception as e:
-                    self.logger.warning(f"处理单个尺码元素时出错: {str(e)}")
-                    continue
+            if found_size:
+                return good_name, inventory_info
 
-            return inventory_info
-
-        except Exception as e:
-            self.logger.error(f"解析库存信息时出错: {str(e)}")
-            return inventory_info
+        # 没有变体JSON时只能读取下拉框：只保留数字尺码，出现在下拉框中即视为有货
+        return good_name, {label: 'available' for label in option_labels.values()}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,311 @@
+"""
+通知去重索引
+按 (网站, 商品标识, 事件类型) 记录最近一次发送通知的时间，TTL 内同一事件不再重复通知，
+用于过滤反复上下架的"新增"商品和反复补货/改价的重点商品
+
+内存中使用 OrderedDict 做 O(1) 查询和 LRU 淘汰，同时写入 SQLite，调度器重启后从数据库恢复；
+命中时刷新的访问时间在每次 filter_changes 结束时批量写入数据库，重启后按最近访问时间恢复 LRU 顺序
+
+事件只在消息发送成功后记录（record_events）；已加入通知、尚未发送完成的事件先挂起（hold），
+挂起期间同一事件不会重复加入通知，消息最终发送失败时释放（release），之后的周期会重新通知
+
+表结构:
+- alert_dedup: 每个事件最近一次通知的时间和最近一次访问的时间
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class AlertDedupIndex:
+    """
+    带 TTL 和 LRU 淘汰的通知去重索引
+
+    事件类型:
+    - new: 新增商品
+    - size:<尺码>:<状态>: 重点商品某个尺码变为某个状态（如补货、售罄）
+    - price:<价格>: 重点商品价格变为某个价格
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS alert_dedup (
+        site TEXT NOT NULL,
+        product_key TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        alerted_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (site, product_key, event_type)
+    );
+    CREATE INDEX IF NOT EXISTS idx_alert_dedup_last_used ON alert_dedup (last_used);
+    """
+
+    EVENT_NEW = "new"
+    EVENT_SIZE = "size"
+    EVENT_PRICE = "price"
+
+    def __init__(self, db_path, ttl_hours=24, event_ttl_hours=None, max_entries=50000, timeout=30):
+        """
+        Args:
+            db_path (str): SQLite 数据库文件路径
+            ttl_hours (float): 默认TTL（小时），同一事件在TTL内只通知一次
+            event_ttl_hours (dict, optional): 按事件类别（new / size / price）覆盖的TTL（小时）
+            max_entries (int): 索引中最多保留的事件数，超过时淘汰最久未访问的事件
+            timeout (int): 数据库被锁定时的等待时间（秒）
+        """
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.event_ttl_seconds = {event: float(hours) * 3600 for event, hours in (event_ttl_hours or {}).items()}
+        self.max_entries = max(1, int(max_entries))
+        # {(网站, 商品标识, 事件类型): 通知时间}，按访问顺序排列，最久未访问的在前
+        self._entries = OrderedDict()
+        # 已加入通知、尚未发送完成的事件 {(网站, 商品标识, 事件类型): 挂起次数}，只保存在内存中
+        self._pending = {}
+        # 命中后尚未写入数据库的访问时间 {(网站, 商品标识, 事件类型): 访问时间}
+        self._touched = {}
+        # 发件箱后台线程在消息发送完成后记录/释放事件，与调度线程的查询共用一把锁
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        self._load()
+
+    @contextmanager
+    def _connect(self):
+        """创建数据库短连接，退出时提交事务（异常时回滚）并关闭连接"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self):
+        """从数据库加载未过期的事件，删除已过期和超出容量的事件"""
+        now = time.time()
+        max_ttl = max([self.ttl_seconds, *self.event_ttl_seconds.values()])
+        with self._connect() as conn:
+            conn.execute("DELETE FROM alert_dedup WHERE alerted_at < ?", (now - max_ttl,))
+            rows = conn.execute(
+                "SELECT site, product_key, event_type, alerted_at FROM alert_dedup "
+                "ORDER BY last_used DESC LIMIT ?", (self.max_entries,)
+            ).fetchall()
+            conn.execute(
+                "DELETE FROM alert_dedup WHERE rowid NOT IN "
+                "(SELECT rowid FROM alert_dedup ORDER BY last_used DESC LIMIT ?)", (self.max_entries,)
+            )
+        for site, product_key, event_type, alerted_at in reversed(rows):
+            if not self._expired(event_type, alerted_at, now):
+                self._entries[(site, product_key, event_type)] = alerted_at
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ttl_of(self, event_type):
+        return self.event_ttl_seconds.get(event_type.split(":", 1)[0], self.ttl_seconds)
+
+    def _expired(self, event_type, alerted_at, now):
+        return now - alerted_at >= self._ttl_of(event_type)
+
+    def is_duplicate(self, site, product_key, event_type, now=None):
+        """
+        判断事件是否在TTL内已经通知过或正在等待发送，命中时刷新其LRU位置
+
+        Returns:
+            bool: True 表示TTL内已通知过或正在等待发送，应跳过
+        """
+        with self._lock:
+            key = (site, str(product_key), event_type)
+            if key in self._pending:
+                return True
+            alerted_at = self._entries.get(key)
+            if alerted_at is None:
+                return False
+            now = time.time() if now is None else now
+            if self._expired(event_type, alerted_at, now):
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            self._touched[key] = now
+            return True
+
+    def _persist_touched(self):
+        """把命中时刷新的访问时间批量写入数据库"""
+        if not self._touched:
+            return
+        rows = [(last_used, *key) for key, last_used in self._touched.items()]
+        self._touched = {}
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE alert_dedup SET last_used = ? WHERE site = ? AND product_key = ? AND event_type = ?", rows
+            )
+
+    def record(self, site, events, now=None):
+        """
+        记录已通知的事件
+
+        Args:
+            site (str): 网站名称
+            events (list[tuple]): [(商品标识, 事件类型), ...]
+        """
+        with self._lock:
+            if not events:
+                return
+            now = time.time() if now is None else now
+            rows = []
+            for product_key, event_type in events:
+                key = (site, str(product_key), event_type)
+                self._entries[key] = now
+                self._entries.move_to_end(key)
+                rows.append((site, str(product_key), event_type, now, now))
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted_key = self._entries.popitem(last=False)[0]
+                self._touched.pop(evicted_key, None)
+                evicted.append(evicted_key)
+
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO alert_dedup (site, product_key, event_type, alerted_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)", rows
+                )
+                if evicted:
+                    conn.executemany(
+                        "DELETE FROM alert_dedup WHERE site = ? AND product_key = ? AND event_type = ?", evicted
+                    )
+
+    @staticmethod
+    def product_key(product):
+        """商品标识：对比引擎补充的 id 字段，没有时使用名称"""
+        return product.get("id") or product.get("name", "")
+
+    def filter_changes(self, site, changes):
+        """
+        过滤TTL内已通知过的新增商品和重点商品变化，不修改原对比结果
+
+        Args:
+            site (str): 网站名称
+            changes (dict): 对比引擎返回的变化信息
+
+        Returns:
+            tuple: (过滤后的变化信息, 被跳过的事件数量)
+        """
+        with self._lock:
+            now = time.time()
+            skipped = 0
+            filtered = dict(changes)
+
+            new_products = []
+            for product in changes.get("new_products", []):
+                if self.is_duplicate(site, self.product_key(product), self.EVENT_NEW, now):
+                    skipped += 1
+                else:
+                    new_products.append(product)
+            filtered["new_products"] = new_products
+
+            key_product_changes = []
+            for product in changes.get("key_product_changes", []):
+                product_key = self.product_key(product)
+                price_change = product.get("price_change")
+                if price_change and self.is_duplicate(site, product_key, self._price_event(price_change), now):
+                    skipped += 1
+                    price_change = None
+                size_changes = []
+                for change in product.get("size_changes", []):
+                    if self.is_duplicate(site, product_key, self._size_event(change), now):
+                        skipped += 1
+                    else:
+                        size_changes.append(change)
+                if price_change or size_changes:
+                    item = dict(product)
+                    item["price_change"] = price_change
+                    item["size_changes"] = size_changes
+                    key_product_changes.append(item)
+            filtered["key_product_changes"] = key_product_changes
+
+            self._persist_touched()
+            return filtered, skipped
+
+    def change_events(self, site, new_products=None, key_product_changes=None):
+        """
+        新增商品和重点商品变化对应的事件
+
+        Returns:
+            list[list]: [[网站, 商品标识, 事件类型], ...]，可以直接保存为JSON
+        """
+        events = [[site, str(self.product_key(product)), self.EVENT_NEW] for product in new_products or []]
+        for product in key_product_changes or []:
+            product_key = str(self.product_key(product))
+            if product.get("price_change"):
+                events.append([site, product_key, self._price_event(product["price_change"])])
+            for change in product.get("size_changes", []):
+                events.append([site, product_key, self._size_event(change)])
+        return events
+
+    def record_changes(self, site, new_products=None, key_product_changes=None):
+        """记录已通知的新增商品和重点商品变化"""
+        self.record_events(self.change_events(site, new_products, key_product_changes))
+
+    def hold(self, events):
+        """挂起已加入通知、尚未发送完成的事件（change_events 的结果）"""
+        with self._lock:
+            for site, product_key, event_type in events or []:
+                key = (site, str(product_key), event_type)
+                self._pending[key] = self._pending.get(key, 0) + 1
+
+    def release(self, events):
+        """释放挂起的事件，发送失败的事件之后可以重新通知"""
+        with self._lock:
+            for site, product_key, event_type in events or []:
+                key = (site, str(product_key), event_type)
+                count = self._pending.get(key, 0) - 1
+                if count > 0:
+                    self._pending[key] = count
+                else:
+                    self._pending.pop(key, None)
+
+    def record_events(self, events):
+        """
+        记录发送成功的事件并释放其挂起状态
+
+        Args:
+            events (list): change_events 的结果 [[网站, 商品标识, 事件类型], ...]
+        """
+        with self._lock:
+            if not events:
+                return
+            self.release(events)
+            by_site = {}
+            for site, product_key, event_type in events:
+                by_site.setdefault(site, []).append((product_key, event_type))
+            for site, site_events in by_site.items():
+                self.record(site, site_events)
+
+    def _price_event(self, price_change):
+        return f"{self.EVENT_PRICE}:{price_change.get('to', '')}"
+
+    def _size_event(self, change):
+        return f"{self.EVENT_SIZE}:{change.get('size', '')}:{change.get('to', '')}"
+
+    def prune(self):
+        """删除已过期的事件，返回删除数量"""
+        with self._lock:
+            now = time.time()
+            expired = [key for key, alerted_at in self._entries.items() if self._expired(key[2], alerted_at, now)]
+            for key in expired:
+                del self._entries[key]
+                self._touched.pop(key, None)
+            self._persist_touched()
+            if expired:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "DELETE FROM alert_dedup WHERE site = ? AND product_key = ? AND event_type = ?", expired
+                    )
+            return len(expired)
@@ -0,0 +1,182 @@
+"""
+钉钉通知合并与分段
+各网站的库存变化先按机器人（webhook + 密钥）暂存，在合并窗口内发往同一机器人的多个网站合并为一条消息；
+消息正文按钉钉接口的字节上限分段，超出上限的网站段落在下一条消息中以"（续）"继续；
+每个商品条目可以附带通知去重事件，事件随包含该条目的消息一起交给 send_func，由发送结果决定是否记录
+"""
+import time
+import threading
+
+
+class MarkdownBuilder:
+    """
+    缓冲式 markdown 构建器
+
+    片段追加到列表中，最后一次性 join，同时累计 UTF-8 字节数，用于判断是否超出消息大小上限
+    """
+
+    def __init__(self):
+        self._parts = []
+        self.byte_size = 0
+
+    def append(self, text):
+        self._parts.append(text)
+        self.byte_size += len(text.encode("utf-8"))
+        return self
+
+    def build(self):
+        return "".join(self._parts)
+
+    def __bool__(self):
+        return bool(self._parts)
+
+
+class NotificationComposer:
+    """
+    钉钉通知合并器
+
+    add 只暂存网站段落；flush 把等待时间超过 window_seconds 的机器人的所有段落合并、分段后交给 send_func 发送，
+    同时传入该条消息包含的条目的通知去重事件
+    """
+
+    # 钉钉自定义机器人单条消息上限为 20000 字节，留出标题和JSON结构的余量
+    DEFAULT_MAX_BYTES = 18000
+    SECTION_SEPARATOR = "\n\n---\n\n"
+
+    def __init__(self, send_func, window_seconds=30, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            send_func (callable): send_func(webhook_url, secret, message, alerts) -> 钉钉API响应字典，
+                                  alerts 为该条消息包含的条目的事件列表
+            window_seconds (float): 合并窗口（秒），同一机器人第一个段落加入后等待多久再发送
+            max_bytes (int): 单条消息正文的最大 UTF-8 字节数
+        """
+        self.send_func = send_func
+        self.window_seconds = float(window_seconds)
+        self.max_bytes = max(1000, int(max_bytes))
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, webhook_url, secret, site, title, header, entries, entry_alerts=None):
+        """
+        暂存一个网站段落
+
+        Args:
+            webhook_url (str): 钉钉机器人的webhook URL
+            secret (str): 钉钉机器人的加签密钥
+            site (str): 网站名称，用于续段标题和合并消息的标题
+            title (str): 单独发送时的消息标题
+            header (str): 段落头部（网站名称、数量、时间等）
+            entries (list[str]): 段落中的商品条目，分段时不会拆开单个条目
+            entry_alerts (list[list], optional): 与 entries 一一对应的通知去重事件列表
+        """
+        with self._lock:
+            group = self._pending.setdefault((webhook_url, secret), {"first_at": time.monotonic(), "sections": []})
+            group["sections"].append({"site": site, "title": title, "header": header, "entries": list(entries),
+                                      "entry_alerts": list(entry_alerts or [])})
+
+    def pending_count(self):
+        """暂存的网站段落数量"""
+        with self._lock:
+            return sum(len(group["sections"]) for group in self._pending.values())
+
+    def flush(self, force=False):
+        """
+        发送合并窗口已到期的所有机器人的消息
+
+        Args:
+            force (bool): 是否忽略合并窗口立即发送所有暂存的段落
+
+        Returns:
+            list[dict]: 每条消息的发送结果
+        """
+        now = time.monotonic()
+        with self._lock:
+            due_keys = [key for key, group in self._pending.items()
+                        if force or now - group["first_at"] >= self.window_seconds]
+            due_groups = [(key, self._pending.pop(key)["sections"]) for key in due_keys]
+
+        results = []
+        for (webhook_url, secret), sections in due_groups:
+            for message, alerts in self._compose(sections):
+                results.append(self.send_func(webhook_url, secret, message, alerts))
+        return results
+
+    def compose(self, sections):
+        """
+        把多个网站段落合并、分段为钉钉 markdown 消息
+
+        Returns:
+            list[dict]: 消息列表，每条包含 title 和 text
+        """
+        return [message for message, _ in self._compose(sections)]
+
+    def _compose(self, sections):
+        """
+        合并、分段网站段落，同时收集每条消息包含的条目的通知去重事件
+
+        Returns:
+            list[tuple]: [(消息, 事件列表), ...]
+        """
+        messages = []
+        builder = MarkdownBuilder()
+        message_sections = []
+        message_alerts = []
+
+        def finish():
+            if builder:
+                messages.append(({"title": self._make_title(message_sections), "text": builder.build()},
+                                 message_alerts))
+
+        for section in sections:
+            header = section["header"]
+            entries = section["entries"]
+            entry_alerts = section.get("entry_alerts") or []
+            first_size = self._byte_size(self.SECTION_SEPARATOR + header + (entries[0] if entries else ""))
+            if builder and builder.byte_size + first_size > self.max_bytes:
+                finish()
+                builder, message_sections, message_alerts = MarkdownBuilder(), [], []
+
+            if builder:
+                builder.append(self.SECTION_SEPARATOR)
+            builder.append(header)
+            message_sections.append(section)
+
+            section_entries = 0
+            for index, entry in enumerate(entries):
+                entry_size = self._byte_size(entry)
+                if builder.byte_size + entry_size > self.max_bytes and section_entries:
+                    finish()
+                    builder, message_sections, message_alerts = MarkdownBuilder(), [section], []
+                    builder.append(f"## {section['site']}（续）\n\n")
+                if builder.byte_size + entry_size > self.max_bytes:
+                    # 单个条目超过整条消息的上限时截断
+                    entry = self._truncate(entry, self.max_bytes - builder.byte_size)
+                builder.append(entry)
+                if index < len(entry_alerts):
+                    message_alerts.extend(entry_alerts[index])
+                section_entries += 1
+
+        finish()
+        return messages
+
+    @staticmethod
+    def _make_title(sections):
+        """只有一个网站时沿用原标题，多个网站合并时标题列出所有网站"""
+        if len(sections) == 1:
+            return sections[0]["title"]
+        sites = list(dict.fromkeys(section["site"] for section in sections))
+        return f"库存变化通知: {'、'.join(sites)}"
+
+    @staticmethod
+    def _byte_size(text):
+        return len(text.encode("utf-8"))
+
+    @staticmethod
+    def _truncate(text, max_bytes):
+        """按 UTF-8 字节数截断，不截断多字节字符"""
+        suffix = "..."
+        encoded = text.encode("utf-8")
+        if len(encoded) <= max_bytes:
+            return text
+        return encoded[:max(0, max_bytes - len(suffix))].decode("utf-8", errors="ignore") + suffix
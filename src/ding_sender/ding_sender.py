@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 import hmac
@@ -14,20 +15,56 @@ import traceback
 
 from src.common.project_path import ProjectPaths
 from src.common.logger import get_logger
+from src.common.diff_engine import InventoryDiffEngine
+from src.common.product_identity import ProductIdResolver
 
 
 class DingSender:
     """
     钉钉消息自动发送类
     """
-    def __init__(self, ding_url, ding_secret, ding_token):
+    def __init__(self, ding_url, ding_secret, ding_token, pool_maxsize=4, timeout=10):
+        """
+        Args:
+            ding_url: 默认的钉钉机器人webhook URL
+            ding_secret: 默认的钉钉机器人加签密钥
+            ding_token: 保留参数，不再使用
+            pool_maxsize: 连接池中保持的最大长连接数，即同时发送消息的最大请求数
+            timeout: 单次请求超时时间（秒）
+        """
         self.ding_url = ding_url
         self.ding_secret = ding_secret
         self.ding_token = ding_token
         self.logger = get_logger(__name__)
         self.ding_headers = {
             'Content-Type': 'application/json',
+            'Charset': 'UTF-8'
         }
+        self.timeout = timeout
+        # 所有网站的机器人共用一个会话，发送到钉钉API的请求复用长连接，不再每条消息重新建立 TCP/TLS 连接
+        self.session = self._create_session(pool_maxsize)
+        # 每个网站的增量对比引擎，在多个调度周期之间保留对比状态
+        self.diff_engines = {}
+
+    def _create_session(self, pool_maxsize):
+        """
+        创建发送钉钉消息的会话
+
+        所有机器人的 webhook 都在 oapi.dingtalk.com 上，只需要一个域名连接池；
+        不读取环境变量中的代理设置（与原来每次请求传入 proxies=None 一致），也不在连接层重试，
+        失败重试由发件箱按指数退避处理
+        """
+        session = requests.Session()
+        session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_maxsize)), max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.ding_headers)
+        return session
+
+    def close(self):
+        """关闭会话，释放连接池中的长连接"""
+        self.session.close()
 
     @staticmethod
     def _read_json_file(file_path: str) -> json:
@@ -195,6 +232,37 @@ class DingSender:
                     
         return False
 
+    @staticmethod
+    def create_diff_engine(site=None, store=None):
+        """
+        创建钉钉通知使用的库存对比引擎
+        按商品稳定标识（ProductIdResolver）对比，使用最近3次快照作为历史窗口防止误报，只检测重点商品的价格变化并过滤货币转换
+
+        Args:
+            site: 网站名称，用于选择网站专用的商品ID提取规则
+            store: 商品状态存储（InventoryStore），与监控器共享冲突过的商品标识
+        """
+        return InventoryDiffEngine(
+            id_resolver=ProductIdResolver(site, store=store),
+            history_size=3,
+            suspicious_ratio=0.3,
+            price_mode="key_filtered",
+            separate_key_products=True,
+            price_filter=DingSender._is_currency_conversion_change,
+        )
+
+    def get_diff_engine(self, site, store=None):
+        """
+        获取网站对应的增量对比引擎，不存在时创建
+
+        Args:
+            site: 网站名称
+            store: 商品状态存储（InventoryStore），与监控器共享冲突过的商品标识
+        """
+        if site not in self.diff_engines:
+            self.diff_engines[site] = self.create_diff_engine(site, store=store)
+        return self.diff_engines[site]
+
     @staticmethod
     def compare_inventory(current_data, previous_data, historical_data_list=None):
         """
@@ -202,346 +270,17 @@ class DingSender:
         支持两种数据格式:
         1. 带products字段的格式 (原有格式)
         2. 键值对直接存储商品信息的格式 (新格式)
-        
+
+        每次调用都会用历史数据重新初始化对比引擎，需要跨周期复用对比状态时请使用 get_diff_engine
+
         Args:
             current_data: 当前库存数据
             previous_data: 上一次库存数据
-            historical_data_list: 最近几次的历史库存数据列表，用于防止误报
+            historical_data_list: 最近几次的历史库存数据列表（从新到旧，通常包含上一次数据），用于防止误报
         """
-        changes = {
-            "new_products": [],  # 新增产品
-            "removed_products": [],  # 移除产品
-            "inventory_changes": [],  # 库存变化
-            "key_product_changes": []  # 重点监控商品的价格或尺寸变化
-        }
-
-        if not previous_data:
-            # 如果没有上一次数据，则当前所有产品都视为新增
-            if "products" in current_data:
-                # 原有格式
-                changes["new_products"] = current_data.get("products", [])
-            else:
-                # 新格式: 将键值对转换为产品列表
-                for key, product in current_data.items():
-                    # 跳过非商品字段
-                    if key in ["monitor", "timestamp"]:
-                        continue
-                    changes["new_products"].append(product)
-            return changes
-
-        # 处理原有格式的数据 (带products字段)
-        if "products" in current_data or "products" in previous_data:
-            current_products = {p.get("name"): p for p in current_data.get("products", [])}
-            previous_products = {p.get("name"): p for p in previous_data.get("products", [])}
-        else:
-            # 处理新格式的数据 (键值对直接存储商品信息)
-            current_products = {}
-            previous_products = {}
-            
-            # 提取当前商品数据
-            for key, product in current_data.items():
-                if key in ["monitor", "timestamp"]:
-                    continue
-                product_name = product.get("name", key)
-                current_products[product_name] = product
-                
-            # 提取上一次商品数据
-            for key, product in previous_data.items():
-                if key in ["monitor", "timestamp"]:
-                    continue
-                product_name = product.get("name", key)
-                previous_products[product_name] = product
-
-        # 处理历史数据，构建历史商品库存记录
-        historical_products = {}  # {商品名称: [历史记录1, 历史记录2, ...]}
-        historical_key_products_values = {}  # {商品名称: {价格: [历史价格列表], 尺寸: [历史尺寸列表]}}
-        
-        if historical_data_list:
-            for historical_data in historical_data_list:
-                if not historical_data:
-                    continue
-                    
-                # 处理历史数据格式
-                if "products" in historical_data:
-                    # 原有格式
-                    hist_products = {p.get("name"): p for p in historical_data.get("products", [])}
-                else:
-                    # 新格式
-                    hist_products = {}
-                    for key, product in historical_data.items():
-                        if key in ["monitor", "timestamp"]:
-                            continue
-                        product_name = product.get("name", key)
-                        hist_products[product_name] = product
-                
-                # 记录历史商品
-                for name, product in hist_products.items():
-                    if name not in historical_products:
-                        historical_products[name] = []
-                    historical_products[name].append(product)
-                    
-                    # 如果是重点监控商品，记录其历史价格和尺寸值
-                    if product.get("key_monitoring", False):
-                        if name not in historical_key_products_values:
-                            historical_key_products_values[name] = {"prices": set(), "sizes": set()}
-                        
-                        # 记录历史价格
-                        price = product.get("price", "")
-                        if price:
-                            historical_key_products_values[name]["prices"].add(price)
-                        
-                        # 记录历史尺寸状态
-                        if "inventory" in product:
-                            # 新格式
-                            inventory = product["inventory"]
-                            for size, status in inventory.items():
-                                historical_key_products_values[name]["sizes"].add(f"{size}:{status}")
-                        elif "inventory_status" in product:
-                            # 原有格式
-                            for status_info in product["inventory_status"]:
-                                status = status_info.get("status", "")
-                                sizes = status_info.get("sizes", [])
-                                for size in sizes:
-                                    historical_key_products_values[name]["sizes"].add(f"{size}:{status}")
-
-        # 检查当前和上一次数据的商品数量差异
-        current_count = len(current_products)
-        previous_count = len(previous_products)
-        count_diff_ratio = abs(current_count - previous_count) / max(current_count, previous_count) if max(current_count, previous_count) > 0 else 0
-        
-        # 如果数据量差异过大（超过30%），可能是爬取异常，对重点监控商品特殊处理
-        is_data_suspicious = count_diff_ratio > 0.3
-        
-        # 找出新增产品（排除可能因爬取失败导致的"假新增"商品和历史上已出现的商品）
-        for name, product in current_products.items():
-            if name not in previous_products:
-                # 检查该商品是否在历史记录中出现过
-                is_historical_product = name in historical_products
-                
-                # 如果是重点监控商品且数据可疑，不将其标记为新增
-                is_key_product = product.get("key_monitoring", False)
-                if is_data_suspicious and is_key_product:
-                    continue
-                
-                # 如果商品在历史记录中出现过，不标记为新增（可能是爬取遗漏后恢复）
-                if is_historical_product:
-                    continue
-                    
-                changes["new_products"].append(product)
-
-        # 找出移除产品（排除可能因爬取失败导致的"假移除"重点监控商品）
-        for name, product in previous_products.items():
-            if name not in current_products:
-                # 如果是重点监控商品且数据可疑，不将其标记为移除
-                is_key_product = product.get("key_monitoring", False)
-                if is_data_suspicious and is_key_product:
-                    continue
-                changes["removed_products"].append(product)
-
-        # 找出库存变化和重点监控商品的变化
-        for name, current_product in current_products.items():
-            if name in previous_products:
-                previous_product = previous_products[name]
-                is_key_product = current_product.get("key_monitoring", False)
-                has_changes = False
-                change_details = {"price_change": None, "size_changes": []}
-                
-                # 检查价格变化（仅对重点监控商品）
-                if is_key_product and "price" in current_product and "price" in previous_product:
-                    current_price = current_product["price"]
-                    previous_price = previous_product["price"]
-                    
-                    # 检查价格变化是否可疑（例如从空变为有值，或价格变化过大）
-                    price_change_suspicious = False
-                    if not previous_price and current_price:  # 从无价格变为有价格
-                        price_change_suspicious = True
-                    elif previous_price and current_price:
-                        # 尝试提取数值部分进行比较
-                        import re
-                        prev_num = re.search(r'[\d,.]+', previous_price)
-                        curr_num = re.search(r'[\d,.]+', current_price)
-                        
-                        if prev_num and curr_num:
-                            try:
-                                prev_val = float(prev_num.group().replace(',', ''))
-                                curr_val = float(curr_num.group().replace(',', ''))
-                                # 如果价格变化超过50%，可能是可疑的
-                                if abs(curr_val - prev_val) / max(curr_val, prev_val) > 0.5:
-                                    price_change_suspicious = True
-                            except (ValueError, ZeroDivisionError):
-                                # 如果无法解析为数字，仍然比较原始字符串
-                                if current_price != previous_price:
-                                    if is_data_suspicious:
-                                        price_change_suspicious = True
-                    
-                    # 检查当前价格是否在历史记录中出现过
-                    price_in_history = False
-                    if name in historical_key_products_values and current_price in historical_key_products_values[name]["prices"]:
-                        price_in_history = True
-                    
-                    # 检查是否为货币转换变化（特别针对D2Store等可能有货币转换的站点）
-                    is_currency_conversion = DingSender._is_currency_conversion_change(previous_price, current_price)
-                    
-                    # 只有在数据不可疑、价格变化不可疑、当前价格未在历史中出现且不是货币转换的情况下才记录价格变化
-                    if (current_price != previous_price and 
-                        (not is_data_suspicious or not price_change_suspicious) and 
-                        not price_in_history and 
-                        not is_currency_conversion):
-                        change_details["price_change"] = {
-                            "from": previous_price,
-                            "to": current_price
-                        }
-                        has_changes = True
-
-                # 检查"inventory"字段 (新格式)
-                if "inventory" in current_product and "inventory" in previous_product:
-                    current_inventory = current_product["inventory"]
-                    previous_inventory = previous_product["inventory"]
-                    
-                    # 检查库存数据是否可疑
-                    inventory_suspicious = False
-                    if is_key_product and is_data_suspicious:
-                        # 如果尺码数量差异过大，可能是可疑的
-                        curr_size_count = len(current_inventory)
-                        prev_size_count = len(previous_inventory)
-                        if abs(curr_size_count - prev_size_count) / max(curr_size_count, prev_size_count) > 0.3 if max(curr_size_count, prev_size_count) > 0 else False:
-                            inventory_suspicious = True
-                    
-                    # 检查是否有变化
-                    if current_inventory != previous_inventory and (not is_key_product or not inventory_suspicious):
-                        size_changes = []
-                        
-                        # 检查每个尺码的变化
-                        all_sizes = set(current_inventory.keys()) | set(previous_inventory.keys())
-                        for size in all_sizes:
-                            curr_status = current_inventory.get(size, "Sold Out")
-                            prev_status = previous_inventory.get(size, "Sold Out")
-                            
-                            if curr_status != prev_status:
-                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
-                                status_in_history = False
-                                if (is_key_product and name in historical_key_products_values):
-                                    size_status_key = f"{size}:{curr_status}"
-                                    if size_status_key in historical_key_products_values[name]["sizes"]:
-                                        status_in_history = True
-                                
-                                # 只有当前状态未在历史记录中出现时才记录变化
-                                if not status_in_history:
-                                    size_change = {
-                                        "size": size,
-                                        "from": prev_status,
-                                        "to": curr_status,
-                                        "type": "stock_changed"
-                                    }
-                                    size_changes.append(size_change)
-                                    change_details["size_changes"].append(size_change)
-                                    has_changes = True
-                                
-                        if size_changes and not is_key_product:
-                            product_change = current_product.copy()
-                            product_change["size_changes"] = size_changes
-                            changes["inventory_changes"].append(product_change)
-                    
-                    # 处理重点监控商品的变化
-                    if is_key_product and has_changes and not inventory_suspicious:
-                        key_product_change = current_product.copy()
-                        key_product_change.update(change_details)
-                        changes["key_product_changes"].append(key_product_change)
-                    
-                    continue  # 如果已处理inventory字段，跳过下面的inventory_status处理
-                
-                # 处理"inventory_status"字段 (原有格式)
-                # 将当前产品的状态转换为更易于比较的格式
-                current_status = {}
-                for status_info in current_product.get("inventory_status", []):
-                    status = status_info.get("status", "")
-                    sizes = status_info.get("sizes", [])
-                    for size in sizes:
-                        current_status[size] = status
-
-                # 将上一次产品的状态转换为更易于比较的格式
-                previous_status = {}
-                for status_info in previous_product.get("inventory_status", []):
-                    status = status_info.get("status", "")
-                    sizes = status_info.get("sizes", [])
-                    for size in sizes:
-                        previous_status[size] = status
-
-                # 检查库存数据是否可疑
-                inventory_suspicious = False
-                if is_key_product and is_data_suspicious:
-                    # 如果尺码数量差异过大，可能是可疑的
-                    curr_size_count = len(current_status)
-                    prev_size_count = len(previous_status)
-                    if abs(curr_size_count - prev_size_count) / max(curr_size_count, prev_size_count) > 0.3 if max(curr_size_count, prev_size_count) > 0 else False:
-                        inventory_suspicious = True
-
-                # 检查状态变化
-                size_changes = []
-
-                # 只有在数据不可疑或不是重点监控商品的情况下才进行详细的状态变化检查
-                if not (is_key_product and inventory_suspicious):
-                    # 1. 检查尺码从有库存变为缺货
-                    for size, prev_status in previous_status.items():
-                        if prev_status.lower() != "sold out":
-                            curr_status = current_status.get(size, "")
-                            if curr_status.lower() == "sold out":
-                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
-                                status_in_history = False
-                                if (is_key_product and name in historical_key_products_values):
-                                    size_status_key = f"{size}:{curr_status}"
-                                    if size_status_key in historical_key_products_values[name]["sizes"]:
-                                        status_in_history = True
-                                
-                                # 只有当前状态未在历史记录中出现时才记录变化
-                                if not status_in_history:
-                                    size_change = {
-                                        "size": size,
-                                        "from": prev_status,
-                                        "to": curr_status,
-                                        "type": "stock_out"
-                                    }
-                                    size_changes.append(size_change)
-                                    change_details["size_changes"].append(size_change)
-                                    has_changes = True
-
-                    # 2. 检查尺码从缺货变为有库存
-                    for size, curr_status in current_status.items():
-                        if curr_status.lower() != "sold out":
-                            prev_status = previous_status.get(size, "")
-                            if prev_status.lower() == "sold out" or size not in previous_status:
-                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
-                                status_in_history = False
-                                if (is_key_product and name in historical_key_products_values):
-                                    size_status_key = f"{size}:{curr_status}"
-                                    if size_status_key in historical_key_products_values[name]["sizes"]:
-                                        status_in_history = True
-                                
-                                # 只有当前状态未在历史记录中出现时才记录变化
-                                if not status_in_history:
-                                    size_change = {
-                                        "size": size,
-                                        "from": prev_status,
-                                        "to": curr_status,
-                                        "type": "stock_in"
-                                    }
-                                    size_changes.append(size_change)
-                                    change_details["size_changes"].append(size_change)
-                                    has_changes = True
-
-                    # 如果有尺码变化，将产品添加到变化列表
-                    if size_changes and not is_key_product:
-                        product_change = current_product.copy()
-                        product_change["size_changes"] = size_changes
-                        changes["inventory_changes"].append(product_change)
-                
-                # 处理重点监控商品的变化
-                if is_key_product and has_changes and not inventory_suspicious:
-                    key_product_change = current_product.copy()
-                    key_product_change.update(change_details)
-                    changes["key_product_changes"].append(key_product_change)
-
-        return changes
+        engine = DingSender.create_diff_engine()
+        engine.prime_from_history(previous_data, historical_data_list)
+        return engine.diff(current_data)
 
     def generate_change_markdown(self, changes, current_data, file_path):
         """
@@ -636,27 +375,21 @@ class DingSender:
             url = f"{webhook_url}&timestamp={timestamp}&sign={sign}"
             self.logger.info(f"生成签名成功，目标URL长度: {len(url)}")
 
-            headers = {
-                'Content-Type': 'application/json',
-                'Charset': 'UTF-8'
-            }
-
             data = {
                 "msgtype": "markdown",
                 "markdown": message,
             }
+            payload = json.dumps(data)
             
             # 记录请求信息
-            self.logger.info(f"发送POST请求到钉钉API，数据大小: {len(json.dumps(data))} 字节")
+            self.logger.info(f"发送POST请求到钉钉API，数据大小: {len(payload)} 字节")
             
-            # 发送请求
+            # 发送请求，复用会话连接池中的长连接
             try:
-                response = requests.post(
+                response = self.session.post(
                     url, 
-                    headers=headers, 
-                    data=json.dumps(data), 
-                    proxies={'http': None, 'https': None},
-                    timeout=10  # 设置超时时间
+                    data=payload, 
+                    timeout=self.timeout  # 设置超时时间
                 )
                 
                 # 检查HTTP状态码
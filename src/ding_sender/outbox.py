@@ -0,0 +1,333 @@
+"""
+钉钉消息发件箱
+调度周期只把消息写入 SQLite 发件箱，由后台线程负责签名发送、失败重试和限流，
+慢速或不可用的 webhook 不再阻塞爬虫周期，调度器重启后未发送的消息也不会丢失
+
+表结构:
+- outbox: 待发送/已发送/发送失败的消息，按 id 顺序发送；alerts 保存消息对应的通知去重事件，
+  消息发送成功或最终失败时交给 on_finished 回调
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from src.common.logger import get_logger
+
+
+class SlidingWindowLimiter:
+    """
+    滑动窗口限流器：任意 window 秒内最多 limit 次
+
+    钉钉机器人的限制是每个机器人每分钟最多 20 条消息，令牌桶在窗口边界可能发出两倍突发，
+    这里按实际发送时间记录，严格保证窗口内的次数
+    """
+
+    def __init__(self, limit, window=60.0):
+        self.limit = max(1, int(limit))
+        self.window = float(window)
+        self._sent_at = deque()
+
+    def wait_time(self, now=None):
+        """距离下一次允许发送还需等待的秒数，0 表示可以立即发送"""
+        now = time.monotonic() if now is None else now
+        while self._sent_at and now - self._sent_at[0] >= self.window:
+            self._sent_at.popleft()
+        if len(self._sent_at) < self.limit:
+            return 0.0
+        return self.window - (now - self._sent_at[0])
+
+    def record(self, now=None):
+        self._sent_at.append(time.monotonic() if now is None else now)
+
+
+class NotificationOutbox:
+    """
+    基于 SQLite 的钉钉消息发件箱
+
+    enqueue 只写入数据库并唤醒后台线程；后台线程按 id 顺序取出到期的消息，
+    每次发送前由 send_func（DingSender.send_dingtalk_message）重新生成时间戳和 HMAC 签名，
+    失败时按指数退避安排重试，每个机器人（webhook）单独限流
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        webhook_url TEXT NOT NULL,
+        secret TEXT NOT NULL,
+        title TEXT,
+        message TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        next_attempt_at REAL NOT NULL,
+        sent_at REAL,
+        send_seconds REAL,
+        last_error TEXT,
+        alerts TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, next_attempt_at, id);
+    """
+
+    # 参数错误（webhook为空、消息格式错误）重试也不会成功，直接标记为失败
+    PERMANENT_ERRCODES = (5000, 5001)
+    # 钉钉返回的发送过快错误码，等待一个完整的限流窗口后重试
+    RATE_LIMIT_ERRCODES = (130101,)
+
+    def __init__(self, db_path, send_func, rate_per_minute=20, max_attempts=8,
+                 backoff_base=5.0, backoff_max=600.0, poll_interval=1.0, timeout=30, on_finished=None):
+        """
+        Args:
+            db_path (str): SQLite 数据库文件路径
+            send_func (callable): send_func(webhook_url, secret, message) -> 钉钉API响应字典
+            rate_per_minute (int): 每个机器人每分钟最多发送的消息数
+            max_attempts (int): 最大发送次数，超过后标记为失败
+            backoff_base (float): 指数退避的基础等待时间（秒），第 n 次失败后等待 base * 2^(n-1)
+            backoff_max (float): 指数退避的最长等待时间（秒）
+            poll_interval (float): 后台线程没有到期消息时的最长休眠时间（秒）
+            timeout (int): 数据库被锁定时的等待时间（秒）
+            on_finished (callable, optional): on_finished(alerts, sent)，消息发送成功（sent=True）或
+                                              最终失败（sent=False）时调用，alerts 为 enqueue 时传入的事件列表
+        """
+        self.db_path = str(db_path)
+        self.send_func = send_func
+        self.on_finished = on_finished
+        self.rate_per_minute = max(1, int(rate_per_minute))
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.poll_interval = float(poll_interval)
+        self.timeout = timeout
+        self.logger = get_logger(__name__)
+
+        self._limiters = {}
+        self._send_seconds = deque(maxlen=100)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "alerts" not in columns:
+                # 旧版本创建的发件箱没有 alerts 列
+                conn.execute("ALTER TABLE outbox ADD COLUMN alerts TEXT")
+
+    @contextmanager
+    def _connect(self):
+        """创建数据库短连接，退出时提交事务（异常时回滚）并关闭连接"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, webhook_url, secret, message, alerts=None):
+        """
+        写入一条待发送消息，立即返回
+
+        Args:
+            webhook_url (str): 钉钉机器人的webhook URL
+            secret (str): 钉钉机器人的加签密钥
+            message (dict): markdown消息，包含title和text字段
+            alerts (list, optional): 消息对应的通知去重事件，发送完成时原样交给 on_finished
+
+        Returns:
+            int: 消息ID
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (webhook_url, secret, title, message, status, created_at, next_attempt_at, alerts) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)",
+                (webhook_url or "", secret or "", (message or {}).get("title"),
+                 json.dumps(message, ensure_ascii=False), now, now,
+                 json.dumps(alerts, ensure_ascii=False) if alerts else None),
+            )
+            message_id = cursor.lastrowid
+        self._wakeup.set()
+        return message_id
+
+    def start(self):
+        """启动后台发送线程，上次退出时正在发送的消息重新放回队列"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._connect() as conn:
+            conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="ding-outbox", daemon=True)
+        self._thread.start()
+        self.logger.info(f"钉钉发件箱已启动，当前待发送消息 {self.stats()['pending']} 条")
+
+    def stop(self, timeout=15):
+        """停止后台发送线程，未发送的消息保留在数据库中，下次启动后继续发送"""
+        if not self._thread:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.logger.info("钉钉发件箱已停止")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                sleep_seconds = self.process_due()
+            except Exception as e:
+                self.logger.error(f"钉钉发件箱发送出错: {str(e)}")
+                sleep_seconds = self.poll_interval
+            self._wakeup.wait(min(self.poll_interval, sleep_seconds) if sleep_seconds > 0 else self.poll_interval)
+            self._wakeup.clear()
+
+    def process_due(self):
+        """
+        发送所有到期且未被限流的消息
+
+        同一个机器人的消息按 id 顺序发送，前一条被限流或等待重试时后面的消息也不会越过它
+
+        Returns:
+            float: 最近一条可发送消息还需等待的秒数，没有待发送消息时为 0
+        """
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, webhook_url, secret, message, attempts, next_attempt_at, alerts "
+                "FROM outbox WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+
+        blocked = set()
+        next_wait = 0.0
+        for message_id, webhook_url, secret, message, attempts, next_attempt_at, alerts in rows:
+            if self._stopping.is_set():
+                break
+            if webhook_url in blocked:
+                continue
+
+            wait_seconds = max(next_attempt_at - now, self._limiter(webhook_url).wait_time())
+            if wait_seconds > 0:
+                blocked.add(webhook_url)
+                next_wait = wait_seconds if next_wait == 0 else min(next_wait, wait_seconds)
+                continue
+
+            if not self._send(message_id, webhook_url, secret, json.loads(message), attempts, alerts):
+                blocked.add(webhook_url)
+            now = time.time()
+        return next_wait
+
+    def _limiter(self, webhook_url):
+        limiter = self._limiters.get(webhook_url)
+        if limiter is None:
+            limiter = self._limiters[webhook_url] = SlidingWindowLimiter(self.rate_per_minute, 60.0)
+        return limiter
+
+    def _send(self, message_id, webhook_url, secret, message, attempts, alerts=None):
+        """发送单条消息并记录结果，返回是否发送成功"""
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE outbox SET status = 'sending' WHERE id = ? AND status = 'pending'", (message_id,)
+            ).rowcount
+        if not claimed:
+            return True
+
+        self._limiter(webhook_url).record()
+        started = time.monotonic()
+        try:
+            result = self.send_func(webhook_url, secret, message)
+        except Exception as e:
+            result = {"errcode": 5004, "errmsg": f"发送请求时出错: {str(e)}"}
+        send_seconds = time.monotonic() - started
+        self._send_seconds.append(send_seconds)
+
+        attempts += 1
+        errcode = (result or {}).get("errcode")
+        now = time.time()
+        failed = False
+        with self._connect() as conn:
+            if errcode == 0:
+                conn.execute(
+                    "UPDATE outbox SET status = 'sent', attempts = ?, sent_at = ?, send_seconds = ?, last_error = NULL "
+                    "WHERE id = ?",
+                    (attempts, now, send_seconds, message_id),
+                )
+            else:
+                error = str((result or {}).get("errmsg", "未知错误"))
+                if errcode in self.PERMANENT_ERRCODES or attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                        (attempts, error, message_id),
+                    )
+                    self.logger.error(f"钉钉消息 {message_id} 发送失败，已放弃（共尝试 {attempts} 次）: {error}")
+                    failed = True
+                else:
+                    if errcode in self.RATE_LIMIT_ERRCODES:
+                        delay = 60.0
+                    else:
+                        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+                    conn.execute(
+                        "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? "
+                        "WHERE id = ?",
+                        (attempts, now + delay, error, message_id),
+                    )
+                    self.logger.warning(f"钉钉消息 {message_id} 发送失败（第 {attempts} 次），{delay:.0f} 秒后重试: {error}")
+
+        if errcode == 0:
+            self._finish(alerts, True)
+            return True
+        if failed:
+            self._finish(alerts, False)
+        return False
+
+    def _finish(self, alerts, sent):
+        """消息发送成功或最终失败时把通知去重事件交给 on_finished"""
+        if not self.on_finished or not alerts:
+            return
+        try:
+            self.on_finished(json.loads(alerts), sent)
+        except Exception as e:
+            self.logger.error(f"处理钉钉消息发送结果时出错: {str(e)}")
+
+    def stats(self):
+        """
+        发件箱指标
+
+        Returns:
+            dict: pending 队列深度、failed 失败数、oldest_pending_seconds 最早待发送消息的等待时间、
+                  queue_latency_seconds 最近100条消息从入队到发送成功的平均耗时、
+                  send_seconds 最近100次请求的平均耗时
+        """
+        now = time.time()
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM outbox WHERE status != 'sent' GROUP BY status"
+            ).fetchall())
+            oldest = conn.execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+            latency = conn.execute(
+                "SELECT AVG(sent_at - created_at) FROM "
+                "(SELECT sent_at, created_at FROM outbox WHERE status = 'sent' ORDER BY id DESC LIMIT 100)"
+            ).fetchone()[0]
+
+        send_seconds = list(self._send_seconds)
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_pending_seconds": round(now - oldest, 1) if oldest else 0.0,
+            "queue_latency_seconds": round(latency, 2) if latency is not None else None,
+            "send_seconds": round(sum(send_seconds) / len(send_seconds), 3) if send_seconds else None,
+        }
+
+    def prune(self, keep_days=7):
+        """删除 keep_days 天之前已发送和发送失败的消息，返回删除数量"""
+        cutoff = time.time() - keep_days * 86400
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND created_at < ?", (cutoff,)
+            ).rowcount
@@ -14,6 +14,7 @@ import json
 import threading
 import traceback
 import smtplib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from email.mime.text import MIMEText
 from email.header import Header
 from email.utils import formataddr
@@ -27,7 +28,13 @@ if project_root not in sys.path:
 # 导入项目路径和日志模块
 from src.common.project_path import ProjectPaths
 from src.common.logger import get_logger
+from src.common.crawler_process import CrawlerProcessRunner
+from src.common.adaptive_schedule import AdaptiveSiteScheduler
+from src.common.inventory_store import InventoryStore
 from src.ding_sender.ding_sender import DingSender
+from src.ding_sender.outbox import NotificationOutbox
+from src.ding_sender.composer import NotificationComposer
+from src.ding_sender.alert_dedup import AlertDedupIndex
 from src.utils.utils import load_toml
 
 # 创建日志记录器
@@ -75,6 +82,39 @@ class BalenciagaScheduler:
         self.special_cycle_multiplier = 5  # 特殊周期倍数 (self.waiting_time * 3)
         self.cycle_counter = 0  # 运行周期计数器
 
+        # 自适应轮询配置（在 crawler_monitor.toml 的 [adaptive_schedule] 中开启，开启后替代特殊周期配置）
+        self.adaptive_schedule_config = {}
+        self.site_scheduler = None
+        # 自适应轮询模式下当前周期内还未到期运行的爬虫，全部运行过一次才算一个完整周期
+        self.adaptive_cycle_pending = set()
+
+        # 钉钉发件箱配置（在 crawler_monitor.toml 的 [notify_outbox] 中设置），开启后调度周期只写入发件箱，由后台线程发送
+        self.notify_outbox_config = {}
+        self.notify_outbox = None
+        # 钉钉发送会话的连接池配置（[ding_sender]）
+        self.ding_sender_config = {}
+        # 钉钉通知合并配置（[notify_composer]）
+        self.notify_composer_config = {}
+        # 通知去重配置（[alert_dedup]）
+        self.alert_dedup_config = {}
+        self.alert_dedup = None
+
+        # 并发执行配置（可在 crawler_monitor.toml 的 [scheduler] 中覆盖）
+        self.execution_mode = "serial"     # serial: 串行执行, concurrent: 并发执行
+        self.max_workers = 4               # 并发模式下的全局最大并发爬虫数
+        self.proxy_concurrency = {"clash": 2, "ipcool": 2, "none": 4}  # 各代理类型的最大并发数
+
+        # 爬虫运行后端：thread 在调度器进程内运行，process 在独立子进程中运行
+        self.crawler_backend = "thread"
+        self.process_timeout_seconds = 900  # 子进程单次运行的最长时间（秒）
+        self.process_max_rss_mb = 2048      # 子进程及浏览器进程树的内存上限（MB）
+
+        # 爬虫状态锁，并发执行时保护失败计数、暂停状态和排除列表
+        self.crawler_state_lock = threading.RLock()
+
+        # 本轮各爬虫的运行结果（状态、商品数量、库存文件路径等）
+        self.crawler_results = {}
+
         # 读取爬虫排除列表
         self.excluded_monitors = []
         try:
@@ -84,6 +124,12 @@ class BalenciagaScheduler:
                 if 'excluded_monitor' in crawler_monitor_config and 'excluded_list' in crawler_monitor_config['excluded_monitor']:
                     self.excluded_monitors = crawler_monitor_config['excluded_monitor']['excluded_list']
                     self.logger.info(f"已加载爬虫排除列表: {self.excluded_monitors}")
+                self._load_scheduler_config(crawler_monitor_config)
+                self.adaptive_schedule_config = crawler_monitor_config.get('adaptive_schedule', {})
+                self.notify_outbox_config = crawler_monitor_config.get('notify_outbox', {})
+                self.ding_sender_config = crawler_monitor_config.get('ding_sender', {})
+                self.notify_composer_config = crawler_monitor_config.get('notify_composer', {})
+                self.alert_dedup_config = crawler_monitor_config.get('alert_dedup', {})
         except Exception as e:
             self.logger.error(f"读取爬虫排除列表失败: {str(e)}")
 
@@ -129,15 +175,64 @@ class BalenciagaScheduler:
             self.default_ding_token = ""  # Token不需要，保留为空
 
             # 初始化钉钉发送器
-            self.ding_sender = DingSender(self.default_ding_url, self.default_ding_secret, self.default_ding_token)
+            self.ding_sender = DingSender(self.default_ding_url, self.default_ding_secret, self.default_ding_token,
+                                          pool_maxsize=self.ding_sender_config.get('pool_maxsize', 4),
+                                          timeout=self.ding_sender_config.get('timeout', 10))
         except Exception as e:
             self.logger.error(f"初始化钉钉配置失败: {str(e)}")
             raise
 
+        # 商品状态存储，用于按索引读取当前快照和历史快照
+        try:
+            self.inventory_store = InventoryStore(os.path.join(self.data_dir, "inventory_state.db"))
+        except Exception as e:
+            self.logger.error(f"初始化商品状态存储失败，将只使用JSON文件: {str(e)}")
+            self.inventory_store = None
+
+        # 钉钉通知合并器，同一机器人在合并窗口内的多个网站通知合并为一条消息，超出字节上限时分段
+        self.notification_composer = NotificationComposer(
+            self._send_dingtalk,
+            window_seconds=self.notify_composer_config.get('window_seconds', 30),
+            max_bytes=self.notify_composer_config.get('max_bytes', NotificationComposer.DEFAULT_MAX_BYTES),
+        )
+
+        # 通知去重索引，TTL 内已通知过的新增商品和重点商品变化不再重复通知
+        if self.alert_dedup_config.get('enabled', True):
+            try:
+                self.alert_dedup = AlertDedupIndex(
+                    os.path.join(self.data_dir, "alert_dedup.db"),
+                    ttl_hours=self.alert_dedup_config.get('ttl_hours', 24),
+                    event_ttl_hours=self.alert_dedup_config.get('event_ttl_hours', {}),
+                    max_entries=self.alert_dedup_config.get('max_entries', 50000),
+                )
+                self.logger.info(f"通知去重索引已加载 {len(self.alert_dedup)} 条记录")
+            except Exception as e:
+                self.logger.error(f"初始化通知去重索引失败，将不过滤重复通知: {str(e)}")
+                self.alert_dedup = None
+
+        # 钉钉发件箱，后台线程在 start() 中启动
+        if self.notify_outbox_config.get('enabled', True):
+            try:
+                self.notify_outbox = self._init_notify_outbox(self.notify_outbox_config)
+            except Exception as e:
+                self.logger.error(f"初始化钉钉发件箱失败，将直接发送钉钉消息: {str(e)}")
+                self.notify_outbox = None
+
         # 初始化爬虫列表
         self.crawlers = self._load_crawlers()
         self.logger.info(f"已加载 {len(self.crawlers)} 个爬虫模块")
 
+        # 初始化自适应轮询调度器
+        if self.adaptive_schedule_config.get('enabled', False):
+            self.site_scheduler = self._init_site_scheduler(self.adaptive_schedule_config)
+
+        # 子进程运行器，仅在 process 后端下使用
+        self.process_runner = CrawlerProcessRunner(
+            self.logger,
+            timeout_seconds=self.process_timeout_seconds,
+            max_rss_mb=self.process_max_rss_mb,
+        )
+
     def _load_crawlers(self):
         """加载爬虫模块列表"""
         crawlers = []
@@ -217,6 +312,229 @@ class BalenciagaScheduler:
 
         return crawlers
 
+    def _load_scheduler_config(self, crawler_monitor_config):
+        """从 crawler_monitor.toml 的 [scheduler] 部分加载执行模式和并发限制"""
+        scheduler_config = crawler_monitor_config.get('scheduler', {})
+        if not scheduler_config:
+            return
+
+        execution_mode = scheduler_config.get('execution_mode', self.execution_mode)
+        if execution_mode in ("serial", "concurrent"):
+            self.execution_mode = execution_mode
+        else:
+            self.logger.warning(f"未知的执行模式: {execution_mode}，使用默认的 {self.execution_mode} 模式")
+
+        self.max_workers = max(1, int(scheduler_config.get('max_workers', self.max_workers)))
+
+        for proxy_key, limit in scheduler_config.get('proxy_concurrency', {}).items():
+            self.proxy_concurrency[proxy_key] = max(1, int(limit))
+
+        crawler_backend = scheduler_config.get('crawler_backend', self.crawler_backend)
+        if crawler_backend in ("thread", "process"):
+            self.crawler_backend = crawler_backend
+        else:
+            self.logger.warning(f"未知的爬虫运行后端: {crawler_backend}，使用默认的 {self.crawler_backend} 后端")
+
+        process_runner_config = scheduler_config.get('process_runner', {})
+        self.process_timeout_seconds = int(process_runner_config.get('timeout_seconds', self.process_timeout_seconds))
+        self.process_max_rss_mb = int(process_runner_config.get('max_rss_mb', self.process_max_rss_mb))
+
+        self.logger.info(f"调度器执行模式: {self.execution_mode}, 最大并发数: {self.max_workers}, "
+                         f"代理并发限制: {self.proxy_concurrency}, 运行后端: {self.crawler_backend}")
+
+    def _init_notify_outbox(self, outbox_config):
+        """根据 [notify_outbox] 配置创建钉钉发件箱"""
+        notify_outbox = NotificationOutbox(
+            os.path.join(self.data_dir, "notify_outbox.db"),
+            self.ding_sender.send_dingtalk_message,
+            rate_per_minute=outbox_config.get('rate_per_minute', 20),
+            max_attempts=outbox_config.get('max_attempts', 8),
+            backoff_base=outbox_config.get('backoff_base', 5.0),
+            backoff_max=outbox_config.get('backoff_max', 600.0),
+            on_finished=self._finish_alerts,
+        )
+        self.notify_outbox_keep_days = int(outbox_config.get('keep_days', 7))
+        self.logger.info(f"钉钉发件箱已启用，每个机器人每分钟最多发送 {notify_outbox.rate_per_minute} 条消息")
+        return notify_outbox
+
+    def _send_dingtalk(self, ding_url, ding_secret, markdown_message, alerts=None):
+        """
+        发送钉钉消息：启用发件箱时只写入发件箱并立即返回，否则直接发送
+
+        Args:
+            alerts (list, optional): 消息对应的通知去重事件，消息发送成功后才记录，最终失败时释放
+
+        Returns:
+            dict: 钉钉API的响应结果，写入发件箱时为 {"errcode": 0, "outbox_id": 消息ID}
+        """
+        if self.notify_outbox:
+            try:
+                message_id = self.notify_outbox.enqueue(ding_url, ding_secret, markdown_message, alerts=alerts)
+                return {"errcode": 0, "errmsg": "已写入发件箱", "outbox_id": message_id}
+            except Exception as e:
+                self.logger.error(f"写入钉钉发件箱失败，改为直接发送: {str(e)}")
+        result = self.ding_sender.send_dingtalk_message(ding_url, ding_secret, markdown_message)
+        self._finish_alerts(alerts, (result or {}).get("errcode") == 0)
+        return result
+
+    @staticmethod
+    def _format_new_products(monitor_name, new_products):
+        """
+        生成新增商品通知的段落头部和商品条目
+
+        Returns:
+            tuple: (段落头部, 商品条目列表)
+        """
+        header = (f"## {monitor_name}\n\n"
+                  f"新增商品数: {len(new_products)}\n\n"
+                  f"新增时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                  "============\n\n")
+
+        entries = []
+        for i, product in enumerate(new_products):
+            name = product.get('name', '未知商品')
+            url = product.get('url', '')
+            price = product.get('price', '')
+
+            # 修改格式以确保钉钉正确渲染递增编号，每行只用一个换行
+            parts = [f"{i + 1}. **{name}**"]
+            if url:
+                parts.append(f" [【查看商品】]({url})")
+            parts.append("  \n  ")
+            if price:
+                parts.append(f"价格: {price}  \n  ")
+
+            # 添加尺寸信息（如果存在）
+            inventory_status = product.get('inventory', {})
+            if inventory_status:
+                parts.append("尺寸: ")
+                parts.extend(f"{size_name}; " for size_name in inventory_status)
+                parts.append("  \n  ")
+            entries.append("".join(parts))
+        return header, entries
+
+    @staticmethod
+    def _format_key_changes(monitor_name, key_changes):
+        """
+        生成重点监控商品变化通知的段落头部和商品条目
+
+        Returns:
+            tuple: (段落头部, 商品条目列表)
+        """
+        header = (f"## {monitor_name}\n\n"
+                  f"重点监控商品变化数: {len(key_changes)}\n\n"
+                  f"变化时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                  "============\n\n")
+
+        entries = []
+        for i, product in enumerate(key_changes):
+            name = product.get('name', '未知商品')
+            url = product.get('url', '')
+
+            parts = [f"{i + 1}. **{name}**"]
+            if url:
+                parts.append(f" [【查看商品】]({url})")
+            parts.append("  \n  ")
+
+            # 添加价格变化信息
+            price_change = product.get('price_change')
+            if price_change:
+                parts.append(f"价格变化: {price_change.get('from', '')} → {price_change.get('to', '')}  \n  ")
+
+            # 添加尺寸变化信息
+            size_changes = product.get('size_changes', [])
+            if size_changes:
+                parts.append("尺寸变化:  \n  ")
+                for change in size_changes:
+                    change_desc = f"- {change.get('size', '')}: {change.get('from', '')} → {change.get('to', '')}"
+                    change_type = change.get('type', '')
+                    if change_type == "stock_in":
+                        change_desc += " (补货)"
+                    elif change_type == "stock_out":
+                        change_desc += " (售罄)"
+                    parts.append(change_desc + "  \n  ")
+            entries.append("".join(parts))
+        return header, entries
+
+    def _hold_alerts(self, site, new_products=None, key_product_changes=None):
+        """
+        挂起加入通知的事件，返回与商品条目一一对应的事件列表（交给通知合并器），未启用通知去重时返回 None
+
+        事件在消息发送成功后才记录到通知去重索引，发送失败的事件之后会重新通知
+        """
+        if not self.alert_dedup:
+            return None
+        try:
+            entry_alerts = [self.alert_dedup.change_events(site, new_products=[product])
+                            for product in new_products or []]
+            entry_alerts += [self.alert_dedup.change_events(site, key_product_changes=[product])
+                             for product in key_product_changes or []]
+            for events in entry_alerts:
+                self.alert_dedup.hold(events)
+            return entry_alerts
+        except Exception as e:
+            self.logger.error(f"挂起通知去重事件出错: {str(e)}")
+            return None
+
+    def _finish_alerts(self, alerts, sent):
+        """消息发送成功时记录通知去重事件，最终失败时释放挂起的事件"""
+        if not self.alert_dedup or not alerts:
+            return
+        try:
+            if sent:
+                self.alert_dedup.record_events(alerts)
+            else:
+                self.alert_dedup.release(alerts)
+                self.logger.warning(f"钉钉消息发送失败，{len(alerts)} 个事件之后会重新通知")
+        except Exception as e:
+            self.logger.error(f"记录通知去重事件出错: {str(e)}")
+
+    def flush_notifications(self, force=False):
+        """
+        发送合并窗口已到期的钉钉通知
+
+        Args:
+            force (bool): 是否忽略合并窗口立即发送
+        """
+        try:
+            results = self.notification_composer.flush(force=force)
+            if results:
+                failed = sum(1 for result in results if (result or {}).get("errcode") != 0)
+                self.logger.info(f"已发送 {len(results)} 条合并后的钉钉通知，失败 {failed} 条")
+        except Exception as e:
+            self.logger.error(f"发送合并后的钉钉通知时出错: {str(e)}")
+            self.logger.error(f"错误详情: {traceback.format_exc()}")
+
+    def _init_site_scheduler(self, adaptive_config):
+        """根据 [adaptive_schedule] 配置创建自适应轮询调度器，并将所有爬虫加入队列"""
+        self.adaptive_check_seconds = int(adaptive_config.get('check_interval_seconds', 30))
+        site_scheduler = AdaptiveSiteScheduler(
+            self.data_dir,
+            self.logger,
+            min_interval_minutes=adaptive_config.get('min_interval_minutes', self.loop_time),
+            max_interval_minutes=adaptive_config.get('max_interval_minutes', 60),
+            lookback_hours=adaptive_config.get('lookback_hours', 24),
+            polls_per_change=adaptive_config.get('polls_per_change', 2),
+            site_overrides=adaptive_config.get('sites', {}),
+        )
+        for crawler_info in self.crawlers:
+            site_scheduler.register(crawler_info['module_name'])
+        self.adaptive_cycle_pending = {crawler_info['module_name'] for crawler_info in self.crawlers}
+
+        self.logger.info(f"已启用自适应轮询: 间隔范围 {site_scheduler.min_interval_minutes}-"
+                         f"{site_scheduler.max_interval_minutes} 分钟, 回溯窗口 {site_scheduler.lookback_hours} 小时, "
+                         f"网站覆盖配置: {site_scheduler.site_overrides}")
+        return site_scheduler
+
+    def _get_proxy_key(self, module_name):
+        """获取爬虫所使用的代理类型，用于并发限制分组"""
+        proxy_type = self.crawler_configs.get(module_name, {}).get('proxy_type')
+        return proxy_type if proxy_type else "none"
+
+    def _uses_fixed_port(self, module_name):
+        """爬虫是否使用固定浏览器端口（固定端口的爬虫之间不能同时运行，否则会接管同一个浏览器）"""
+        return not self.crawler_configs.get(module_name, {}).get('is_auto_port', True)
+
     def run_crawler(self, crawler_info):
         """运行单个爬虫，通过实例化类执行"""
         module_name = crawler_info['module_name']
@@ -253,8 +571,27 @@ class BalenciagaScheduler:
 
                 # 实例化爬虫类并运行
                 self.logger.debug(f"爬虫 {module_name} 的配置参数: {kwargs}")
-                crawler_instance = crawler_class(**kwargs)
-                result = crawler_instance.run_with_log()
+                if self.crawler_backend == "process":
+                    run_result = self.process_runner.run(module_name, class_name, kwargs)
+                    if run_result['status'] in ("timeout", "memory_exceeded"):
+                        # 超时或内存超限说明爬虫本身存在问题，不再重试，直接进入失败处理
+                        self.logger.error(f"爬虫 {class_name} 子进程被强制终止: {run_result['error']}")
+                        break
+                    if run_result['status'] != "ok":
+                        raise RuntimeError(run_result['error'])
+                    result = run_result['count']
+                    self.logger.info(f"爬虫 {class_name} 子进程返回: 商品数量 {result}, "
+                                     f"耗时 {run_result['elapsed']:.1f} 秒, 峰值内存 {run_result['peak_rss_mb']}MB")
+                else:
+                    crawler_instance = crawler_class(**kwargs)
+                    result = crawler_instance.run_with_log()
+                    run_result = {
+                        'status': 'ok',
+                        'count': result,
+                        'inventory_file': getattr(crawler_instance, 'last_inventory_file', None),
+                        'http_cache': crawler_instance.get_http_cache_stats(),
+                    }
+                self.crawler_results[module_name] = run_result
 
                 # 检查爬虫返回结果
                 if not result:
@@ -269,14 +606,15 @@ class BalenciagaScheduler:
                     continue
 
                 # 爬虫执行成功，重置所有失败相关状态
-                if module_name in self.crawler_failure_counter:
-                    self.crawler_failure_counter[module_name] = 0
-                if module_name in self.crawler_pause_counter:
-                    self.crawler_pause_counter[module_name] = 0
-                if module_name in self.crawler_status:
-                    self.crawler_status[module_name] = "normal"
-                if module_name in self.crawler_email_sent:
-                    self.crawler_email_sent[module_name] = False
+                with self.crawler_state_lock:
+                    if module_name in self.crawler_failure_counter:
+                        self.crawler_failure_counter[module_name] = 0
+                    if module_name in self.crawler_pause_counter:
+                        self.crawler_pause_counter[module_name] = 0
+                    if module_name in self.crawler_status:
+                        self.crawler_status[module_name] = "normal"
+                    if module_name in self.crawler_email_sent:
+                        self.crawler_email_sent[module_name] = False
 
                 self.logger.info(f"爬虫 {class_name} 执行成功")
                 return True
@@ -292,7 +630,8 @@ class BalenciagaScheduler:
                     time.sleep(retry_wait)
 
         # 所有重试都失败了，处理失败逻辑
-        self._handle_crawler_failure(module_name, class_name)
+        with self.crawler_state_lock:
+            self._handle_crawler_failure(module_name, class_name)
         self.logger.error(f"爬虫 {class_name} 在 {max_retries + 1} 次尝试后仍然失败")
         return False
 
@@ -361,6 +700,11 @@ class BalenciagaScheduler:
         """
         更新爬虫暂停状态，检查是否到了恢复运行的时间
         """
+        with self.crawler_state_lock:
+            self._update_crawler_pause_status_locked()
+
+    def _update_crawler_pause_status_locked(self):
+        """更新爬虫暂停状态（调用方需持有 crawler_state_lock）"""
         for module_name, status in self.crawler_status.items():
             if status == "paused":
                 self.crawler_pause_counter[module_name] += 1
@@ -537,18 +881,175 @@ class BalenciagaScheduler:
             }
             
             # 发送钉钉消息
-            result = self.ding_sender.send_dingtalk_message(
-                ding_url,
-                ding_secret,
-                markdown_message
-            )
+            result = self._send_dingtalk(ding_url, ding_secret, markdown_message)
             
             self.logger.info(f"通过钉钉发送爬虫 {class_name} 警告结果: {result}")
         except Exception as e:
             self.logger.error(f"通过钉钉发送警告失败: {str(e)}")
 
+    def _run_crawlers_serial(self, crawlers_to_run):
+        """
+        串行执行爬虫任务，一个结束后再执行下一个
+
+        Returns:
+            tuple: (各爬虫耗时字典, 成功的爬虫数量)
+        """
+        crawler_durations = {}
+        successful_crawlers = 0
+
+        for i, crawler_info in enumerate(crawlers_to_run):
+            module_name = crawler_info['module_name']
+            class_name = crawler_info['class_name']
+
+            # 再次检查是否在排除列表中（前面的爬虫失败可能导致其被加入排除列表）
+            if module_name in self.excluded_monitors:
+                self.logger.info(f"爬虫 {module_name} 在排除列表中，已跳过执行")
+                continue
+
+            self.logger.info(f"开始执行爬虫 [{i + 1}]: {class_name}")
+
+            # 执行当前爬虫
+            start_time = time.time()
+            result = self.run_crawler(crawler_info)
+            crawler_durations[module_name] = time.time() - start_time
+            if result:
+                successful_crawlers += 1
+                self.logger.info(f"爬虫 {class_name} 执行成功")
+            else:
+                self.logger.warning(f"爬虫 {class_name} 执行失败")
+
+            # 如果不是最后一个要执行的爬虫，等待指定时间后再执行下一个
+            if i < len(crawlers_to_run) - 1:
+                self.logger.info(f"等待 {self.sleep_between_crawlers} 秒后执行下一个爬虫...")
+                time.sleep(self.sleep_between_crawlers)
+
+        return crawler_durations, successful_crawlers
+
+    def _run_crawlers_concurrent(self, crawlers_to_run):
+        """
+        使用工作池并发执行爬虫任务
+        同时受全局最大并发数和各代理类型并发数限制，使用固定浏览器端口的爬虫之间互斥执行。
+        只有在全局和代理类型都有空闲名额时才会提交爬虫，避免工作线程空等占用名额。
+
+        Returns:
+            tuple: (各爬虫耗时字典, 成功的爬虫数量)
+        """
+        crawler_durations = {}
+        successful_crawlers = 0
+
+        pending_crawlers = list(crawlers_to_run)
+        running_futures = {}  # future -> (crawler_info, proxy_key)
+        running_per_proxy = {}
+        fixed_port_running = False
+
+        def timed_run(crawler_info):
+            start_time = time.time()
+            result = self.run_crawler(crawler_info)
+            return result, time.time() - start_time
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawler") as executor:
+            while pending_crawlers or running_futures:
+                # 提交所有当前满足并发限制的爬虫
+                for crawler_info in list(pending_crawlers):
+                    if len(running_futures) >= self.max_workers:
+                        break
+
+                    module_name = crawler_info['module_name']
+                    proxy_key = self._get_proxy_key(module_name)
+                    proxy_limit = self.proxy_concurrency.get(proxy_key, self.max_workers)
+                    if running_per_proxy.get(proxy_key, 0) >= proxy_limit:
+                        continue
+                    if self._uses_fixed_port(module_name) and fixed_port_running:
+                        continue
+
+                    pending_crawlers.remove(crawler_info)
+                    if module_name in self.excluded_monitors:
+                        self.logger.info(f"爬虫 {module_name} 在排除列表中，已跳过执行")
+                        continue
+
+                    running_per_proxy[proxy_key] = running_per_proxy.get(proxy_key, 0) + 1
+                    if self._uses_fixed_port(module_name):
+                        fixed_port_running = True
+
+                    self.logger.info(f"提交并发爬虫: {crawler_info['class_name']} (代理: {proxy_key}, "
+                                     f"运行中: {len(running_futures) + 1}/{self.max_workers})")
+                    future = executor.submit(timed_run, crawler_info)
+                    running_futures[future] = (crawler_info, proxy_key)
+
+                if not running_futures:
+                    # 剩余爬虫均已被排除
+                    break
+
+                done_futures, _ = wait(list(running_futures.keys()), return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    crawler_info, proxy_key = running_futures.pop(future)
+                    module_name = crawler_info['module_name']
+                    class_name = crawler_info['class_name']
+
+                    running_per_proxy[proxy_key] -= 1
+                    if self._uses_fixed_port(module_name):
+                        fixed_port_running = False
+
+                    try:
+                        result, duration = future.result()
+                    except Exception as e:
+                        self.logger.error(f"并发执行爬虫 {class_name} 时出现未处理的异常: {str(e)}")
+                        result, duration = False, 0.0
+
+                    crawler_durations[module_name] = duration
+                    if result:
+                        successful_crawlers += 1
+                        self.logger.info(f"爬虫 {class_name} 执行成功，耗时 {duration:.1f} 秒")
+                    else:
+                        self.logger.warning(f"爬虫 {class_name} 执行失败，耗时 {duration:.1f} 秒")
+
+        return crawler_durations, successful_crawlers
+
+    def _execute_crawlers(self, crawlers_to_run):
+        """
+        按配置的执行模式运行一批爬虫，并输出实际耗时与串行等效耗时
+
+        Returns:
+            tuple: (成功的爬虫数量, 实际执行的爬虫数量)
+        """
+        # 过滤排除列表中的爬虫（以防配置在运行期间被修改）
+        runnable_crawlers = []
+        for crawler_info in crawlers_to_run:
+            if crawler_info['module_name'] in self.excluded_monitors:
+                self.logger.info(f"爬虫 {crawler_info['module_name']} 在排除列表中，已跳过执行")
+                continue
+            runnable_crawlers.append(crawler_info)
+
+        self.crawler_results = {}
+        cycle_start_time = time.time()
+        if self.execution_mode == "concurrent":
+            crawler_durations, successful_crawlers = self._run_crawlers_concurrent(runnable_crawlers)
+        else:
+            crawler_durations, successful_crawlers = self._run_crawlers_serial(runnable_crawlers)
+        cycle_wall_time = time.time() - cycle_start_time
+        executed_crawlers = len(crawler_durations)
+
+        # 串行等效耗时 = 各爬虫耗时之和 + 串行模式下爬虫之间的等待时间
+        serial_equivalent_time = sum(crawler_durations.values()) + \
+            self.sleep_between_crawlers * max(0, executed_crawlers - 1)
+        speedup = serial_equivalent_time / cycle_wall_time if cycle_wall_time > 0 else 1.0
+        self.logger.info(f"本轮爬虫执行模式: {self.execution_mode}, 实际耗时: {cycle_wall_time:.1f} 秒, "
+                         f"串行等效耗时: {serial_equivalent_time:.1f} 秒, 加速比: {speedup:.2f}x")
+        for module_name, duration in sorted(crawler_durations.items(), key=lambda item: item[1], reverse=True):
+            self.logger.debug(f"爬虫 {module_name} 耗时: {duration:.1f} 秒")
+
+        # 各网站目录页的HTTP缓存命中率
+        for module_name, run_result in sorted(self.crawler_results.items()):
+            cache_stats = run_result.get('http_cache')
+            if cache_stats:
+                self.logger.info(f"爬虫 {module_name} HTTP缓存命中率: {cache_stats['hit_rate']:.0%} "
+                                 f"(304: {cache_stats['not_modified']}, 内容未变化: {cache_stats['unchanged']}, "
+                                 f"未命中: {cache_stats['miss']})")
+
+        return successful_crawlers, executed_crawlers
+
     def run_all_crawlers(self):
-        """运行所有爬虫，串行执行（一个爬虫完成后再执行下一个）"""
+        """运行所有爬虫，按配置串行执行或并发执行"""
         self.logger.info("开始执行所有网站的爬虫任务")
 
         # 更新暂停状态（检查是否有爬虫需要从暂停状态恢复）
@@ -583,34 +1084,7 @@ class BalenciagaScheduler:
         else:
             self.logger.info(f"本次跳过特殊周期爬虫: {[c['module_name'] for c in special_crawlers]}")
 
-        # 串行执行爬虫任务，一个结束后再执行下一个
-        successful_crawlers = 0
-        executed_crawlers = 0
-        
-        for i, crawler_info in enumerate(crawlers_to_run):
-            module_name = crawler_info['module_name']
-            class_name = crawler_info['class_name']
-            
-            # 再次检查是否在排除列表中（以防配置在运行期间被修改）
-            if module_name in self.excluded_monitors:
-                self.logger.info(f"爬虫 {module_name} 在排除列表中，已跳过执行")
-                continue
-                
-            executed_crawlers += 1
-            self.logger.info(f"开始执行爬虫 [{executed_crawlers}]: {class_name}")
-
-            # 执行当前爬虫
-            result = self.run_crawler(crawler_info)
-            if result:
-                successful_crawlers += 1
-                self.logger.info(f"爬虫 {class_name} 执行成功")
-            else:
-                self.logger.warning(f"爬虫 {class_name} 执行失败")
-
-            # 如果不是最后一个要执行的爬虫，等待指定时间后再执行下一个
-            if i < len(crawlers_to_run) - 1:
-                self.logger.info(f"等待 {self.sleep_between_crawlers} 秒后执行下一个爬虫...")
-                time.sleep(self.sleep_between_crawlers)
+        successful_crawlers, executed_crawlers = self._execute_crawlers(crawlers_to_run)
 
         self.logger.info(f"爬虫任务执行完成，成功: {successful_crawlers}/{executed_crawlers}")
         
@@ -631,6 +1105,45 @@ class BalenciagaScheduler:
         self.logger.info("调度循环周期执行完成")
         self.logger.info("=" * 50)
 
+    def run_due_crawlers(self):
+        """
+        自适应轮询模式下运行所有已到期的爬虫
+        按逾期时间从长到短的顺序执行，运行结束后根据各网站的变化频率重新计算下次运行时间；
+        所有爬虫都到期运行过一次后才推进运行周期计数和暂停计数，与固定间隔模式的一个周期对应
+        """
+        due_modules = self.site_scheduler.pop_due()
+        if not due_modules:
+            return
+
+        crawler_map = {crawler_info['module_name']: crawler_info for crawler_info in self.crawlers}
+        due_crawlers = [crawler_map[module_name] for module_name in due_modules if module_name in crawler_map]
+        self.logger.info(f"本次到期的爬虫（按逾期时间排序）: {due_modules}")
+
+        successful_crawlers, executed_crawlers = self._execute_crawlers(due_crawlers)
+        self.logger.info(f"到期爬虫执行完成，成功: {successful_crawlers}/{executed_crawlers}")
+
+        # 只检查本次运行的网站的库存变化
+        self.check_inventory_changes(due_crawlers)
+
+        finished_at = time.time()
+        for crawler_info in due_crawlers:
+            module_name = crawler_info['module_name']
+            interval_minutes = self.site_scheduler.reschedule(module_name, finished_at)
+            self.logger.info(f"爬虫 {module_name} 下次运行间隔: {interval_minutes:.1f} 分钟")
+
+        # 暂停中的爬虫同样会到期（执行时被跳过），所有爬虫都到期过一次即完成一个周期
+        self.adaptive_cycle_pending.difference_update(due_modules)
+        if not self.adaptive_cycle_pending:
+            self.cycle_counter += 1
+            self.logger.info(f"所有爬虫已完成第 {self.cycle_counter} 个运行周期")
+            # 更新暂停状态（检查是否有爬虫需要从暂停状态恢复）
+            self._update_crawler_pause_status()
+            self.adaptive_cycle_pending = {crawler_info['module_name'] for crawler_info in self.crawlers}
+
+        seconds_until_next = self.site_scheduler.seconds_until_next()
+        if seconds_until_next is not None:
+            self.logger.info(f"距离下一个到期爬虫还有 {seconds_until_next / 60:.1f} 分钟")
+
     def find_latest_summary_file(self, monitor_name):
         """查找指定监控器的最新库存摘要文件"""
         inventory_dir = os.path.join(self.data_dir, monitor_name.lower(), "inventory")
@@ -661,19 +1174,27 @@ class BalenciagaScheduler:
         self.logger.debug(f"找到的最新库存文件: {os.path.basename(all_files[0])}")
         return all_files[0]
 
-    def check_inventory_changes(self):
-        """检查所有网站的库存变化并发送通知"""
+    def check_inventory_changes(self, crawlers=None):
+        """
+        检查网站的库存变化并发送通知
+
+        Args:
+            crawlers (list, optional): 需要检查的爬虫列表，默认检查所有爬虫
+        """
         self.logger.info("开始检查所有网站的库存变化")
 
         # 记录找到的库存文件数量
         found_files = 0
         processed_files = 0
 
-        for crawler_info in self.crawlers:
+        for crawler_info in (crawlers if crawlers is not None else self.crawlers):
             monitor_name = crawler_info['module_name'].replace('_monitor', '')
 
-            # 获取最新的库存摘要文件
-            latest_file = self.find_latest_summary_file(monitor_name)
+            # 优先使用本轮爬虫运行结果中返回的库存文件，未运行的爬虫再扫描目录查找
+            run_result = self.crawler_results.get(crawler_info['module_name'], {})
+            latest_file = run_result.get('inventory_file')
+            if not latest_file or not os.path.exists(latest_file):
+                latest_file = self.find_latest_summary_file(monitor_name)
             if not latest_file:
                 self.logger.warning(f"{monitor_name} 未找到库存摘要文件")
                 continue
@@ -692,79 +1213,185 @@ class BalenciagaScheduler:
 
         self.logger.info(f"库存变化检查完成: 找到 {found_files} 个库存文件，处理了 {processed_files} 个文件")
 
+        # 固定周期模式下所有网站已在本轮检查完毕，直接发送；自适应轮询模式下等待合并窗口，
+        # 与随后几次到期检查的网站通知合并，剩余的通知由定时任务发送
+        self.flush_notifications(force=self.site_scheduler is None)
+
+        if self.notify_outbox:
+            try:
+                stats = self.notify_outbox.stats()
+                self.logger.info(f"钉钉发件箱: 待发送 {stats['pending']} 条, 发送失败 {stats['failed']} 条, "
+                                 f"最早待发送消息已等待 {stats['oldest_pending_seconds']} 秒, "
+                                 f"平均入队到发送耗时 {stats['queue_latency_seconds']} 秒, "
+                                 f"平均请求耗时 {stats['send_seconds']} 秒")
+            except Exception as e:
+                self.logger.error(f"读取钉钉发件箱指标失败: {str(e)}")
+
+    def _resolve_snapshot_tokens(self, file_path):
+        """
+        获取当前快照和上一次快照的标记，用于判断网站的对比引擎是否已同步
+        商品状态存储中存在对应快照时使用快照ID，否则使用JSON文件路径
+
+        Returns:
+            tuple: (当前快照标记, 上一次快照标记或None)
+        """
+        if self.inventory_store:
+            try:
+                snapshot = self.inventory_store.find_snapshot(file_path)
+                if snapshot:
+                    snapshot_id, site = snapshot
+                    return snapshot_id, self.inventory_store.find_previous_snapshot_id(site, snapshot_id)
+            except Exception as e:
+                self.logger.error(f"从商品状态存储查询快照出错: {str(e)}")
+
+        previous_file = self.ding_sender.find_previous_json(file_path, os.path.dirname(file_path))
+        return os.path.normpath(file_path), os.path.normpath(previous_file) if previous_file else None
+
+    def _load_current_inventory(self, file_path):
+        """读取当前库存数据，优先从商品状态存储中读取"""
+        if self.inventory_store:
+            try:
+                snapshot = self.inventory_store.find_snapshot(file_path)
+                if snapshot:
+                    current_data = self.inventory_store.load_snapshot(snapshot[0])
+                    if current_data is not None:
+                        return current_data
+            except Exception as e:
+                self.logger.error(f"从商品状态存储加载库存数据出错，回退到JSON文件: {str(e)}")
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_snapshot_delta(self, file_path, base_token):
+        """
+        从商品状态存储读取当前快照的变化集合（按稳定商品标识），基准快照与 base_token 一致时才可用于对比
+
+        Returns:
+            dict: InventoryStore.load_snapshot_delta 的结果，不可用时返回 None
+        """
+        if not self.inventory_store or base_token is None:
+            return None
+        try:
+            snapshot = self.inventory_store.find_snapshot(file_path)
+            if not snapshot:
+                return None
+            delta = self.inventory_store.load_snapshot_delta(snapshot[0])
+            if delta and delta["base_snapshot_id"] == base_token:
+                return delta
+        except Exception as e:
+            self.logger.error(f"从商品状态存储读取变化集合出错，将读取完整库存数据: {str(e)}")
+        return None
+
+    def _load_previous_inventory(self, file_path):
+        """
+        加载当前库存数据和上一次库存数据，用于在对比引擎未同步时初始化引擎
+        优先按快照ID从商品状态存储中读取，存储中没有对应快照时回退到JSON文件
+        多次快照之间反复出现的商品和重点商品变化由通知去重索引过滤，不再加载最近几次历史数据
+
+        Args:
+            file_path (str): 当前库存JSON文件路径
+
+        Returns:
+            tuple: (当前库存数据, 上一次库存数据或None)
+        """
+        if self.inventory_store:
+            try:
+                snapshot = self.inventory_store.find_snapshot(file_path)
+                if snapshot:
+                    snapshot_id, site = snapshot
+                    current_data = self.inventory_store.load_snapshot(snapshot_id)
+                    previous_snapshot_id = self.inventory_store.find_previous_snapshot_id(site, snapshot_id)
+                    # 存储中还没有更早的快照时（如刚启用存储），回退到JSON文件以免所有商品被误判为新增
+                    if current_data is not None and previous_snapshot_id is not None:
+                        previous_data = self.inventory_store.load_snapshot(previous_snapshot_id)
+                        if previous_data is not None:
+                            self.logger.debug(f"从商品状态存储加载快照 {snapshot_id} 及上一次快照 {previous_snapshot_id}")
+                            return current_data, previous_data
+            except Exception as e:
+                self.logger.error(f"从商品状态存储加载库存数据出错，回退到JSON文件: {str(e)}")
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            current_data = json.load(f)
+
+        previous_data = None
+        previous_file = self.ding_sender.find_previous_json(file_path, os.path.dirname(file_path))
+        if previous_file:
+            self.logger.info(f"找到上一次库存文件: {previous_file}")
+            try:
+                with open(previous_file, 'r', encoding='utf-8') as f:
+                    previous_data = json.load(f)
+            except Exception as e:
+                self.logger.error(f"读取上一次库存文件时出错: {str(e)}")
+
+        return current_data, previous_data
+
     def send_inventory_report(self, file_path):
         """发送单个网站的库存报告"""
         try:
-            # 读取当前库存数据
-            with open(file_path, 'r', encoding='utf-8') as f:
-                current_data = json.load(f)
+            # 网站的增量对比引擎已同步到上一次快照时只需读取当前库存数据，
+            # 否则读取当前和上一次库存数据重新初始化对比引擎
+            site = os.path.basename(os.path.dirname(os.path.dirname(file_path)))
+            diff_engine = self.ding_sender.get_diff_engine(site, store=self.inventory_store)
+            current_token, previous_token = self._resolve_snapshot_tokens(file_path)
+
+            # 引擎已同步到上一次快照且存储中有本次快照的变化集合时，只读取新增、变化和下架的商品
+            delta = None
+            if diff_engine.last_token is not None and diff_engine.last_token in (current_token, previous_token):
+                if diff_engine.last_token == previous_token:
+                    delta = self._load_snapshot_delta(file_path, previous_token)
+                current_data = None if delta else self._load_current_inventory(file_path)
+                self.logger.debug(f"{site} 对比引擎已同步，跳过加载历史数据")
+            else:
+                current_data, previous_data = self._load_previous_inventory(file_path)
+                diff_engine.prime_from_history(previous_data, token=previous_token)
 
             # 记录库存数据基本信息
-            monitor_name = current_data.get("monitor", "未知监控器")
-            product_count = len(current_data) if isinstance(current_data, dict) else 0
+            monitor_name = current_data.get("monitor", "未知监控器") if current_data else "未知监控器"
+            if delta:
+                product_count = delta["product_count"]
+                self.logger.info(f"{site} 使用变化集合对比: 新增 {len(delta['new'])}, 变化 {len(delta['changed'])}, "
+                                 f"下架 {len(delta['removed'])}")
+            else:
+                product_count = len(current_data) if isinstance(current_data, dict) else 0
             self.logger.info(f"{monitor_name} 当前库存数据包含 {product_count} 个商品")
 
             # 如果monitor_name是"未知监控器"，尝试从文件路径提取网站名称
             if monitor_name == "未知监控器":
                 file_dir = os.path.dirname(file_path)
-                for site in ["cettire", "sugar", "mrporter", "antonioli", "duomo",
-                             "eleonora_bonucci", "suus", "mytheresa", "giglio",
-                             "grifo210", "julian", "d2store", "hermes", "rickowens"]:
-                    if site.lower() in file_dir.lower():
-                        monitor_name = site.capitalize()
+                for site_name in ["cettire", "sugar", "mrporter", "antonioli", "duomo",
+                                  "eleonora_bonucci", "suus", "mytheresa", "giglio",
+                                  "grifo210", "julian", "d2store", "hermes", "rickowens"]:
+                    if site_name.lower() in file_dir.lower():
+                        monitor_name = site_name.capitalize()
                         self.logger.info(f"从文件路径中识别出网站: {monitor_name}")
                         break
 
-            # 获取上一次的库存数据和最近三次历史数据
-            dir_path = os.path.dirname(file_path)
-            previous_file = self.ding_sender.find_previous_json(file_path, dir_path)
-            
-            # 获取最近三次历史记录用于防止误报
-            historical_files = self.ding_sender.find_recent_json_files(file_path, dir_path, count=3)
-            historical_data_list = []
-            
-            # 加载历史数据
-            for hist_file in historical_files:
-                try:
-                    with open(hist_file, 'r', encoding='utf-8') as f:
-                        hist_data = json.load(f)
-                        historical_data_list.append(hist_data)
-                        self.logger.debug(f"加载历史记录: {os.path.basename(hist_file)}")
-                except Exception as e:
-                    self.logger.warning(f"读取历史库存文件 {hist_file} 时出错: {str(e)}")
-            
-            self.logger.info(f"成功加载 {len(historical_data_list)} 个历史记录用于防止误报")
+            prev_product_count = diff_engine.previous_count
+            if prev_product_count:
+                self.logger.info(f"上一次库存数据包含 {prev_product_count} 个商品")
 
-            if previous_file:
-                self.logger.info(f"找到上一次库存文件: {previous_file}")
-                try:
-                    with open(previous_file, 'r', encoding='utf-8') as f:
-                        previous_data = json.load(f)
-                    prev_product_count = len(previous_data) if isinstance(previous_data, dict) else 0
-                    self.logger.info(f"上一次库存数据包含 {prev_product_count} 个商品")
-                    
-                    # 检查数据量差异是否异常
-                    if product_count > 0 and prev_product_count > 0:
-                        diff_ratio = abs(product_count - prev_product_count) / max(product_count, prev_product_count)
-                        if diff_ratio > 0.3:  # 如果差异超过30%
-                            self.logger.warning(f"当前数据({product_count}个)与上一次数据({prev_product_count}个)相差{diff_ratio:.1%}，超过阈值，可能是爬取异常")
-                            
-                            # 检查是否有重点监控商品
-                            key_products_count = sum(1 for _, item in current_data.items() 
-                                                   if isinstance(item, dict) and item.get("key_monitoring", False))
-                            
-                            if key_products_count > 0:
-                                self.logger.warning(f"数据包含 {key_products_count} 个重点监控商品，将谨慎处理变化检测")
-                except Exception as e:
-                    self.logger.error(f"读取上一次库存文件时出错: {str(e)}")
-                    previous_data = None
+                # 检查数据量差异是否异常
+                if product_count > 0:
+                    diff_ratio = abs(product_count - prev_product_count) / max(product_count, prev_product_count)
+                    if diff_ratio > 0.3:  # 如果差异超过30%
+                        self.logger.warning(f"当前数据({product_count}个)与上一次数据({prev_product_count}个)相差{diff_ratio:.1%}，超过阈值，可能是爬取异常")
+
+                        # 检查是否有重点监控商品
+                        products = diff_engine.iter_delta_products(delta) if delta else (current_data or {}).values()
+                        key_products_count = sum(1 for item in products
+                                               if isinstance(item, dict) and item.get("key_monitoring", False))
+
+                        if key_products_count > 0:
+                            self.logger.warning(f"数据包含 {key_products_count} 个重点监控商品，将谨慎处理变化检测")
             else:
-                self.logger.warning(f"未找到上一次库存文件，将无法比较变化")
-                previous_data = None
+                self.logger.warning(f"未找到上一次库存数据，将无法比较变化")
 
-            # 比较变化情况，传入历史数据用于防止误报
+            # 使用增量对比引擎比较变化情况，历史窗口用于防止误报
             try:
-                changes = self.ding_sender.compare_inventory(current_data, previous_data, historical_data_list)
+                if delta:
+                    changes = diff_engine.diff_delta(delta, token=current_token)
+                else:
+                    changes = diff_engine.diff(current_data, token=current_token)
 
                 # 记录变化详情
                 new_count = len(changes.get("new_products", []))
@@ -778,6 +1405,15 @@ class BalenciagaScheduler:
                 self.logger.error(f"错误详情: {traceback.format_exc()}")
                 return False
 
+            # 过滤 TTL 内已通知过的新增商品和重点商品变化
+            if self.alert_dedup:
+                try:
+                    changes, skipped_count = self.alert_dedup.filter_changes(site, changes)
+                    if skipped_count:
+                        self.logger.info(f"{monitor_name} 跳过 {skipped_count} 个已通知过的重复事件")
+                except Exception as e:
+                    self.logger.error(f"通知去重出错，将不过滤重复通知: {str(e)}")
+
             # 判断是否需要发送通知
             has_new_products = len(changes.get("new_products", [])) > 0
             has_key_changes = len(changes.get("key_product_changes", [])) > 0
@@ -799,63 +1435,18 @@ class BalenciagaScheduler:
                 ding_secret = ding_config['secret']
                 self.logger.info(f"使用 {monitor_name} 专用的钉钉机器人")
             
-            # 构建消息内容
+            # 构建消息内容，加入通知合并器，由 flush_notifications 合并同一机器人的消息后分段发送
             messages_sent = False
             
             # 1. 处理新增商品通知
             if has_new_products:
-                # 创建精简报告
-                new_count = len(changes["new_products"])
-                markdown_text = f"## {monitor_name}\n\n"
-                markdown_text += f"新增商品数: {new_count}\n\n"
-                markdown_text += f"新增时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                markdown_text += "============\n\n"
-
-                # 添加新增商品详情
-                for i, product in enumerate(changes["new_products"]):
-                    name = product.get('name', '未知商品')
-                    url = product.get('url', '')
-                    price = product.get('price', '')
-
-                    # 修改格式以确保钉钉正确渲染递增编号
-                    markdown_text += f"{i + 1}. **{name}**"
-                    if url:
-                        markdown_text += f" [【查看商品】]({url})"
-                    markdown_text += "  \n  "  # 注意这里只用一个换行
-                    
-                    if price:
-                        markdown_text += f"价格: {price}" + "  \n  "  # 只用一个换行
-
-                    # 添加尺寸信息（如果存在）
-                    inventory_status = product.get('inventory', {}).items()
-                    if inventory_status:
-                        markdown_text += "尺寸: "
-                        for size_name, _size_status in inventory_status:
-                            markdown_text += f"{size_name}; "
-                        markdown_text += "  \n  "
-
-                # 生成钉钉消息
-                markdown_message = {
-                    "title": f"{monitor_name} - 新增商品通知",
-                    "text": markdown_text
-                }
-
-                # 发送钉钉消息
-                try:
-                    # 记录将要发送的消息概要
-                    self.logger.info(f"准备发送钉钉消息: {markdown_message['title']}")
-
-                    result = self.ding_sender.send_dingtalk_message(
-                        ding_url,
-                        ding_secret,
-                        markdown_message
-                    )
-
-                    self.logger.info(f"已发送新增商品通知: {result}")
-                    messages_sent = True
-                except Exception as e:
-                    self.logger.error(f"发送钉钉消息时出错: {str(e)}")
-                    self.logger.error(f"错误详情: {traceback.format_exc()}")
+                header, entries = self._format_new_products(monitor_name, changes["new_products"])
+                entry_alerts = self._hold_alerts(site, new_products=changes["new_products"])
+                self.notification_composer.add(ding_url, ding_secret, monitor_name,
+                                               f"{monitor_name} - 新增商品通知", header, entries,
+                                               entry_alerts=entry_alerts)
+                self.logger.info(f"已加入新增商品通知: {monitor_name}, {len(entries)} 个商品")
+                messages_sent = True
             
             # 2. 处理重点监控商品变化通知
             if has_key_changes:
@@ -884,71 +1475,13 @@ class BalenciagaScheduler:
                 if not filtered_key_changes:
                     self.logger.info(f"{monitor_name} 的重点监控商品变化经过货币转换检验后无需发送通知")
                 else:
-                    # 创建精简报告
-                    key_count = len(filtered_key_changes)
-                    markdown_text = f"## {monitor_name}\n\n"
-                    markdown_text += f"重点监控商品变化数: {key_count}\n\n"
-                    markdown_text += f"变化时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                    markdown_text += "============\n\n"
-
-                    # 添加变化商品详情
-                    for i, product in enumerate(filtered_key_changes):
-                        name = product.get('name', '未知商品')
-                        url = product.get('url', '')
-                        
-                        # 修改格式以确保钉钉正确渲染递增编号
-                        markdown_text += f"{i + 1}. **{name}**"
-                        if url:
-                            markdown_text += f" [【查看商品】]({url})"
-                        markdown_text += "  \n  "  # 注意这里只用一个换行
-                        
-                        # 添加价格变化信息
-                        price_change = product.get('price_change')
-                        if price_change:
-                            from_price = price_change.get('from', '')
-                            to_price = price_change.get('to', '')
-                            markdown_text += f"价格变化: {from_price} → {to_price}" + "  \n  "
-                        
-                        # 添加尺寸变化信息
-                        size_changes = product.get('size_changes', [])
-                        if size_changes:
-                            markdown_text += "尺寸变化:  \n  "
-                            for change in size_changes:
-                                size = change.get('size', '')
-                                from_status = change.get('from', '')
-                                to_status = change.get('to', '')
-                                change_type = change.get('type', '')
-                                
-                                change_desc = f"- {size}: {from_status} → {to_status}"
-                                if change_type == "stock_in":
-                                    change_desc += " (补货)"
-                                elif change_type == "stock_out":
-                                    change_desc += " (售罄)"
-                                
-                                markdown_text += change_desc + "  \n  "
-
-                    # 生成钉钉消息
-                    markdown_message = {
-                        "title": f"{monitor_name} - 重点商品变化通知",
-                        "text": markdown_text
-                    }
-
-                    # 发送钉钉消息
-                    try:
-                        # 记录将要发送的消息概要
-                        self.logger.info(f"准备发送钉钉消息: {markdown_message['title']}")
-
-                        result = self.ding_sender.send_dingtalk_message(
-                            ding_url,
-                            ding_secret,
-                            markdown_message
-                        )
-
-                        self.logger.info(f"已发送重点商品变化通知: {result}")
-                        messages_sent = True
-                    except Exception as e:
-                        self.logger.error(f"发送钉钉消息时出错: {str(e)}")
-                        self.logger.error(f"错误详情: {traceback.format_exc()}")
+                    header, entries = self._format_key_changes(monitor_name, filtered_key_changes)
+                    entry_alerts = self._hold_alerts(site, key_product_changes=filtered_key_changes)
+                    self.notification_composer.add(ding_url, ding_secret, monitor_name,
+                                                   f"{monitor_name} - 重点商品变化通知", header, entries,
+                                                   entry_alerts=entry_alerts)
+                    self.logger.info(f"已加入重点商品变化通知: {monitor_name}, {len(entries)} 个商品")
+                    messages_sent = True
             
             return messages_sent
 
@@ -993,30 +1526,47 @@ class BalenciagaScheduler:
         for crawler_name, config in self.crawler_configs.items():
             proxy_info = f"代理: {config.get('proxy_type', 'None')}" if config.get('proxy_type') else "无代理"
             headless_info = "无头模式" if config.get('is_headless', True) else "有界面模式"
-            cycle_info = f"特殊周期({self.special_cycle_multiplier}倍)" if crawler_name in self.special_cycle_crawlers else "普通周期"
+            if self.site_scheduler:
+                cycle_info = "自适应轮询"
+            else:
+                cycle_info = f"特殊周期({self.special_cycle_multiplier}倍)" if crawler_name in self.special_cycle_crawlers else "普通周期"
             self.logger.info(f"爬虫配置 - {crawler_name}: {headless_info}, {proxy_info}, {cycle_info}")
 
         # 输出特殊周期配置信息
-        if self.special_cycle_crawlers:
+        if self.special_cycle_crawlers and not self.site_scheduler:
             self.logger.info(f"特殊周期爬虫配置:")
             self.logger.info(f"  - 爬虫列表: {self.special_cycle_crawlers}")
             self.logger.info(f"  - 运行频率: 每 {self.loop_time * self.special_cycle_multiplier} 分钟执行一次")
             self.logger.info(f"  - 普通周期: 每 {self.loop_time} 分钟, 特殊周期: 每 {self.special_cycle_multiplier} 个普通周期")
 
-        # 每5分钟运行一次爬虫和库存变化检测
-        schedule.every(self.loop_time).minutes.do(self.run_all_crawlers)
+        if self.site_scheduler:
+            # 自适应轮询：定期检查优先队列，运行所有到期的爬虫
+            schedule.every(self.adaptive_check_seconds).seconds.do(self.run_due_crawlers)
+            self.logger.info(f"已设置定时任务: 每 {self.adaptive_check_seconds} 秒检查一次到期的爬虫（自适应轮询）")
+        else:
+            # 每5分钟运行一次爬虫和库存变化检测
+            schedule.every(self.loop_time).minutes.do(self.run_all_crawlers)
+            self.logger.info(f"已设置定时任务: 每 {self.loop_time} 分钟执行一次爬虫任务")
+        # 定期发送合并窗口已到期的钉钉通知
+        schedule.every(5).seconds.do(self.flush_notifications)
         # 每天凌晨3点执行一次日志和数据清理
         schedule.every().day.at("03:00").do(self.cleanup_scheduler_files)
         # 每小时重新加载一次排除列表配置
         schedule.every(1).hours.do(self.reload_excluded_monitors)
-        
-        self.logger.info(f"已设置定时任务: 每 {self.loop_time} 分钟执行一次爬虫任务")
+
         self.logger.info("已设置定时任务: 每天凌晨3点执行一次日志和数据清理")
         self.logger.info("已设置定时任务: 每小时重新加载一次排除列表配置")
 
+        # 启动钉钉发件箱的后台发送线程，继续发送上次退出时未发送的消息
+        if self.notify_outbox:
+            self.notify_outbox.start()
+
         # 启动时先执行一次所有任务
         self.logger.info("首次执行爬虫任务")
-        self.run_all_crawlers()
+        if self.site_scheduler:
+            self.run_due_crawlers()
+        else:
+            self.run_all_crawlers()
 
         self.logger.info("调度器已启动，等待执行定时任务")
 
@@ -1037,6 +1587,11 @@ class BalenciagaScheduler:
                 # 出错后等待30秒再继续
                 time.sleep(30)
 
+        self.flush_notifications(force=True)
+        if self.notify_outbox:
+            self.notify_outbox.stop()
+        self.ding_sender.close()
+
     def cleanup_scheduler_files(self):
         """
         清理调度器日志和临时文件，避免占用过多磁盘空间
@@ -1049,6 +1604,18 @@ class BalenciagaScheduler:
             
             # 清理各个网站的数据文件
             self._cleanup_site_data_files()
+
+            # 清理通知去重索引中已过期的事件
+            if self.alert_dedup:
+                deleted_count = self.alert_dedup.prune()
+                if deleted_count:
+                    self.logger.info(f"已清理通知去重索引中 {deleted_count} 条过期记录")
+
+            # 清理发件箱中已发送和发送失败的旧消息
+            if self.notify_outbox:
+                deleted_count = self.notify_outbox.prune(self.notify_outbox_keep_days)
+                if deleted_count:
+                    self.logger.info(f"已清理钉钉发件箱中 {deleted_count} 条旧消息")
             
             self.logger.info("调度器日志和数据清理任务完成")
         except Exception as e:
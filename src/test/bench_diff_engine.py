@@ -0,0 +1,601 @@
+"""
+库存对比引擎基准测试
+使用 10k 个合成商品模拟多个调度周期，对比以下方式的耗时：
+1. 原实现：引入增量对比引擎之前的 DingSender.compare_inventory（原样保留在本文件的 LegacyDingSender 中），
+   与原调度器一样每个周期读取当前、上一次和最近三次历史 JSON 文件
+2. 增量对比：DingSender.create_diff_engine 创建的对比引擎，每个网站保留一个，每个周期只读取当前 JSON 文件
+3. 变化集合：同一个引擎的 diff_delta，只传入新增、变化和下架的商品（商品状态存储读取变化集合的开销不计入）
+
+分别给出包含和不包含 JSON 读取的耗时。
+原实现按商品名称、增量对比按稳定标识匹配，尺码变化类型也不同，变化数量只逐周期对比并报告，不要求完全一致。
+
+运行方式: python src/test/bench_diff_engine.py [商品数量] [周期数]
+"""
+import os
+import sys
+import copy
+import json
+import random
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(current_dir)))
+
+from src.common.diff_engine import InventoryDiffEngine
+from src.ding_sender.ding_sender import DingSender
+
+SIZES = ["XS", "S", "M", "L", "XL", "36", "37", "38", "39", "40", "41", "42"]
+STATUSES = ["In Stock", "Sold Out", "Limited"]
+
+
+class LegacyDingSender:
+    """引入增量对比引擎之前的 DingSender 对比逻辑（原样保留，仅作为基准）"""
+
+    @staticmethod
+    def _is_currency_conversion_change(from_price, to_price):
+        """
+        检查价格变化是否只是货币单位转换
+        例如：$ 459.90 → € 434.00
+        
+        Args:
+            from_price: 原价格字符串
+            to_price: 新价格字符串
+            
+        Returns:
+            bool: 如果是货币单位转换则返回True，否则返回False
+        """
+        if not from_price or not to_price:
+            return False
+            
+        # 常见货币符号
+        currency_symbols = ['$', '€', '£', '¥', '₽', 'USD', 'EUR', 'GBP', 'JPY', 'RUB', 'CNY']
+        
+        # 提取货币符号
+        from_currency = None
+        to_currency = None
+        
+        for symbol in currency_symbols:
+            if symbol in from_price:
+                from_currency = symbol
+            if symbol in to_price:
+                to_currency = symbol
+                
+        # 如果检测到不同的货币符号，很可能是货币转换
+        if from_currency and to_currency and from_currency != to_currency:
+            # 进一步检查价格数值是否在合理的汇率范围内
+            import re
+            from_num_match = re.search(r'[\d,]+\.?\d*', from_price)
+            to_num_match = re.search(r'[\d,]+\.?\d*', to_price)
+            
+            if from_num_match and to_num_match:
+                try:
+                    from_value = float(from_num_match.group().replace(',', ''))
+                    to_value = float(to_num_match.group().replace(',', ''))
+                    
+                    # 计算价格比率
+                    ratio = to_value / from_value if from_value > 0 else 0
+                    
+                    # 常见汇率范围检查（大致范围，不需要精确）
+                    # USD/EUR 通常在 0.8-1.2 之间
+                    # USD/GBP 通常在 0.7-0.9 之间
+                    # 如果比率在合理的汇率范围内，认为是货币转换
+                    if 0.5 <= ratio <= 2.0:  # 宽松的汇率范围
+                        return True
+                        
+                except (ValueError, ZeroDivisionError):
+                    pass
+                    
+        return False
+
+    @staticmethod
+    def compare_inventory(current_data, previous_data, historical_data_list=None):
+        """
+        比较当前和上一次的库存数据，返回变化情况
+        支持两种数据格式:
+        1. 带products字段的格式 (原有格式)
+        2. 键值对直接存储商品信息的格式 (新格式)
+        
+        Args:
+            current_data: 当前库存数据
+            previous_data: 上一次库存数据
+            historical_data_list: 最近几次的历史库存数据列表，用于防止误报
+        """
+        changes = {
+            "new_products": [],  # 新增产品
+            "removed_products": [],  # 移除产品
+            "inventory_changes": [],  # 库存变化
+            "key_product_changes": []  # 重点监控商品的价格或尺寸变化
+        }
+
+        if not previous_data:
+            # 如果没有上一次数据，则当前所有产品都视为新增
+            if "products" in current_data:
+                # 原有格式
+                changes["new_products"] = current_data.get("products", [])
+            else:
+                # 新格式: 将键值对转换为产品列表
+                for key, product in current_data.items():
+                    # 跳过非商品字段
+                    if key in ["monitor", "timestamp"]:
+                        continue
+                    changes["new_products"].append(product)
+            return changes
+
+        # 处理原有格式的数据 (带products字段)
+        if "products" in current_data or "products" in previous_data:
+            current_products = {p.get("name"): p for p in current_data.get("products", [])}
+            previous_products = {p.get("name"): p for p in previous_data.get("products", [])}
+        else:
+            # 处理新格式的数据 (键值对直接存储商品信息)
+            current_products = {}
+            previous_products = {}
+            
+            # 提取当前商品数据
+            for key, product in current_data.items():
+                if key in ["monitor", "timestamp"]:
+                    continue
+                product_name = product.get("name", key)
+                current_products[product_name] = product
+                
+            # 提取上一次商品数据
+            for key, product in previous_data.items():
+                if key in ["monitor", "timestamp"]:
+                    continue
+                product_name = product.get("name", key)
+                previous_products[product_name] = product
+
+        # 处理历史数据，构建历史商品库存记录
+        historical_products = {}  # {商品名称: [历史记录1, 历史记录2, ...]}
+        historical_key_products_values = {}  # {商品名称: {价格: [历史价格列表], 尺寸: [历史尺寸列表]}}
+        
+        if historical_data_list:
+            for historical_data in historical_data_list:
+                if not historical_data:
+                    continue
+                    
+                # 处理历史数据格式
+                if "products" in historical_data:
+                    # 原有格式
+                    hist_products = {p.get("name"): p for p in historical_data.get("products", [])}
+                else:
+                    # 新格式
+                    hist_products = {}
+                    for key, product in historical_data.items():
+                        if key in ["monitor", "timestamp"]:
+                            continue
+                        product_name = product.get("name", key)
+                        hist_products[product_name] = product
+                
+                # 记录历史商品
+                for name, product in hist_products.items():
+                    if name not in historical_products:
+                        historical_products[name] = []
+                    historical_products[name].append(product)
+                    
+                    # 如果是重点监控商品，记录其历史价格和尺寸值
+                    if product.get("key_monitoring", False):
+                        if name not in historical_key_products_values:
+                            historical_key_products_values[name] = {"prices": set(), "sizes": set()}
+                        
+                        # 记录历史价格
+                        price = product.get("price", "")
+                        if price:
+                            historical_key_products_values[name]["prices"].add(price)
+                        
+                        # 记录历史尺寸状态
+                        if "inventory" in product:
+                            # 新格式
+                            inventory = product["inventory"]
+                            for size, status in inventory.items():
+                                historical_key_products_values[name]["sizes"].add(f"{size}:{status}")
+                        elif "inventory_status" in product:
+                            # 原有格式
+                            for status_info in product["inventory_status"]:
+                                status = status_info.get("status", "")
+                                sizes = status_info.get("sizes", [])
+                                for size in sizes:
+                                    historical_key_products_values[name]["sizes"].add(f"{size}:{status}")
+
+        # 检查当前和上一次数据的商品数量差异
+        current_count = len(current_products)
+        previous_count = len(previous_products)
+        count_diff_ratio = abs(current_count - previous_count) / max(current_count, previous_count) if max(current_count, previous_count) > 0 else 0
+        
+        # 如果数据量差异过大（超过30%），可能是爬取异常，对重点监控商品特殊处理
+        is_data_suspicious = count_diff_ratio > 0.3
+        
+        # 找出新增产品（排除可能因爬取失败导致的"假新增"商品和历史上已出现的商品）
+        for name, product in current_products.items():
+            if name not in previous_products:
+                # 检查该商品是否在历史记录中出现过
+                is_historical_product = name in historical_products
+                
+                # 如果是重点监控商品且数据可疑，不将其标记为新增
+                is_key_product = product.get("key_monitoring", False)
+                if is_data_suspicious and is_key_product:
+                    continue
+                
+                # 如果商品在历史记录中出现过，不标记为新增（可能是爬取遗漏后恢复）
+                if is_historical_product:
+                    continue
+                    
+                changes["new_products"].append(product)
+
+        # 找出移除产品（排除可能因爬取失败导致的"假移除"重点监控商品）
+        for name, product in previous_products.items():
+            if name not in current_products:
+                # 如果是重点监控商品且数据可疑，不将其标记为移除
+                is_key_product = product.get("key_monitoring", False)
+                if is_data_suspicious and is_key_product:
+                    continue
+                changes["removed_products"].append(product)
+
+        # 找出库存变化和重点监控商品的变化
+        for name, current_product in current_products.items():
+            if name in previous_products:
+                previous_product = previous_products[name]
+                is_key_product = current_product.get("key_monitoring", False)
+                has_changes = False
+                change_details = {"price_change": None, "size_changes": []}
+                
+                # 检查价格变化（仅对重点监控商品）
+                if is_key_product and "price" in current_product and "price" in previous_product:
+                    current_price = current_product["price"]
+                    previous_price = previous_product["price"]
+                    
+                    # 检查价格变化是否可疑（例如从空变为有值，或价格变化过大）
+                    price_change_suspicious = False
+                    if not previous_price and current_price:  # 从无价格变为有价格
+                        price_change_suspicious = True
+                    elif previous_price and current_price:
+                        # 尝试提取数值部分进行比较
+                        import re
+                        prev_num = re.search(r'[\d,.]+', previous_price)
+                        curr_num = re.search(r'[\d,.]+', current_price)
+                        
+                        if prev_num and curr_num:
+                            try:
+                                prev_val = float(prev_num.group().replace(',', ''))
+                                curr_val = float(curr_num.group().replace(',', ''))
+                                # 如果价格变化超过50%，可能是可疑的
+                                if abs(curr_val - prev_val) / max(curr_val, prev_val) > 0.5:
+                                    price_change_suspicious = True
+                            except (ValueError, ZeroDivisionError):
+                                # 如果无法解析为数字，仍然比较原始字符串
+                                if current_price != previous_price:
+                                    if is_data_suspicious:
+                                        price_change_suspicious = True
+                    
+                    # 检查当前价格是否在历史记录中出现过
+                    price_in_history = False
+                    if name in historical_key_products_values and current_price in historical_key_products_values[name]["prices"]:
+                        price_in_history = True
+                    
+                    # 检查是否为货币转换变化（特别针对D2Store等可能有货币转换的站点）
+                    is_currency_conversion = LegacyDingSender._is_currency_conversion_change(previous_price, current_price)
+                    
+                    # 只有在数据不可疑、价格变化不可疑、当前价格未在历史中出现且不是货币转换的情况下才记录价格变化
+                    if (current_price != previous_price and 
+                        (not is_data_suspicious or not price_change_suspicious) and 
+                        not price_in_history and 
+                        not is_currency_conversion):
+                        change_details["price_change"] = {
+                            "from": previous_price,
+                            "to": current_price
+                        }
+                        has_changes = True
+
+                # 检查"inventory"字段 (新格式)
+                if "inventory" in current_product and "inventory" in previous_product:
+                    current_inventory = current_product["inventory"]
+                    previous_inventory = previous_product["inventory"]
+                    
+                    # 检查库存数据是否可疑
+                    inventory_suspicious = False
+                    if is_key_product and is_data_suspicious:
+                        # 如果尺码数量差异过大，可能是可疑的
+                        curr_size_count = len(current_inventory)
+                        prev_size_count = len(previous_inventory)
+                        if abs(curr_size_count - prev_size_count) / max(curr_size_count, prev_size_count) > 0.3 if max(curr_size_count, prev_size_count) > 0 else False:
+                            inventory_suspicious = True
+                    
+                    # 检查是否有变化
+                    if current_inventory != previous_inventory and (not is_key_product or not inventory_suspicious):
+                        size_changes = []
+                        
+                        # 检查每个尺码的变化
+                        all_sizes = set(current_inventory.keys()) | set(previous_inventory.keys())
+                        for size in all_sizes:
+                            curr_status = current_inventory.get(size, "Sold Out")
+                            prev_status = previous_inventory.get(size, "Sold Out")
+                            
+                            if curr_status != prev_status:
+                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
+                                status_in_history = False
+                                if (is_key_product and name in historical_key_products_values):
+                                    size_status_key = f"{size}:{curr_status}"
+                                    if size_status_key in historical_key_products_values[name]["sizes"]:
+                                        status_in_history = True
+                                
+                                # 只有当前状态未在历史记录中出现时才记录变化
+                                if not status_in_history:
+                                    size_change = {
+                                        "size": size,
+                                        "from": prev_status,
+                                        "to": curr_status,
+                                        "type": "stock_changed"
+                                    }
+                                    size_changes.append(size_change)
+                                    change_details["size_changes"].append(size_change)
+                                    has_changes = True
+                                
+                        if size_changes and not is_key_product:
+                            product_change = current_product.copy()
+                            product_change["size_changes"] = size_changes
+                            changes["inventory_changes"].append(product_change)
+                    
+                    # 处理重点监控商品的变化
+                    if is_key_product and has_changes and not inventory_suspicious:
+                        key_product_change = current_product.copy()
+                        key_product_change.update(change_details)
+                        changes["key_product_changes"].append(key_product_change)
+                    
+                    continue  # 如果已处理inventory字段，跳过下面的inventory_status处理
+                
+                # 处理"inventory_status"字段 (原有格式)
+                # 将当前产品的状态转换为更易于比较的格式
+                current_status = {}
+                for status_info in current_product.get("inventory_status", []):
+                    status = status_info.get("status", "")
+                    sizes = status_info.get("sizes", [])
+                    for size in sizes:
+                        current_status[size] = status
+
+                # 将上一次产品的状态转换为更易于比较的格式
+                previous_status = {}
+                for status_info in previous_product.get("inventory_status", []):
+                    status = status_info.get("status", "")
+                    sizes = status_info.get("sizes", [])
+                    for size in sizes:
+                        previous_status[size] = status
+
+                # 检查库存数据是否可疑
+                inventory_suspicious = False
+                if is_key_product and is_data_suspicious:
+                    # 如果尺码数量差异过大，可能是可疑的
+                    curr_size_count = len(current_status)
+                    prev_size_count = len(previous_status)
+                    if abs(curr_size_count - prev_size_count) / max(curr_size_count, prev_size_count) > 0.3 if max(curr_size_count, prev_size_count) > 0 else False:
+                        inventory_suspicious = True
+
+                # 检查状态变化
+                size_changes = []
+
+                # 只有在数据不可疑或不是重点监控商品的情况下才进行详细的状态变化检查
+                if not (is_key_product and inventory_suspicious):
+                    # 1. 检查尺码从有库存变为缺货
+                    for size, prev_status in previous_status.items():
+                        if prev_status.lower() != "sold out":
+                            curr_status = current_status.get(size, "")
+                            if curr_status.lower() == "sold out":
+                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
+                                status_in_history = False
+                                if (is_key_product and name in historical_key_products_values):
+                                    size_status_key = f"{size}:{curr_status}"
+                                    if size_status_key in historical_key_products_values[name]["sizes"]:
+                                        status_in_history = True
+                                
+                                # 只有当前状态未在历史记录中出现时才记录变化
+                                if not status_in_history:
+                                    size_change = {
+                                        "size": size,
+                                        "from": prev_status,
+                                        "to": curr_status,
+                                        "type": "stock_out"
+                                    }
+                                    size_changes.append(size_change)
+                                    change_details["size_changes"].append(size_change)
+                                    has_changes = True
+
+                    # 2. 检查尺码从缺货变为有库存
+                    for size, curr_status in current_status.items():
+                        if curr_status.lower() != "sold out":
+                            prev_status = previous_status.get(size, "")
+                            if prev_status.lower() == "sold out" or size not in previous_status:
+                                # 对于重点监控商品，检查当前状态是否在历史记录中出现过
+                                status_in_history = False
+                                if (is_key_product and name in historical_key_products_values):
+                                    size_status_key = f"{size}:{curr_status}"
+                                    if size_status_key in historical_key_products_values[name]["sizes"]:
+                                        status_in_history = True
+                                
+                                # 只有当前状态未在历史记录中出现时才记录变化
+                                if not status_in_history:
+                                    size_change = {
+                                        "size": size,
+                                        "from": prev_status,
+                                        "to": curr_status,
+                                        "type": "stock_in"
+                                    }
+                                    size_changes.append(size_change)
+                                    change_details["size_changes"].append(size_change)
+                                    has_changes = True
+
+                    # 如果有尺码变化，将产品添加到变化列表
+                    if size_changes and not is_key_product:
+                        product_change = current_product.copy()
+                        product_change["size_changes"] = size_changes
+                        changes["inventory_changes"].append(product_change)
+                
+                # 处理重点监控商品的变化
+                if is_key_product and has_changes and not inventory_suspicious:
+                    key_product_change = current_product.copy()
+                    key_product_change.update(change_details)
+                    changes["key_product_changes"].append(key_product_change)
+
+        return changes
+
+
+def generate_products(count, rng):
+    """生成合成商品数据"""
+    products = {}
+    for i in range(count):
+        name = f"Balenciaga Product {i}"
+        products[f"{name}_{i}"] = {
+            "name": name,
+            "url": f"https://example.com/product/{i}",
+            "price": f"€ {rng.randint(300, 3000)}.00",
+            "inventory": {size: rng.choice(STATUSES) for size in rng.sample(SIZES, rng.randint(3, 8))},
+            "key_monitoring": rng.random() < 0.05,
+            "timestamp": "2025-01-01T00:00:00",
+        }
+    return products
+
+
+def mutate_products(products, rng, change_ratio=0.01, cycle=0):
+    """生成下一个周期的数据：约 change_ratio 的商品发生尺码/价格变化，少量商品上架和下架"""
+    next_products = {}
+    keys = list(products.keys())
+    changed_keys = set(rng.sample(keys, max(1, int(len(keys) * change_ratio))))
+    removed_keys = set(rng.sample(keys, max(1, int(len(keys) * change_ratio / 5))))
+
+    for key in keys:
+        if key in removed_keys:
+            continue
+        product = products[key]
+        if key in changed_keys:
+            product = copy.deepcopy(product)
+            size = rng.choice(list(product["inventory"].keys()) or SIZES)
+            product["inventory"][size] = rng.choice(STATUSES)
+            if rng.random() < 0.3:
+                product["price"] = f"€ {rng.randint(300, 3000)}.00"
+        else:
+            product = dict(product)
+        product["timestamp"] = f"cycle-{cycle}"
+        next_products[key] = product
+
+    for i in range(len(removed_keys)):
+        name = f"Balenciaga New Product {cycle}_{i}"
+        next_products[f"{name}_new"] = {
+            "name": name,
+            "url": f"https://example.com/new/{cycle}/{i}",
+            "price": "€ 990.00",
+            "inventory": {"M": "In Stock"},
+            "key_monitoring": False,
+            "timestamp": f"cycle-{cycle}",
+        }
+    return next_products
+
+
+def summarize(changes):
+    """变化数量摘要，用于逐周期对比各方式的结果"""
+    return tuple(len(changes[change_type]) for change_type in
+                 ("new_products", "removed_products", "inventory_changes", "key_product_changes"))
+
+
+def build_delta(resolver, previous_data, current_data):
+    """按稳定标识生成两个快照之间的变化集合，结构与 InventoryStore.load_snapshot_delta 一致"""
+    previous_ids = resolver.assign_ids(previous_data)
+    current_ids = resolver.assign_ids(current_data)
+    previous_products = {previous_ids[key]: product for key, product in previous_data.items()}
+    delta = {"new": {}, "changed": {}, "removed": [], "product_count": len(current_data)}
+    for key, product in current_data.items():
+        product_id = current_ids[key]
+        previous_product = previous_products.pop(product_id, None)
+        if previous_product is None:
+            delta["new"][product_id] = product
+        elif InventoryDiffEngine.content_hash(previous_product) != InventoryDiffEngine.content_hash(product):
+            delta["changed"][product_id] = product
+    delta["removed"] = list(previous_products)
+    return delta
+
+
+def load_json(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def report(label, elapsed, cycles, baseline=None):
+    line = f"{label}: 总耗时 {elapsed:.3f} 秒, 平均每周期 {elapsed / cycles * 1000:.1f} 毫秒"
+    if baseline:
+        line += f", 加速比 {baseline / elapsed:.2f}x"
+    print(line)
+
+
+def main():
+    product_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(42)
+
+    print(f"生成 {product_count} 个合成商品，模拟 {cycles} 个周期...")
+    snapshots = [generate_products(product_count, rng)]
+    for cycle in range(1, cycles + 4):
+        snapshots.append(mutate_products(snapshots[-1], rng, cycle=cycle))
+    cycle_indexes = range(3, len(snapshots))
+    measured_cycles = len(cycle_indexes)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = []
+        for index, snapshot in enumerate(snapshots):
+            file_path = os.path.join(temp_dir, f"inventory_{index:04d}.json")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            file_paths.append(file_path)
+
+        # 原实现：每个周期读取当前、上一次和最近三次历史数据，再调用 compare_inventory
+        legacy_results = []
+        legacy_compare_time = 0.0
+        start_time = time.perf_counter()
+        for index in cycle_indexes:
+            current_data = load_json(file_paths[index])
+            previous_data = load_json(file_paths[index - 1])
+            historical_data_list = [load_json(file_paths[index - offset]) for offset in (1, 2, 3)]
+            compare_start = time.perf_counter()
+            changes = LegacyDingSender.compare_inventory(current_data, previous_data, historical_data_list)
+            legacy_compare_time += time.perf_counter() - compare_start
+            legacy_results.append(summarize(changes))
+        legacy_time = time.perf_counter() - start_time
+
+        # 增量对比：引擎只初始化一次，之后每个周期只读取当前数据
+        incremental_results = []
+        incremental_diff_time = 0.0
+        engine = DingSender.create_diff_engine("bench")
+        engine.prime_from_history(snapshots[2], [snapshots[2], snapshots[1], snapshots[0]])
+        start_time = time.perf_counter()
+        for index in cycle_indexes:
+            current_data = load_json(file_paths[index])
+            diff_start = time.perf_counter()
+            incremental_results.append(summarize(engine.diff(current_data)))
+            incremental_diff_time += time.perf_counter() - diff_start
+        incremental_time = time.perf_counter() - start_time
+
+    # 变化集合：只传入新增、变化和下架的商品，变化集合在计时之外生成
+    delta_resolver = DingSender.create_diff_engine("bench").id_resolver
+    deltas = [build_delta(delta_resolver, snapshots[index - 1], snapshots[index]) for index in cycle_indexes]
+    delta_results = []
+    engine = DingSender.create_diff_engine("bench")
+    engine.prime_from_history(snapshots[2], [snapshots[2], snapshots[1], snapshots[0]])
+    start_time = time.perf_counter()
+    for delta in deltas:
+        delta_results.append(summarize(engine.diff_delta(delta)))
+    delta_time = time.perf_counter() - start_time
+
+    report("原实现（含读取 5 个 JSON 文件）", legacy_time, measured_cycles)
+    report("增量对比（含读取当前 JSON 文件）", incremental_time, measured_cycles, legacy_time)
+    report("变化集合 diff_delta", delta_time, measured_cycles, legacy_time)
+    report("原实现（仅 compare_inventory）", legacy_compare_time, measured_cycles)
+    report("增量对比（仅 diff）", incremental_diff_time, measured_cycles, legacy_compare_time)
+
+    matched_cycles = sum(1 for legacy, incremental in zip(legacy_results, incremental_results)
+                         if legacy == incremental)
+    print(f"原实现与增量对比变化数量一致的周期: {matched_cycles}/{measured_cycles}")
+    for cycle, (legacy, incremental) in enumerate(zip(legacy_results, incremental_results), start=1):
+        if legacy != incremental:
+            print(f"  周期 {cycle}: 原实现 {legacy}, 增量对比 {incremental}")
+    print(f"增量对比与变化集合结果一致: {'是' if incremental_results == delta_results else '否'}")
+    print(f"最后一个周期的变化数量 (新增, 下架, 库存变化, 重点商品变化): {incremental_results[-1]}")
+
+
+if __name__ == '__main__':
+    main()
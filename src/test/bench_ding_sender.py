@@ -0,0 +1,108 @@
+"""
+钉钉消息发送基准测试
+在本地启动一个模拟钉钉 webhook 的 HTTP/1.1 服务器，14 个机器人轮流发送消息，对比每秒发送的消息数：
+1. 原方式：每条消息调用一次 requests.post，每次新建连接
+2. 新方式：DingSender 的会话连接池，所有机器人复用长连接
+
+同时统计服务器接受的 TCP 连接数。本地服务器没有 TLS，实际发往 oapi.dingtalk.com 时
+每个新连接还需要一次 TLS 握手，连接复用的收益比本地结果更大
+
+运行方式: python src/test/bench_ding_sender.py [消息数量]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(current_dir)))
+
+from src.ding_sender.ding_sender import DingSender
+
+ROBOT_COUNT = 14
+RESPONSE_BODY = json.dumps({"errcode": 0, "errmsg": "ok"}).encode("utf-8")
+
+
+class DingTalkHandler(BaseHTTPRequestHandler):
+    """模拟钉钉机器人接口：读取请求体后返回 errcode 0，支持长连接"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写入，长连接上需要关闭 Nagle 算法，否则每次响应都会等待客户端的延迟确认
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with DingTalkHandler.lock:
+            DingTalkHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LegacyTransport:
+    """原 send_dingtalk_message 的请求方式：每条消息一次 requests.post"""
+
+    def post(self, url, data=None, timeout=None):
+        return requests.post(
+            url,
+            headers={'Content-Type': 'application/json', 'Charset': 'UTF-8'},
+            data=data,
+            proxies={'http': None, 'https': None},
+            timeout=timeout,
+        )
+
+
+def run(sender, webhooks, count):
+    DingTalkHandler.connections = 0
+    message = {"title": "Balenciaga - 新增商品通知", "text": "## Balenciaga\n\n新增商品数: 1\n\n" + "x" * 2000}
+    start = time.perf_counter()
+    for i in range(count):
+        result = sender.send_dingtalk_message(webhooks[i % len(webhooks)], "SEC-bench-secret", message)
+        assert result.get("errcode") == 0, result
+    elapsed = time.perf_counter() - start
+    return count / elapsed, DingTalkHandler.connections
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DingTalkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    webhooks = [f"http://127.0.0.1:{port}/robot/send?access_token=site{i}" for i in range(ROBOT_COUNT)]
+
+    legacy = DingSender("", "", "")
+    legacy.session = LegacyTransport()
+    pooled = DingSender("", "", "")
+    # 关闭发送日志，只比较请求本身
+    logging.getLogger("src.ding_sender.ding_sender").setLevel(logging.WARNING)
+
+    print(f"消息数量: {count}, 机器人数量: {ROBOT_COUNT}")
+    old_rate, old_connections = run(legacy, webhooks, count)
+    print(f"原方式（每条消息 requests.post）: {old_rate:.0f} 条/秒, TCP 连接数 {old_connections}")
+    new_rate, new_connections = run(pooled, webhooks, count)
+    print(f"新方式（会话连接池长连接）: {new_rate:.0f} 条/秒, TCP 连接数 {new_connections}")
+    print(f"加速比: {new_rate / old_rate:.1f}x")
+
+    pooled.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
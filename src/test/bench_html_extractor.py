@@ -0,0 +1,231 @@
+"""
+HTML目录提取基准测试
+为每个使用 HTML 目录页的网站生成合成目录页，对比两种解析方式的单页耗时：
+1. 原方式：DrissionPage 构建 SessionElement，对每个商品卡片逐个执行 s_ele/s_eles 字符串定位符
+2. 新方式：监控类的 CATALOG_SPEC（编译好的 XPath）在 lxml 文档树上提取
+
+两种方式的名称、链接、价格和尺码结果会逐一比对。原方式的元素带有所在页面的URL，
+attr('href') 返回绝对链接，新方式传入同一个页面URL，两种方式的链接都必须是绝对链接。
+另外检查只在 HTTP Content-Type 中声明编码（页面没有 <meta charset>）时，非 ASCII 商品名称按响应编码解析
+
+
+运行方式: python src/test/bench_html_extractor.py [每页商品数量] [重复次数]
+"""
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+import requests
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from DrissionPage.common import make_session_ele
+from DrissionPage._elements.session_element import SessionElement
+
+from src.crawler.sugar_monitor import SugarMonitor
+from src.crawler.d2Store_monitor import D2StoreMonitor
+from src.crawler.hermes_monitor import HermesMonitor
+from src.crawler.julian_monitor import JulianMonitor
+from src.crawler.antonioli_monitor import AntonioliMonitor
+from src.crawler.giglio_monitor import GiglioMonitor
+from src.crawler.grifo210_monitor import Grifo210Monitor
+from src.crawler.eleonora_bonucci_monitor import EleonoraBonucciMonitor
+from src.utils.html_extractor import response_encoding
+
+SIZES = ["38", "39", "40", "41", "42"]
+PAGE_URL = "https://www.example-store.com/en-ww/balenciaga/shoes?page=1"
+
+
+class CatalogPage:
+    """原方式中商品元素所在的页面，SessionElement.attr('href') 按其 url 补全相对链接"""
+
+    # 元素查找的超时时间，与没有所在页面时的默认值相同
+    timeout = 10
+
+    def __init__(self, url):
+        self.url = url
+
+
+def sugar_card(i):
+    sizes = "".join(f'<span class="field-size field-size--fake">{s}</span>' for s in SIZES)
+    return (f'<div class="product__wrapper"><a href="/p/{i}"><img src="/{i}.jpg"/></a>'
+            f'<div class="product__name">Product {i}</div><div class="product__price">€ {i}.00</div>'
+            f'<div class="product__sizes">{sizes}</div></div>')
+
+
+def d2store_card(i):
+    sizes = "".join(f"<span>{s}</span>" for s in SIZES)
+    return (f'<div class="cnt"><a href="/p/{i}"><img src="/{i}.jpg"/></a>'
+            f'<span class="prodotto">Product {i}</span><span class="prezzo"><em>€ {i}.00</em></span>'
+            f'<span class="taglia_catalogo">{sizes}</span></div>')
+
+
+def hermes_card(i):
+    return (f'<div class="product-item"><a class="product-item-name link" href="/p/{i}">Product {i}</a>'
+            f'<span class="price price-color small">€ {i}</span></div>')
+
+
+def julian_card(i):
+    sizes = "".join(f"<span>{s}</span>" for s in SIZES) + "<span>Sizes</span>"
+    return (f'<span class="product__actions row no-gutters">'
+            f'<a class="js-product js-gtm-product-click" href="/p/{i}"><span class="name">Product {i}</span></a>'
+            f'<b class="js-pairing-price">€ {i}</b><span class="sizes ty-left">{sizes}</span></span>')
+
+
+def antonioli_card(i):
+    sizes = "".join(f'<span class="size">{s}</span>' for s in SIZES[:-1])
+    sizes += f'<span class="size tw-line-through">{SIZES[-1]}</span>'
+    return (f'<h3 class="card__heading"><a href="/products/item-{i}/x">Product {i}</a></h3>'
+            f'<div class="card-information"><span class="tw-h3-reg tw-capitalize">Product {i}</span>'
+            f'<div class="price__regular"><span>Price</span><span>€ {i}</span></div>'
+            f'<div class="card-product__sizes">{sizes}</div></div>')
+
+
+def giglio_card(i):
+    sizes = "".join(f"<i>{s}</i>" for s in SIZES[:-1]) + f'<i class="out">{SIZES[-1]}</i>'
+    return (f'<article class="prod-card prod-card-new"><header><a href="/p/{i}">Product {i}</a></header>'
+            f'<small class="prod-card__price">€ {i}</small><em>{sizes}</em></article>')
+
+
+def grifo210_card(i):
+    return (f'<div class="product"><a href="/en-ww/products/item-{i}?_pos={i}"><img src="/{i}.jpg"/></a>'
+            f'<div class="product-desc"><p>Product {i}</p></div>'
+            f'<div class="price-box"><span>€ {i}</span></div></div>')
+
+
+def eleonora_card(i):
+    return (f'<div class="product-desc center"><div class="product-description"><h4>'
+            f'<a href="/p/{i}">Product {i}</a></h4></div>'
+            f'<div class="product-price"><ins>€ {i}</ins></div></div>')
+
+
+def legacy_fields(item, name_loc, url_loc, price_loc, sizes_locs=None, size_filter=None):
+    """原 parse_inventory_catalog 中对单个卡片的查找方式"""
+    name_ele = item.s_ele(name_loc)
+    url_ele = item.s_ele(url_loc) if url_loc else None
+    price_ele = item.s_ele(price_loc)
+    sizes = []
+    if sizes_locs:
+        for size_item in item.s_ele(sizes_locs[0]).s_eles(sizes_locs[1]):
+            if size_item.text and (size_filter is None or size_filter(size_item)):
+                sizes.append(size_item.text)
+    record = {
+        "name": name_ele.text if name_ele else "",
+        "url": url_ele.attr("href") if url_ele else "",
+        "price": price_ele.text if price_ele else "",
+    }
+    if sizes_locs:
+        record["sizes"] = sizes
+    return record
+
+
+# 网站名称: (监控类, 卡片生成函数, 原卡片定位符, 原字段解析函数)
+SITES = {
+    "sugar": (SugarMonitor, sugar_card, "@class:product__wrapper",
+              lambda item: legacy_fields(item, "@class:product__name", "x://a", "@class:product__price",
+                                         ("@class:product__sizes", "@class^field-size field-size--fake"))),
+    "d2Store": (D2StoreMonitor, d2store_card, 'x://div[@class="cnt"]',
+                lambda item: legacy_fields(item, 'x://span[@class="prodotto"]', "x:/a",
+                                           'x://span[@class="prezzo"]/em',
+                                           ('x://span[@class="taglia_catalogo"]', "tag:span"))),
+    "hermes": (HermesMonitor, hermes_card, 'x://div[@class="product-item"]',
+               lambda item: legacy_fields(item, "tag:a@@class^product-item-name", "tag:a@@class^product-item-name",
+                                          'x://span[@class="price price-color small"]')),
+    "julian": (JulianMonitor, julian_card, "tag:span@@class:product__actions row no-gutters",
+               lambda item: legacy_fields(item, "tag:span@class:name", "tag:a@@class:js-product js-gtm-product-click",
+                                          "tag:b@class:js-pairing-price",
+                                          ("tag:span@class:sizes ty-left", "tag:span"))),
+    "antonioli": (AntonioliMonitor, antonioli_card, "@class:card-information",
+                  lambda item: legacy_fields(item, "@class:tw-h3-reg tw-capitalize", None,
+                                             'x://*[@class="price__regular"]/span[2]',
+                                             ("@class^card-product__sizes", "x://span"),
+                                             lambda ele: "tw-line-through" not in ele.attr("class"))),
+    "giglio": (GiglioMonitor, giglio_card, "tag:article@@class:prod-card prod-card-new",
+               lambda item: legacy_fields(item, "x://header/a", "x://header/a", "tag:small@class:prod-card__price",
+                                          ("tag:em", "tag:i"), lambda ele: "class" not in ele.attrs)),
+    "grifo210": (Grifo210Monitor, grifo210_card, 'x://div[@class="product"]',
+                 lambda item: legacy_fields(item, 'x://div[@class="product-desc"]/p', "x://a",
+                                            'x://div[@class="price-box"]/span')),
+    "eleonora_bonucci": (EleonoraBonucciMonitor, eleonora_card, "@class=product-desc center",
+                         lambda item: legacy_fields(item, 'x://div[contains(@class, "product-description")]/h4/a',
+                                                    'x://div[contains(@class, "product-description")]/h4/a',
+                                                    'x://div[contains(@class, "product-price")]/ins')),
+}
+
+
+def generate_page(card_func, count):
+    """生成合成目录页：页头导航、脚本和商品卡片"""
+    nav = "<a href=/x>x</a>" * 200
+    scripts = "".join(f'<script src="/static/chunk-{i}.js"></script>' for i in range(50))
+    cards = "".join(card_func(i) for i in range(count))
+    html = (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Balenciaga</title>{scripts}</head>"
+            f"<body><header><nav>{nav}</nav></header><main>{cards}</main><footer>footer</footer></body></html>")
+    return html.encode("utf-8")
+
+
+def check_header_charset():
+    """页面没有 <meta charset>、编码只在 Content-Type 中声明时，商品名称不能按 latin-1 解析"""
+    name = "Triple S – Crème"
+    card = sugar_card(0).replace("Product 0", name)
+    for charset in ("utf-8", "windows-1252"):
+        response = requests.models.Response()
+        response._content = f"<html><head><title>x</title></head><body>{card}</body></html>".encode(charset)
+        response.headers["Content-Type"] = f"text/html; charset={charset}"
+        records = SugarMonitor.CATALOG_SPEC.extract(response.content, base_url=PAGE_URL,
+                                                    encoding=response_encoding(response))
+        assert records and records[0]["name"] == name, f"{charset} 页面商品名称解析错误: {records}"
+    print(f"Content-Type 编码检查通过: {name}")
+
+
+def parse_legacy(content, card_loc, field_func):
+    page = SessionElement(make_session_ele(content.decode("utf-8")).inner_ele, CatalogPage(PAGE_URL))
+    return [field_func(item) for item in page.s_eles(card_loc)]
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    result = None
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"每页商品数量: {count}, 重复次数: {repeat}")
+    print(f"{'网站':<18}{'原方式(ms)':>12}{'新方式(ms)':>12}{'加速比':>10}")
+
+    for site, (monitor_cls, card_func, card_loc, field_func) in SITES.items():
+        content = generate_page(card_func, count)
+        old_time, old_records = timeit(lambda: parse_legacy(content, card_loc, field_func), repeat)
+        new_time, new_records = timeit(lambda: monitor_cls.CATALOG_SPEC.extract(content, base_url=PAGE_URL), repeat)
+
+        for record in new_records:
+            parsed = urlparse(record["url"])
+            assert parsed.scheme and parsed.netloc == urlparse(PAGE_URL).netloc, \
+                f"{site} 商品链接不是页面所在网站的绝对链接: {record['url']}"
+
+        if site == "antonioli":
+            # 原方式从整个页面单独获取链接列表，这里只比较卡片内字段
+            new_records = [{k: v for k, v in record.items() if k != "url"} for record in new_records]
+            old_records = [{k: v for k, v in record.items() if k != "url"} for record in old_records]
+        if site == "julian":
+            # 原方式在解析时过滤不含数字的尺码，规则提取只负责取值
+            new_records = [dict(record, sizes=[s for s in record["sizes"] if any(c.isdigit() for c in s)])
+                           for record in new_records]
+            old_records = [dict(record, sizes=[s for s in record["sizes"] if any(c.isdigit() for c in s)])
+                           for record in old_records]
+        assert old_records == new_records, f"{site} 两种方式的解析结果不一致"
+
+        print(f"{site:<18}{old_time * 1000:>12.2f}{new_time * 1000:>12.2f}{old_time / new_time:>9.1f}x")
+
+    check_header_charset()
+
+
+if __name__ == "__main__":
+    main()
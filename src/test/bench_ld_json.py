@@ -0,0 +1,108 @@
+"""
+JSON-LD 目录提取基准测试
+使用合成的 MrPorter 目录页（包含大量页面结构和 ItemList JSON-LD），对比单页解析耗时：
+1. 原方式：写入临时HTML文件，SessionPage 读取后构建DOM，用XPath查找 ld+json 的 script 元素再 json.loads
+2. 新方式：直接在响应字节中用正则提取 ld+json 块并解析
+
+运行方式: python src/test/bench_ld_json.py [商品数量] [重复次数]
+"""
+import os
+import sys
+import json
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(current_dir)))
+
+from DrissionPage import SessionPage
+
+from src.utils.ld_json import extract_ld_json
+
+
+def generate_page(count):
+    """生成合成目录页：页头页尾、商品卡片和 ItemList/BreadcrumbList 两个 JSON-LD 块"""
+    item_list = {
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "itemListElement": [
+            {
+                "@type": "ListItem",
+                "position": i + 1,
+                "item": {
+                    "@type": "Product",
+                    "name": f"Balenciaga Sneaker {i}",
+                    "url": f"https://www.mrporter.com/en-us/mens/product/balenciaga/shoes/{1000000 + i}",
+                    "offers": {"priceSpecification": {"price": f"{500 + i}.00", "priceCurrency": "USD"}},
+                },
+            }
+            for i in range(count)
+        ],
+    }
+    breadcrumb = {"@context": "https://schema.org", "@type": "BreadcrumbList", "itemListElement": []}
+    cards = "".join(
+        f'<li class="ProductListItem"><a href="/p/{i}"><img src="/img/{i}.jpg" alt="item {i}"/>'
+        f'<span class="name">Balenciaga Sneaker {i}</span><span class="price">$ {500 + i}</span></a></li>'
+        for i in range(count)
+    )
+    scripts = "".join(f'<script src="/static/chunk-{i}.js"></script>' for i in range(50))
+    html = (
+        "<!DOCTYPE html><html><head><title>Balenciaga</title>"
+        f'<script type="application/ld+json">{json.dumps(breadcrumb)}</script>'
+        f"{scripts}</head><body><header><nav>{'<a href=/x>x</a>' * 200}</nav></header>"
+        f'<ul class="ProductList">{cards}</ul>'
+        f'<script type="application/ld+json">{json.dumps(item_list)}</script>'
+        "<footer>footer</footer></body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def parse_with_dom(content, page, save_path):
+    """原方式：写文件 -> SessionPage 读取 -> XPath -> json.loads"""
+    with open(save_path, "w", encoding="utf-8") as f:
+        f.write(content.decode("utf-8"))
+    page.get(save_path)
+    items = []
+    for script_ele in page.s_eles('xpath://script[@type="application/ld+json"]'):
+        data = json.loads(script_ele.text or script_ele.inner_html)
+        if data.get("@type") == "ItemList":
+            items.append(data)
+    return items
+
+
+def parse_in_memory(content):
+    """新方式：直接从字节中提取"""
+    return extract_ld_json(content, "ItemList")
+
+
+def bench(label, func, repeat):
+    start = time.perf_counter()
+    result = None
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label}: 每页 {elapsed * 1000:.2f} ms")
+    return elapsed, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    content = generate_page(count)
+    print(f"页面大小: {len(content) / 1024:.1f} KB, 商品数量: {count}, 重复次数: {repeat}")
+
+    page = SessionPage()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        save_path = os.path.join(tmp_dir, "mrporter.html")
+        old_time, old_result = bench("原方式（临时文件 + DOM + XPath）",
+                                     lambda: parse_with_dom(content, page, save_path), repeat)
+    new_time, new_result = bench("新方式（字节流正则提取）", lambda: parse_in_memory(content), repeat)
+
+    assert old_result == new_result, "两种方式的解析结果不一致"
+    print(f"结果一致，ItemList 商品数量: {len(new_result[0]['itemListElement'])}")
+    print(f"加速比: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+声明式HTML目录提取工具
+每个网站用 ExtractionSpec 描述商品卡片和各字段的XPath，XPath 在创建时编译一次；
+解析时用 lxml 对原始响应内容构建一次文档树，在每个卡片上执行编译好的XPath，
+代替 DrissionPage 对每个卡片逐个解析字符串定位符的 s_ele/s_eles 调用
+
+lxml 只识别页面中的 <meta charset>，只在 HTTP Content-Type 中声明编码的页面会被当作 latin-1 解析，
+解析原始响应内容时需要传入响应编码（SessionPage 的 response.encoding 或 response_encoding 的结果）
+"""
+import codecs
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+
+CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?([^\s;\"']+)", re.IGNORECASE)
+META_CHARSET = re.compile(rb"<meta[^>]*?charset\s*=\s*[\"']?([^\"'\s/>;]+)", re.IGNORECASE)
+
+
+def normalize_encoding(encoding):
+    """规范化编码名称，无法识别的编码返回 None（由 lxml 自行检测）"""
+    if not encoding:
+        return None
+    encoding = encoding.strip().strip("\"';").strip()
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
+
+def html_parser(encoding=None):
+    """创建 lxml HTML 解析器，encoding 为响应编码，为空或无法识别时由 lxml 根据 <meta charset> 检测"""
+    encoding = normalize_encoding(encoding)
+    return etree.HTMLParser(encoding=encoding) if encoding else etree.HTMLParser()
+
+
+def response_encoding(response):
+    """
+    确定 requests 响应的编码，与 SessionPage 的规则一致：
+    Content-Type 中的 charset，其次页面中的 <meta charset>，都没有时按内容推测
+
+    requests 对没有 charset 的 text/html 响应默认使用 ISO-8859-1，不能直接使用 response.encoding
+    """
+    if response is None:
+        return None
+    match = CONTENT_TYPE_CHARSET.search(response.headers.get("content-type", ""))
+    if match:
+        return match.group(1)
+    match = META_CHARSET.search(response.content or b"")
+    if match:
+        return match.group(1).decode("ascii", "ignore")
+    return response.apparent_encoding
+
+
+def element_text(node):
+    """
+    节点文本，合并空白字符，与 SessionElement.text 的结果保持一致
+
+    XPath 直接返回属性或文本时原样去除首尾空白
+    """
+    if isinstance(node, str):
+        return node.strip()
+    return " ".join("".join(node.itertext()).split())
+
+
+class FieldSpec:
+    """
+    单个字段的提取规则
+
+    选取链接属性（@href、@src）的字段在提供页面URL时转换为绝对链接，
+    与 SessionElement.attr('href') 的结果保持一致
+    """
+
+    LINK_ATTRIBUTES = ("@href", "@src")
+
+    def __init__(self, xpath, many=False):
+        """
+        :param xpath: 相对于商品卡片的XPath（以 . 开头），可以直接选取属性，如 .//a/@href
+        :param many: 是否返回所有匹配结果的列表，否则只返回第一个匹配结果
+        """
+        self.xpath = xpath
+        self.many = many
+        self.is_link = xpath.rstrip().endswith(self.LINK_ATTRIBUTES)
+        self._compiled = etree.XPath(xpath)
+
+    def extract(self, node, base_url=None):
+        result = self._compiled(node)
+        if not isinstance(result, list):
+            result = [result]
+        values = [element_text(item) for item in result]
+        if base_url and self.is_link:
+            values = [urljoin(base_url, value) if value else value for value in values]
+        if self.many:
+            return [value for value in values if value]
+        return values[0] if values else ""
+
+
+class ExtractionSpec:
+    """
+    商品目录页的提取规则
+
+    示例:
+        spec = ExtractionSpec(
+            card='//div[@class="product"]',
+            fields={
+                "name": './/div[@class="product-desc"]/p',
+                "url": ".//a/@href",
+                "sizes": FieldSpec(".//span[@class='size']", many=True),
+            },
+        )
+        records = spec.extract(response.content, base_url=response.url, encoding=response.encoding)
+    """
+
+    def __init__(self, card, fields, page_fields=None):
+        """
+        :param card: 商品卡片的XPath（相对于整个文档）
+        :param fields: 字段名到 XPath 字符串或 FieldSpec 的映射，在每个卡片上执行
+        :param page_fields: 在整个文档上执行、按顺序与卡片一一对应的字段，
+                            用于卡片内不包含该字段的页面结构（如 antonioli 的链接）
+        """
+        self.card = card
+        self._card = etree.XPath(card)
+        self.fields = {name: self._to_field(field) for name, field in fields.items()}
+        self.page_fields = {name: self._to_field(field, many=True)
+                            for name, field in (page_fields or {}).items()}
+
+    @staticmethod
+    def _to_field(field, many=False):
+        if isinstance(field, FieldSpec):
+            return field
+        return FieldSpec(field, many=many)
+
+    def extract(self, content, base_url=None, encoding=None):
+        """
+        从页面内容中提取所有商品卡片的字段
+
+        :param content: 页面内容（bytes 或 str）
+        :param base_url: 页面URL，链接字段按此转换为绝对链接，为空时返回原始属性值
+        :param encoding: content 为 bytes 时的页面编码（通常为响应编码），为空时由 lxml 根据 <meta charset> 检测
+        :return: 每个卡片一个字典，字段缺失时为 "" 或 []
+        """
+        if not content:
+            return []
+        if isinstance(content, str):
+            # 带编码声明的字符串不能直接交给 lxml 解析
+            content = content.encode("utf-8")
+            encoding = "utf-8"
+
+        root = etree.fromstring(content, html_parser(encoding))
+        if root is None:
+            return []
+
+        cards = self._card(root)
+        page_values = {name: field.extract(root, base_url) for name, field in self.page_fields.items()}
+
+        records = []
+        for index, card in enumerate(cards):
+            record = {name: field.extract(card, base_url) for name, field in self.fields.items()}
+            for name, values in page_values.items():
+                record[name] = values[index] if index < len(values) else ""
+            records.append(record)
+        return records
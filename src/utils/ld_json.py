@@ -0,0 +1,67 @@
+"""
+JSON-LD 提取工具
+直接在响应字节中查找 <script type="application/ld+json"> 块并解析，不写临时文件，也不构建DOM
+"""
+import json
+import re
+
+# 匹配 ld+json 的 script 标签，type 属性可能带引号或其他属性
+LD_JSON_PATTERN = re.compile(
+    rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def iter_ld_json(content, encoding="utf-8"):
+    """
+    逐个解析页面中的 JSON-LD 块
+
+    :param content: 页面内容（bytes 或 str）
+    :param encoding: content 为 bytes 时使用的编码
+    :return: 生成器，依次返回每个块解析后的对象（dict 或 list），解析失败的块跳过
+    """
+    if isinstance(content, str):
+        content = content.encode(encoding)
+    for match in LD_JSON_PATTERN.finditer(content):
+        block = match.group(1).strip()
+        if not block:
+            continue
+        try:
+            yield json.loads(block.decode(encoding, errors="replace"))
+        except ValueError:
+            continue
+
+
+def iter_ld_json_nodes(content, encoding="utf-8"):
+    """
+    展开 JSON-LD 中的顶层列表和 @graph，逐个返回节点
+    """
+    for data in iter_ld_json(content, encoding):
+        stack = data if isinstance(data, list) else [data]
+        for node in stack:
+            if not isinstance(node, dict):
+                continue
+            graph = node.get("@graph")
+            if isinstance(graph, list):
+                for sub_node in graph:
+                    if isinstance(sub_node, dict):
+                        yield sub_node
+            else:
+                yield node
+
+
+def extract_ld_json(content, node_type, encoding="utf-8"):
+    """
+    提取指定 @type 的 JSON-LD 节点
+
+    :param content: 页面内容（bytes 或 str）
+    :param node_type: 需要的 @type，如 "ItemList"
+    :param encoding: content 为 bytes 时使用的编码
+    :return: 匹配的节点列表
+    """
+    nodes = []
+    for node in iter_ld_json_nodes(content, encoding):
+        types = node.get("@type")
+        if types == node_type or (isinstance(types, list) and node_type in types):
+            nodes.append(node)
+    return nodes
@@ -0,0 +1,60 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限流器
+
+    令牌以 rate 个/秒的速度补充，桶内最多保存 burst 个令牌；
+    每次请求前调用 acquire 取走一个令牌，令牌不足时阻塞等待
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: 每秒补充的令牌数，即长期平均请求速率
+        :param burst: 桶容量，即允许的最大突发请求数
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        取走指定数量的令牌，令牌不足时阻塞等待
+
+        :param tokens: 需要的令牌数
+        :return: 实际等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def try_acquire(self, tokens=1):
+        """
+        尝试取走令牌，不阻塞
+
+        :return: 是否成功取得令牌
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now